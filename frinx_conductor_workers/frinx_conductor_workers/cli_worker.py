@@ -1,11 +1,11 @@
 from __future__ import print_function
 
-import copy
 import json
 import logging
 from string import Template
 
 import requests
+from frinx_conductor_workers import templates
 from frinx_conductor_workers.frinx_rest import additional_uniconfig_request_params
 from frinx_conductor_workers.frinx_rest import extract_uniconfig_cookies
 from frinx_conductor_workers.frinx_rest import get_uniconfig_cluster_from_task
@@ -20,22 +20,8 @@ uniconfig_url_cli_mount_rpc = (
 )
 uniconfig_url_cli_read_journal = "$base_url/operations/network-topology:network-topology/topology=cli/node=$id/yang-ext:mount/journal:read-journal?content=nonconfig"
 
-sync_mount_template = {
-    "input": {
-        "node-id": "",
-        "cli": {
-            "cli-topology:host": "",
-            "cli-topology:port": "",
-            "cli-topology:transport-type": "ssh",
-            "cli-topology:device-type": "",
-            "cli-topology:device-version": "",
-            "cli-topology:username": "",
-            "cli-topology:password": "",
-            "cli-topology:journal-size": 500,
-            "cli-topology:dry-run-journal-size": 180,
-        },
-    }
-}
+
+sync_mount_template = templates.cli_sync_mount_template
 
 
 def execute_mount_cli(task):
@@ -54,7 +40,7 @@ def execute_mount_cli(task):
                 }}
     """
     device_id = task["inputData"]["device_id"]
-    mount_body = copy.deepcopy(sync_mount_template)
+    mount_body = templates.cli_sync_mount_body()
 
     mount_body["input"]["node-id"] = task["inputData"]["device_id"]
     mount_body["input"]["cli"]["cli-topology:host"] = task["inputData"]["host"]
@@ -120,10 +106,7 @@ def execute_and_read_rpc_cli(task):
     output_timer = task["inputData"].get("output_timer")
 
     commands = Template(template).substitute(params)
-    execute_and_read_template = {"input": {"ios-cli:command": ""}}
-    exec_body = copy.deepcopy(execute_and_read_template)
-
-    exec_body["input"]["ios-cli:command"] = commands
+    exec_body = {"input": {"ios-cli:command": commands}}
     if output_timer:
         exec_body["input"]["wait-for-output-timer"] = output_timer
 
@@ -218,7 +201,7 @@ def execute_get_cli_journal(task):
         }
 
 
-execute_template = {"input": {"command": "", "wait-for-output-timer": "5"}}
+execute_template = templates.cli_execute_template
 
 
 def execute_cli(task):
@@ -230,9 +213,7 @@ def execute_cli(task):
     uniconfig_cookies = extract_uniconfig_cookies(task)
 
     commands = Template(template).substitute(params)
-    exec_body = copy.deepcopy(execute_template)
-
-    exec_body["input"]["command"] = commands
+    exec_body = templates.cli_execute_body(commands)
 
     id_url = (
         Template(uniconfig_url_cli_mount_rpc).substitute(
@@ -282,9 +263,7 @@ def execute_and_expect_cli(task):
     uniconfig_cookies = extract_uniconfig_cookies(task)
 
     commands = Template(template).substitute(params)
-    exec_body = copy.deepcopy(execute_template)
-
-    exec_body["input"]["command"] = commands
+    exec_body = templates.cli_execute_body(commands)
 
     id_url = (
         Template(uniconfig_url_cli_mount_rpc).substitute(
@@ -1,6 +1,7 @@
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from frinx_conductor_workers.frinx_rest import conductor_headers
@@ -17,38 +18,166 @@ def import_base_workflows():
     import_workflows(os.path.dirname(frinx_conductor_workflows.__file__))
 
 
-def import_workflows(path):
-    if os.path.isdir(path):
-        local_logs.info("Importing workflows from folder %s", path)
-        with os.scandir(path) as entries:
-            for entry in entries:
-                if entry.is_file() and entry.name.endswith(".json"):
-                    try:
-                        local_logs.info("Importing workflow %s", entry.name)
-                        with open(entry, "r") as payload_file:
-                            # api expects array in payload
-                            payload = []
-                            payload_json = json.load(payload_file)
-                            payload.append(payload_json)
-                            r = requests.put(
-                                workflow_import_url,
-                                data=json.dumps(payload),
-                                headers=conductor_headers,
-                            )
-                            local_logs.info("Response status code - %s", r.status_code)
-                            if r.status_code != 204:
-                                local_logs.warning(
-                                    "Import of workflow %s failed. "
-                                    "Ignoring the workflow. Response content: %s",
-                                    entry.name,
-                                    r.content,
-                                )
-                    except Exception as err:
-                        local_logs.error("Error while registering workflow %s", entry.name, err)
-                        raise err
-                elif entry.is_dir():
-                    import_workflows(entry.path)
-                else:
-                    local_logs.warning("Ignoring, unknown type %s", entry)
-    else:
+def read_workflow_file(path):
+    """Return a workflow name and file content, raises ValueError for invalid workflows."""
+    with open(path, "rb") as payload_file:
+        content = payload_file.read()
+    workflow = json.loads(content)
+    if not isinstance(workflow, dict) or not workflow.get("name"):
+        raise ValueError("Workflow definition has no name")
+    if not isinstance(workflow.get("tasks"), list):
+        raise ValueError("Workflow definition has no list of tasks")
+    return workflow["name"], content
+
+
+def find_workflow_files(path):
+    files = []
+    for directory, _, names in os.walk(path):
+        files.extend(os.path.join(directory, name) for name in names if name.endswith(".json"))
+    return sorted(files)
+
+
+def is_subset(local, remote):
+    """True if every value of the local definition equals the one Conductor returned."""
+    if isinstance(local, dict):
+        return isinstance(remote, dict) and all(
+            key in remote and is_subset(value, remote[key]) for key, value in local.items()
+        )
+    if isinstance(local, list):
+        return (
+            isinstance(remote, list)
+            and len(local) == len(remote)
+            and all(is_subset(value, other) for value, other in zip(local, remote))
+        )
+    return local == remote
+
+
+def split_duplicate_workflows(workflows):
+    """
+    Split (file, name, content) workflows into the ones defined once and error results of
+    workflows defined in more than one file (same name and version), none of which are sent.
+    """
+    keys = []
+    files = {}
+    for file, _, content in workflows:
+        definition = json.loads(content)
+        key = "%s:%s" % (definition["name"], definition.get("version", 1))
+        keys.append(key)
+        files.setdefault(key, []).append(file)
+
+    unique = []
+    duplicates = []
+    for workflow, key in zip(workflows, keys):
+        if len(files[key]) == 1:
+            unique.append(workflow)
+        else:
+            error = "Workflow %s is defined more than once: %s" % (key, ", ".join(files[key]))
+            duplicates.append(
+                {"file": workflow[0], "name": workflow[1], "status_code": None, "error": error}
+            )
+    return unique, duplicates
+
+
+def changed_workflows(session, workflows):
+    """
+    Workflows (file, name, content) new or changed compared to the ones stored in Conductor,
+    which adds defaults and audit fields to stored workflows. All of them if Conductor
+    workflows cannot be read.
+    """
+    try:
+        r = session.get(workflow_import_url, headers=conductor_headers, timeout=60)
+        r.raise_for_status()
+        stored = {(w["name"], w.get("version", 1)): w for w in r.json()}
+    except Exception:
+        local_logs.warning("Unable to read workflows from Conductor, importing all", exc_info=True)
+        return workflows
+
+    changed = []
+    for workflow in workflows:
+        definition = json.loads(workflow[2])
+        stored_workflow = stored.get((definition["name"], definition.get("version", 1)))
+        if stored_workflow is None or not is_subset(definition, stored_workflow):
+            changed.append(workflow)
+    return changed
+
+
+def put_workflows(session, workflows):
+    """PUT a list of (file, name, content) workflows, returns a result per workflow."""
+    try:
+        # api expects array in payload
+        payload = b"[" + b",".join(content for _, _, content in workflows) + b"]"
+        r = session.put(workflow_import_url, data=payload, headers=conductor_headers, timeout=60)
+        error = None if r.status_code == 204 else r.content.decode("utf8", errors="replace")
+        status_code = r.status_code
+    except Exception as err:
+        status_code, error = None, str(err)
+
+    return [
+        {"file": file, "name": name, "status_code": status_code, "error": error}
+        for file, name, _ in workflows
+    ]
+
+
+def import_workflows(path, batch_size=50, max_concurrency=4):
+    """
+    Import workflows from JSON files in path and its subdirectories. Files are read
+    concurrently and workflows new or changed compared to Conductor are sent in lists of
+    batch_size workflows by up to max_concurrency requests at a time. Conductor rejects a whole
+    list for one invalid workflow, workflows of a rejected list are then sent one by one.
+    Returns a result (dict) per workflow file, status_code of unchanged workflows is None.
+    Workflows defined in more than one file are not sent and get an error.
+    """
+    if not os.path.isdir(path):
         local_logs.error("Path to workflows %s is not a directory.", path)
+        return []
+
+    local_logs.info("Importing workflows from folder %s", path)
+    files = find_workflow_files(path)
+    workflows = []
+    results = []
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        for file, future in zip(files, [executor.submit(read_workflow_file, f) for f in files]):
+            try:
+                name, content = future.result()
+                workflows.append((file, name, content))
+            except Exception as err:
+                results.append({"file": file, "name": None, "status_code": None, "error": str(err)})
+    workflows, duplicates = split_duplicate_workflows(workflows)
+    results.extend(duplicates)
+
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_concurrency)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        changed = changed_workflows(session, workflows)
+        changed_files = {file for file, _, _ in changed}
+        for file, name, _ in workflows:
+            if file not in changed_files:
+                results.append({"file": file, "name": name, "status_code": None, "error": None})
+        local_logs.info("%s of %s workflows changed", len(changed), len(workflows))
+        batches = [changed[i : i + batch_size] for i in range(0, len(changed), batch_size)]
+
+        def submit(batch):
+            batch_results = put_workflows(session, batch)
+            if len(batch) > 1 and batch_results[0]["error"] is not None:
+                batch_results = [put_workflows(session, [workflow])[0] for workflow in batch]
+            return batch_results
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            for batch_results in executor.map(submit, batches):
+                results.extend(batch_results)
+
+    for result in results:
+        if result["error"] is not None:
+            local_logs.warning(
+                "Import of workflow %s failed. Ignoring the workflow. Response content: %s",
+                result["file"],
+                result["error"],
+            )
+    local_logs.info(
+        "Imported %s of %s workflows",
+        sum(result["error"] is None for result in results),
+        len(results),
+    )
+    return results
@@ -1,11 +1,11 @@
 from __future__ import print_function
 
-import copy
 import json
 import logging
 from string import Template
 
 import requests
+from frinx_conductor_workers import templates
 from frinx_conductor_workers.frinx_rest import additional_uniconfig_request_params
 from frinx_conductor_workers.frinx_rest import extract_uniconfig_cookies
 from frinx_conductor_workers.frinx_rest import get_uniconfig_cluster_from_task
@@ -20,26 +20,8 @@ uniconfig_url_netconf_mount_sync = "$base_url/operations/connection-manager:inst
 uniconfig_url_netconf_unmount_sync = "$base_url/operations/connection-manager:uninstall-node"
 uniconfig_url_netconf_mount_oper = "$base_url/data/network-topology:network-topology/topology=topology-netconf/node=$id?content=nonconfig"
 
-sync_mount_template = {
-    "input": {
-        "node-id": "",
-        "netconf": {
-            "netconf-node-topology:host": "",
-            "netconf-node-topology:port": 2022,
-            "netconf-node-topology:keepalive-delay": 5,
-            "netconf-node-topology:max-connection-attempts": 1,
-            "netconf-node-topology:connection-timeout-millis": 60000,
-            "netconf-node-topology:default-request-timeout-millis": 60000,
-            "netconf-node-topology:tcp-only": False,
-            "netconf-node-topology:username": "",
-            "netconf-node-topology:password": "",
-            "netconf-node-topology:sleep-factor": 1.0,
-            "uniconfig-config:uniconfig-native-enabled": True,
-            "netconf-node-topology:edit-config-test-option": "set",
-            "uniconfig-config:blacklist": {"extension": ["tailf:display-when false"]},
-        },
-    }
-}
+
+sync_mount_template = templates.netconf_sync_mount_template
 
 
 def execute_mount_netconf(task):
@@ -61,7 +43,7 @@ def execute_mount_netconf(task):
 
     device_id = task["inputData"]["device_id"]
 
-    mount_body = copy.deepcopy(sync_mount_template)
+    mount_body = templates.netconf_sync_mount_body()
     mount_body["input"]["node-id"] = task["inputData"]["device_id"]
     mount_body["input"]["netconf"]["netconf-node-topology:host"] = task["inputData"]["host"]
     mount_body["input"]["netconf"]["netconf-node-topology:port"] = task["inputData"]["port"]
@@ -0,0 +1,60 @@
+"""Request bodies of Uniconfig shared by CLI and NETCONF workers."""
+
+
+# Every call of a *_body function returns a new body, so workers fill it in place without deep
+# copies of a shared template. The *_template constants are only default bodies for existing
+# callers.
+
+
+def cli_sync_mount_body():
+    """Returns a new CLI mount body with default values, callers are free to modify it."""
+    return {
+        "input": {
+            "node-id": "",
+            "cli": {
+                "cli-topology:host": "",
+                "cli-topology:port": "",
+                "cli-topology:transport-type": "ssh",
+                "cli-topology:device-type": "",
+                "cli-topology:device-version": "",
+                "cli-topology:username": "",
+                "cli-topology:password": "",
+                "cli-topology:journal-size": 500,
+                "cli-topology:dry-run-journal-size": 180,
+            },
+        }
+    }
+
+
+def netconf_sync_mount_body():
+    """Returns a new NETCONF mount body with default values, callers are free to modify it."""
+    return {
+        "input": {
+            "node-id": "",
+            "netconf": {
+                "netconf-node-topology:host": "",
+                "netconf-node-topology:port": 2022,
+                "netconf-node-topology:keepalive-delay": 5,
+                "netconf-node-topology:max-connection-attempts": 1,
+                "netconf-node-topology:connection-timeout-millis": 60000,
+                "netconf-node-topology:default-request-timeout-millis": 60000,
+                "netconf-node-topology:tcp-only": False,
+                "netconf-node-topology:username": "",
+                "netconf-node-topology:password": "",
+                "netconf-node-topology:sleep-factor": 1.0,
+                "uniconfig-config:uniconfig-native-enabled": True,
+                "netconf-node-topology:edit-config-test-option": "set",
+                "uniconfig-config:blacklist": {"extension": ["tailf:display-when false"]},
+            },
+        }
+    }
+
+
+def cli_execute_body(command):
+    """Returns a new CLI execute body."""
+    return {"input": {"command": command, "wait-for-output-timer": "5"}}
+
+
+cli_sync_mount_template = cli_sync_mount_body()
+netconf_sync_mount_template = netconf_sync_mount_body()
+cli_execute_template = cli_execute_body("")
@@ -5,6 +5,7 @@ import logging
 import re
 import urllib
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from string import Template
 
 import requests
@@ -20,6 +21,9 @@ from frinx_conductor_workers.frinx_rest import parse_response
 
 local_logs = logging.getLogger(__name__)
 
+# Upper bound of Uniconfig clusters a multizone operation talks to at once
+MAX_CLUSTER_CONCURRENCY = 16
+
 uniconfig_url_uniconfig_mount = (
     "$base_url/data/network-topology:network-topology/topology=uniconfig/node=$id"
 )
@@ -297,32 +301,49 @@ def parse_devices(task, fail_on_empty=True):
     return extracted_devices
 
 
-def request_uniconfig(devices, url, uniconfig_cookies_multizone={}):
-    responses = []
+def map_clusters(function, clusters):
+    """
+    Call function for every item of clusters (one per Uniconfig cluster) concurrently,
+    results are returned in the order of clusters.
+    """
+    if len(clusters) <= 1:
+        return [function(cluster) for cluster in clusters]
+    with ThreadPoolExecutor(max_workers=min(len(clusters), MAX_CLUSTER_CONCURRENCY)) as executor:
+        return list(executor.map(function, clusters))
+
+
+def request_clusters(devices, url, uniconfig_cookies_multizone):
+    """Send the RPC at url to all Uniconfig clusters of devices concurrently."""
 
-    original_url = url
-    for device in devices:
-        url = Template(original_url).substitute({"base_url": device.uc_cluster})
+    def request_cluster(device):
+        cluster_url = Template(url).substitute({"base_url": device.uc_cluster})
         uniconfig_cookies = uniconfig_cookies_multizone.get(device.uc_cluster, {})
         tx_id = uniconfig_cookies.get("UNICONFIGTXID", "")
 
         r = requests.post(
-            url,
+            cluster_url,
             data=json.dumps(create_commit_request(device.device_names)),
             cookies=uniconfig_cookies,
             **additional_uniconfig_request_params,
         )
-
-        response_code, response_json = parse_response(r)
-        response = {
-            "url": url,
+        response_code, response_body = parse_response(r)
+        return {
+            "url": cluster_url,
             "UNICONFIGTXID": tx_id,
             "response_code": response_code,
-            "response_body": response_json,
+            "response_body": response_body,
         }
+
+    return map_clusters(request_cluster, devices)
+
+
+def request_uniconfig(devices, url, uniconfig_cookies_multizone={}):
+    responses = []
+
+    for response in request_clusters(devices, url, uniconfig_cookies_multizone):
         if (
-            response_code == requests.codes.ok
-            and response_json["output"]["overall-status"] == "complete"
+            response["response_code"] == requests.codes.ok
+            and response["response_body"]["output"]["overall-status"] == "complete"
         ):
             responses.append(response)
         else:
@@ -334,29 +355,10 @@ def request_uniconfig(devices, url, uniconfig_cookies_multizone={}):
 def commit_uniconfig(devices, url, uniconfig_cookies_multizone={}):
     responses = []
 
-    original_url = url
-    for device in devices:
-        url = Template(original_url).substitute({"base_url": device.uc_cluster})
-        uniconfig_cookies = uniconfig_cookies_multizone.get(device.uc_cluster, {})
-        tx_id = uniconfig_cookies.get("UNICONFIGTXID", "")
-
-        r = requests.post(
-            url,
-            data=json.dumps(create_commit_request(device.device_names)),
-            cookies=uniconfig_cookies,
-            **additional_uniconfig_request_params,
-        )
-        response_code, response_body = parse_response(r)
-
-        response = {
-            "url": url,
-            "UNICONFIGTXID": tx_id,
-            "response_code": response_code,
-            "response_body": response_body,
-        }
-
+    for response in request_clusters(devices, url, uniconfig_cookies_multizone):
+        response_body = response["response_body"]
         if (
-            response_code == requests.codes.ok
+            response["response_code"] == requests.codes.ok
             and response_body["output"]["overall-status"] == "complete"
         ):
             responses.append(response)
@@ -384,31 +386,32 @@ def create_tx_multizone(task):
     devices = parse_devices(task, fail_on_empty=False)
     devices_by_uniconfig = get_devices_by_uniconfig(devices, task)
 
+    responses = map_clusters(lambda d: create_tx_internal(d.uc_cluster), devices_by_uniconfig)
+
     uniconfig_cookies_multizone = {}
+    failed = None
+    for d, response in zip(devices_by_uniconfig, responses):
+        if response["status"] == util.COMPLETED_STATUS:
+            uniconfig_cookies_multizone[d.uc_cluster] = response["output"]["uniconfig_cookies"]
+        elif failed is None:
+            failed = (d, response)
 
-    for d in devices_by_uniconfig:
-        response = create_tx_internal(uniconfig_cluster=d.uc_cluster)
-        if response["status"] != util.COMPLETED_STATUS:
-            # Failed to create some transaction, close already opened transactions
-            for already_opened_tx_uc_cluster in uniconfig_cookies_multizone:
-                # Best effort closing opened transactions
-                # If unsuccessful, UC should clean them up eventually
-                close_tx_internal(
-                    uniconfig_cookies_multizone[already_opened_tx_uc_cluster],
-                    already_opened_tx_uc_cluster,
-                )
+    if failed is not None:
+        # Failed to create some transaction, close already opened transactions
+        # Best effort closing opened transactions
+        # If unsuccessful, UC should clean them up eventually
+        d, response = failed
+        close_tx_multizone_internal(uniconfig_cookies_multizone)
 
-            # ... and return failed response
-            return {
-                "status": "FAILED",
-                "output": {"failed_zone": d.uc_cluster, "response": response},
-                "logs": [
-                    f"""Unable to create multizone transactions. Failed for: '{d.uc_cluster}'. 
+        # ... and return failed response
+        return {
+            "status": "FAILED",
+            "output": {"failed_zone": d.uc_cluster, "response": response},
+            "logs": [
+                f"""Unable to create multizone transactions. Failed for: '{d.uc_cluster}'. 
                                  Close sent to already opened transactions: '{uniconfig_cookies_multizone}'"""
-                ],
-            }
-        else:
-            uniconfig_cookies_multizone[d.uc_cluster] = response["output"]["uniconfig_cookies"]
+            ],
+        }
 
     return {
         "status": "COMPLETED",
@@ -472,12 +475,15 @@ def close_tx_multizone(task):
 
 
 def close_tx_multizone_internal(uniconfig_cookies_multizone):
-    close_tx_response = {}
-    for uc_cluster in uniconfig_cookies_multizone:
-        uniconfig_cookies = uniconfig_cookies_multizone[uc_cluster]
-        tx_id = uniconfig_cookies["UNICONFIGTXID"]
-        response = close_tx_internal(uniconfig_cookies, uc_cluster)
+    clusters = list(uniconfig_cookies_multizone)
+    responses = map_clusters(
+        lambda uc_cluster: close_tx_internal(uniconfig_cookies_multizone[uc_cluster], uc_cluster),
+        clusters,
+    )
 
+    close_tx_response = {}
+    for uc_cluster, response in zip(clusters, responses):
+        tx_id = uniconfig_cookies_multizone[uc_cluster]["UNICONFIGTXID"]
         close_tx_response[uc_cluster] = {"UNICONFIGTXID": tx_id, "status": response["status"]}
         if response["status"] != util.COMPLETED_STATUS:
             pass  # todo:?
@@ -575,23 +581,29 @@ def rollback_all_tx(task):
 def revert_tx_multizone(uniconfig_cookies_multizone):
     # return_logs.info("Reverting transactions in UCs on context: '%s'", uniconfig_cookies_multizone)
 
-    close_tx_response = {}
-
-    for uc_cluster in uniconfig_cookies_multizone:
-        uniconfig_cookies = uniconfig_cookies_multizone[uc_cluster]
-        tx_id = uniconfig_cookies["UNICONFIGTXID"]
-        response = check_and_revert_tx(uniconfig_cookies, uc_cluster)
+    clusters = list(uniconfig_cookies_multizone)
+    responses = map_clusters(
+        lambda uc_cluster: check_and_revert_tx(uniconfig_cookies_multizone[uc_cluster], uc_cluster),
+        clusters,
+    )
 
+    close_tx_response = {}
+    failed = False
+    for uc_cluster, response in zip(clusters, responses):
+        tx_id = uniconfig_cookies_multizone[uc_cluster]["UNICONFIGTXID"]
         close_tx_response[uc_cluster] = {"UNICONFIGTXID": tx_id, "status": response["status"]}
 
         if response["status"] != util.COMPLETED_STATUS:
             # Failing to revert is an error
-            # return_logs.error(
-            #     "Unable to revert multizone transactions for : '%s'. Response: '%s'",
-            #     uc_cluster,
-            #     response,
-            # )
-            return util.failed_response({"UNICONFIGTXID_multizone": close_tx_response})
+            local_logs.error(
+                "Unable to revert multizone transactions for : '%s'. Response: '%s'",
+                uc_cluster,
+                response,
+            )
+            failed = True
+
+    if failed:
+        return util.failed_response({"UNICONFIGTXID_multizone": close_tx_response})
 
     # return_logs.info(
     #     "Multizone transactions reverted successfully for: '%s'",
@@ -1,6 +1,8 @@
 #!/usr/bin/env/python3
 import json
+import threading
 import unittest
+from collections import namedtuple
 from http.cookies import SimpleCookie
 from unittest.mock import patch
 
@@ -602,6 +604,70 @@ class TestReplaceConfigWithOper(unittest.TestCase):
         self.assertFalse("Calling RPC with empty device list is not allowed")
 
 
+class TestMultizone(unittest.TestCase):
+    clusters = ["http://uc-a/rests", "http://uc-b/rests"]
+
+    def setUp(self) -> None:
+        device_with_cluster = namedtuple("devices", ["uc_cluster", "device_names"])
+        devices_patch = patch(
+            "frinx_conductor_workers.uniconfig_worker.get_devices_by_uniconfig",
+            lambda devices, task, *args: [
+                device_with_cluster(uc_cluster=cluster, device_names=devices)
+                for cluster in self.clusters
+            ],
+        )
+        devices_patch.start()
+        self.addCleanup(devices_patch.stop)
+
+        # Requests to both clusters have to be sent at once to pass the barrier
+        self.barrier = threading.Barrier(2, timeout=5)
+        self.requests = []
+
+    def post(self, url, cookies=None, **kwargs):
+        self.requests.append((url, cookies))
+        if url.endswith("create-transaction"):
+            self.barrier.wait()
+            if url.startswith(self.clusters[0]):
+                return MockResponse(b"{}", 500, {})
+            return MockResponse(b"", 201, {"UNICONFIGTXID": "tx-b", "uniconfig_server_id": "b"})
+        if url.endswith("commit"):
+            self.barrier.wait()
+            return MockResponse(bytes(json.dumps(commit_output), encoding="utf-8"), 200, {})
+        return MockResponse(b"{}", 200, {})
+
+    def test_commit(self):
+        with patch("frinx_conductor_workers.uniconfig_worker.requests.post", self.post):
+            request = frinx_conductor_workers.uniconfig_worker.commit(
+                {
+                    "inputData": {
+                        "devices": "xr5, xr6",
+                        "uniconfig_context": {
+                            "uniconfig_cookies_multizone": {
+                                self.clusters[0]: {"UNICONFIGTXID": "tx-a"},
+                                self.clusters[1]: {"UNICONFIGTXID": "tx-b"},
+                            }
+                        },
+                    }
+                }
+            )
+        self.assertEqual(request["status"], "COMPLETED")
+        self.assertEqual(
+            ["tx-a", "tx-b"], [r["UNICONFIGTXID"] for r in request["output"]["responses"]]
+        )
+
+    def test_create_tx_multizone_failed(self):
+        with patch("frinx_conductor_workers.uniconfig_worker.requests.post", self.post):
+            request = frinx_conductor_workers.uniconfig_worker.create_tx_multizone(
+                {"inputData": {"devices": "xr5"}}
+            )
+        self.assertEqual(request["status"], "FAILED")
+        self.assertEqual(request["output"]["failed_zone"], self.clusters[0])
+        # Transaction opened in the other cluster is closed
+        url, cookies = self.requests[-1]
+        self.assertEqual(self.clusters[1] + "/operations/uniconfig-manager:close-transaction", url)
+        self.assertEqual("tx-b", cookies["UNICONFIGTXID"])
+
+
 class TestUtilityFunction(unittest.TestCase):
     def test_escape(self):
         uri = frinx_conductor_workers.uniconfig_worker.apply_functions(
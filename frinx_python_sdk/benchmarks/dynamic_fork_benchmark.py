@@ -0,0 +1,72 @@
+"""
+Per-device overhead of the Inventory dynamic fork generation (all_devices_fork_tasks).
+
+"before" is the previous implementation, deep copying the task body template per device,
+"after" is the current one. Inventory is not called, get_all_devices returns a fixture.
+
+    python frinx_python_sdk/benchmarks/dynamic_fork_benchmark.py --devices 10000
+"""
+import argparse
+import copy
+import timeit
+from unittest.mock import patch
+
+from frinx.services.inventory import inventory_worker
+from frinx.services.inventory import utils as inventory_utils
+
+TASK_BODY_TEMPLATE = {
+    "name": "sub_task",
+    "taskReferenceName": "",
+    "type": "SUB_WORKFLOW",
+    "subWorkflowParam": {"name": "", "version": 1},
+}
+
+
+def fork_tasks_before(task, task_params, ids):
+    dynamic_tasks = []
+    dynamic_tasks_i = {}
+
+    for device in ids:
+        device_id = device["node"]["name"]
+
+        task_body = copy.deepcopy(TASK_BODY_TEMPLATE)
+        task_body["taskReferenceName"] = device_id
+        task_body["subWorkflowParam"]["name"] = task
+        dynamic_tasks.append(task_body)
+
+        per_device_params = dict(task_params)
+        per_device_params.update({"device_id": device_id})
+        dynamic_tasks_i.update({device_id: per_device_params})
+
+    return {"dynamic_tasks_i": dynamic_tasks_i, "dynamic_tasks": dynamic_tasks}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--devices", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ids = [{"node": {"name": f"R{i}"}} for i in range(args.devices)]
+    task_params = {"uri": "/frinx-openconfig-interfaces:interfaces", "topology_uri": "uniconfig"}
+
+    with patch.object(inventory_utils, "get_all_devices", return_value=ids):
+
+        def after():
+            return inventory_worker.all_devices_fork_tasks(
+                "Read_journal_cli_device", task_params, optional=""
+            ).data
+
+        def before():
+            return fork_tasks_before("Read_journal_cli_device", task_params, ids)
+
+        assert before() == after(), "implementations generate different forks"
+
+        print(f"{'':<8} {'total ms':>10} {'per device us':>14}")
+        for name, function in [("before", before), ("after", after)]:
+            total = min(timeit.repeat(function, number=1, repeat=args.repeat))
+            print(f"{name:<8} {total * 1e3:>10.1f} {total / args.devices * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
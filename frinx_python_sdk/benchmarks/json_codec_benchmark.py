@@ -0,0 +1,111 @@
+"""
+Encoding and decoding time of json_codec codecs on representative Uniconfig payloads.
+
+"str" is the previous way of parsing responses (decode the body to str, then json.loads)
+and encoding requests (json.dumps, then encode).
+
+    python frinx_python_sdk/benchmarks/json_codec_benchmark.py
+"""
+import argparse
+import json
+import timeit
+
+from frinx.common.json_codec import JsonCodec
+from frinx.common.json_codec import OrjsonCodec
+
+
+def structured_device_data(interface_count):
+    # Response of a read of frinx-openconfig-interfaces:interfaces from a mounted device
+    return {
+        "frinx-openconfig-interfaces:interfaces": {
+            "interface": [
+                {
+                    "name": f"GigabitEthernet0/0/0/{i}",
+                    "config": {
+                        "type": "iana-if-type:ethernetCsmacd",
+                        "enabled": i % 3 != 0,
+                        "name": f"GigabitEthernet0/0/0/{i}",
+                        "description": f"uplink to core router {i} - ľšč",
+                        "mtu": 9216,
+                    },
+                    "subinterfaces": {
+                        "subinterface": [
+                            {
+                                "index": 0,
+                                "config": {"index": 0, "enabled": True},
+                                "frinx-openconfig-if-ip:ipv4": {
+                                    "addresses": {
+                                        "address": [
+                                            {
+                                                "ip": f"10.{i // 256}.{i % 256}.1",
+                                                "config": {"prefix-length": 24},
+                                            }
+                                        ]
+                                    }
+                                },
+                            }
+                        ]
+                    },
+                    "state": {"counters": {"in-octets": i * 1234567, "out-octets": i * 7654321}},
+                }
+                for i in range(interface_count)
+            ]
+        }
+    }
+
+
+def commit_output(device_count):
+    return {
+        "output": {
+            "overall-status": "complete",
+            "node-results": {
+                "node-result": [
+                    {"node-id": f"R{i}", "configuration-status": "complete"}
+                    for i in range(device_count)
+                ]
+            },
+        }
+    }
+
+
+def legacy_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False).encode("utf8")
+
+
+def legacy_loads(content):
+    return json.loads(content.decode("utf8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = {
+        "commit 10 devices": commit_output(10),
+        "read 10 interfaces": structured_device_data(10),
+        "read 1000 interfaces": structured_device_data(1000),
+    }
+    codecs = {"str": (legacy_dumps, legacy_loads)}
+    for codec in [JsonCodec(), OrjsonCodec()]:
+        codecs[codec.name] = (codec.dumps, codec.loads)
+
+    print(f"{'payload':<22} {'size':>9} {'codec':<7} {'dumps us':>10} {'loads us':>10}")
+    for payload_name, payload in payloads.items():
+        content = legacy_dumps(payload)
+        number = max(1, 2_000_000 // len(content))
+        for codec_name, (dumps, loads) in codecs.items():
+            dumps_time = min(
+                timeit.repeat(lambda: dumps(payload), number=number, repeat=args.repeat)
+            )
+            loads_time = min(
+                timeit.repeat(lambda: loads(content), number=number, repeat=args.repeat)
+            )
+            print(
+                f"{payload_name:<22} {len(content):>9} {codec_name:<7}"
+                f" {dumps_time / number * 1e6:>10.1f} {loads_time / number * 1e6:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
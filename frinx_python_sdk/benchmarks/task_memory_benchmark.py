@@ -0,0 +1,102 @@
+"""
+Memory per in-flight task and allocations of task and task result representations.
+
+"model" is the pydantic Task and TaskResultModel (debug mode), "light" the TaskView and the
+slotted TaskResult used by default. Memory and allocated blocks are measured by tracemalloc
+while in-flight tasks are held, allocations per second are reported for --rate tasks per second.
+Maximum task rate is measured without tracing.
+
+    python frinx_python_sdk/benchmarks/task_memory_benchmark.py
+"""
+import argparse
+import time
+import tracemalloc
+
+from frinx.common.conductor_enums import TaskResultStatus
+from frinx.common.worker.task import Task
+from frinx.common.worker.task import TaskView
+from frinx.common.worker.task_result import TaskResult
+from frinx.common.worker.task_result import TaskResultModel
+
+
+def polled_task(index):
+    return {
+        "taskType": "TEST_echo",
+        "status": "IN_PROGRESS",
+        "inputData": {"input": f"hello {index}"},
+        "referenceTaskName": "echo_ref",
+        "retryCount": 0,
+        "seq": 1,
+        "pollCount": 1,
+        "taskDefName": "TEST_echo",
+        "scheduledTime": 1680000000000,
+        "startTime": 1680000000010,
+        "updateTime": 1680000000010,
+        "responseTimeoutSeconds": 60,
+        "workflowInstanceId": f"workflow-{index}",
+        "workflowType": "Test_workflow",
+        "taskId": f"task-{index}",
+        "workerId": "worker-1",
+        "workflowPriority": 0,
+    }
+
+
+def model(raw):
+    task = Task(**raw)
+    task_result = TaskResultModel(status=TaskResultStatus.COMPLETED, logs="Echo invoked")
+    task_result.add_output_data("output", task.input_data["input"])
+    task_result.add_output_data("task_id", task.task_id)
+    return task, task_result
+
+
+def light(raw):
+    task = TaskView(raw)
+    task_result = TaskResult(status=TaskResultStatus.COMPLETED, logs="Echo invoked")
+    task_result.add_output_data("output", task.input_data["input"])
+    task_result.add_output_data("task_id", task.task_id)
+    return task, task_result
+
+
+def measure_memory(function, raw_tasks):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    in_flight = [function(raw) for raw in raw_tasks]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    size = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    del in_flight
+    return size / len(raw_tasks), blocks / len(raw_tasks)
+
+
+def measure_rate(function, raw_tasks, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for raw in raw_tasks:
+            function(raw)
+        best = min(best, time.perf_counter() - start)
+    return len(raw_tasks) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rate", type=int, default=1000, help="tasks per second")
+    args = parser.parse_args()
+
+    raw_tasks = [polled_task(index) for index in range(args.tasks)]
+
+    print(f"{'':<6} {'bytes/task':>11} {'blocks/task':>12} {'blocks/s':>10} {'max tasks/s':>12}")
+    for name, function in [("model", model), ("light", light)]:
+        size, blocks = measure_memory(function, raw_tasks)
+        rate = measure_rate(function, raw_tasks, args.repeat)
+        allocations = blocks * args.rate
+        print(f"{name:<6} {size:>11.0f} {blocks:>12.1f} {allocations:>10.0f} {rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
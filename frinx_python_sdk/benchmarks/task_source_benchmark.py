@@ -0,0 +1,90 @@
+"""
+Dispatch throughput of TaskSource against the number of consumer threads.
+
+Consumer threads reserve tasks with get_next_task while a queue reader thread refreshes the
+queue sizes every 100ms, as FrinxConductorWrapper does. Only a few of the registered task
+types have queued tasks, the rest must be skipped by the dispatch.
+
+    python frinx_python_sdk/benchmarks/task_source_benchmark.py --threads 1 8 50 200
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from frinx.client.FrinxConductorWrapper import TaskSource
+from frinx.client.FrinxConductorWrapper import TaskTypeScheduling
+
+
+def exec_function(task):
+    return {"status": "COMPLETED", "output": {}}
+
+
+def run(thread_count, task_type_count, queued_type_count, duration):
+    task_source = TaskSource()
+    for i in range(task_type_count):
+        scheduling = TaskTypeScheduling(max_concurrency=4) if i % 200 == 0 else None
+        task_source.register_task_type(f"TYPE_{i}", exec_function, scheduling)
+    queue = {f"TYPE_{i}": 1_000_000 for i in range(0, task_type_count, queued_type_count)}
+
+    begin = threading.Event()
+    stop = threading.Event()
+    latencies = [[] for _ in range(thread_count)]
+
+    def read_queues():
+        while not stop.wait(0.1):
+            task_source.handle_tasks(queue)
+
+    def consume(thread_latencies):
+        last_task_type = None
+        begin.wait()
+        while not stop.is_set():
+            start = time.perf_counter()
+            next_task = task_source.get_next_task(last_task_type)
+            last_task_type = None
+            if next_task:
+                thread_latencies.append(time.perf_counter() - start)
+                last_task_type = next_task.task_type
+
+    task_source.handle_tasks(queue)
+    threads = [threading.Thread(target=read_queues)]
+    threads += [threading.Thread(target=consume, args=(latencies[i],)) for i in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    # Start consuming once all threads run, starting a thread waits for the GIL
+    begin.set()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    all_latencies = sorted(
+        latency for thread_latencies in latencies for latency in thread_latencies
+    )
+    return {
+        "threads": thread_count,
+        "dispatches/s": len(all_latencies) / duration,
+        "mean us": statistics.fmean(all_latencies) * 1e6,
+        "p99 us": all_latencies[int(len(all_latencies) * 0.99)] * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 50, 200])
+    parser.add_argument("--task-types", type=int, default=500)
+    parser.add_argument("--queued-every", type=int, default=100, help="every n-th type is queued")
+    parser.add_argument("--duration", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'threads':>8} {'dispatches/s':>14} {'mean us':>10} {'p99 us':>10}")
+    for thread_count in args.threads:
+        result = run(thread_count, args.task_types, args.queued_every, args.duration)
+        print(
+            f"{result['threads']:>8} {result['dispatches/s']:>14.0f}"
+            f" {result['mean us']:>10.1f} {result['p99 us']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
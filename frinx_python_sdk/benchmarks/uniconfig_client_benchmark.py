@@ -0,0 +1,90 @@
+"""
+Requests per second of services.uniconfig.utils.request against a local Uniconfig stub.
+
+"before" is the previous client (requests.request, a new connection per request), "after" the
+pooled UniconfigClient. The stub speaks plain HTTP, with HTTPS Uniconfig every new connection
+costs a TLS handshake on top of the TCP one.
+
+    python frinx_python_sdk/benchmarks/uniconfig_client_benchmark.py --threads 8
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import requests
+from frinx.common.frinx_rest import uniconfig_headers
+from frinx.common.util import parse_response
+from frinx.services.uniconfig import utils as uniconfig_utils
+
+RESPONSE = b'{"output": {"overall-status": "complete"}}'
+
+
+class UniconfigStub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.send_header("Set-Cookie", "UNICONFIGTXID=tx-1; Path=/")
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def request_before(method, url, cookies=None, data=None, timeout=60):
+    response = requests.request(
+        method=method,
+        url=url,
+        cookies=cookies,
+        data=data,
+        timeout=timeout,
+        headers=uniconfig_headers,
+    )
+    code, data = parse_response(response)
+    return uniconfig_utils.UniconfigRpcResponse(
+        code=code, data=data, cookies=uniconfig_utils.parse_response_cookies(response)
+    )
+
+
+def run(function, url, requests_count, threads):
+    cookies = {"UNICONFIGTXID": "tx-1", "uniconfig_server_id": "server-1"}
+
+    def send(_):
+        return function("POST", url, cookies=cookies, data=b'{"input": {}}').code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        codes = list(executor.map(send, range(requests_count)))
+    elapsed = time.perf_counter() - start
+    assert codes == [200] * requests_count
+    return requests_count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), UniconfigStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%s/rests/operations/uniconfig-manager:commit" % server.server_port
+    uniconfig_utils.uniconfig_client.pool_size = args.threads
+
+    print(f"{'':<8} {'requests/s':>12}")
+    for name, function in [("before", request_before), ("after", uniconfig_utils.request)]:
+        print(f"{name:<8} {run(function, url, args.requests, args.threads):>12.0f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Per-task overhead of WorkerImpl._execute_wrapper for the TEST_echo worker.
+
+"before" is the previous wrapper (input validated, then a Task model built from the polled task
+and the TaskResult converted by dict()), "after" is the current one.
+
+    python frinx_python_sdk/benchmarks/worker_wrapper_benchmark.py
+"""
+import argparse
+import timeit
+
+from frinx.common.conductor_enums import TaskResultStatus
+from frinx.common.worker.task import Task
+from frinx.common.worker.task_result import TaskResult
+from frinx.workers.test.test_worker import TestWorker
+
+
+def polled_task():
+    # Task as returned by Conductor poll
+    return {
+        "taskType": "TEST_echo",
+        "status": "IN_PROGRESS",
+        "inputData": {"input": "hello"},
+        "referenceTaskName": "echo_ref",
+        "retryCount": 0,
+        "seq": 1,
+        "pollCount": 1,
+        "taskDefName": "TEST_echo",
+        "scheduledTime": 1680000000000,
+        "startTime": 1680000000010,
+        "endTime": 0,
+        "updateTime": 1680000000010,
+        "startDelayInSeconds": 0,
+        "retried": False,
+        "executed": False,
+        "callbackFromWorker": True,
+        "responseTimeoutSeconds": 60,
+        "workflowInstanceId": "0c5b5a2c-7d5e-4f7c-8f0c-2c1d1d1f0a01",
+        "workflowType": "Test_workflow",
+        "taskId": "6f1c1f34-2f4b-4f1e-9d5b-3a2b1c0d9e8f",
+        "callbackAfterSeconds": 0,
+        "workerId": "worker-1",
+        "workflowTask": {"name": "TEST_echo", "taskReferenceName": "echo_ref", "type": "SIMPLE"},
+        "rateLimitPerFrequency": 0,
+        "rateLimitFrequencyInSeconds": 1,
+        "workflowPriority": 0,
+        "iteration": 0,
+        "subworkflowChanged": False,
+        "taskDefinition": {"name": "TEST_echo", "timeoutSeconds": 60},
+        "queueWaitTime": 10,
+        "loopOverTask": False,
+    }
+
+
+def execute_wrapper_before(cls, task):
+    try:
+        cls.WorkerInput.parse_obj(task["inputData"])
+    except Exception as error:
+        return TaskResult(status=TaskResultStatus.FAILED, logs=[str(error)]).dict()
+    try:
+        return cls.execute(cls, Task(**task)).dict()
+    except Exception as error:
+        return TaskResult(status=TaskResultStatus.FAILED, logs=[str(error)]).dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    task = polled_task()
+    echo = TestWorker.Echo
+
+    def before():
+        return execute_wrapper_before(echo, task)
+
+    def after():
+        return echo._execute_wrapper(task)
+
+    assert before() == after(), "implementations return different results"
+
+    print(f"{'':<8} {'total ms':>10} {'per task us':>12}")
+    for name, function in [("before", before), ("after", after)]:
+        total = min(timeit.repeat(function, number=args.tasks, repeat=args.repeat))
+        print(f"{name:<8} {total * 1e3:>10.1f} {total / args.tasks * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -26,7 +26,14 @@ setup(
     keywords=["frinx-machine", "conductor"],
     include_package_data=True,
     license="Apache 2.0",
-    install_requires=["influxdb_client", "requests", "python_graphql_client", "pydantic"],
+    install_requires=[
+        "influxdb_client",
+        "requests",
+        "python_graphql_client",
+        "pydantic",
+        "aiohttp",
+    ],
+    extras_require={"orjson": ["orjson"]},
     long_description=__read__("README.md"),
     long_description_content_type="text/markdown",
     python_requires=">=3.10",
@@ -0,0 +1,378 @@
+import asyncio
+import inspect
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from frinx.client.conductor import TaskClient
+from frinx.client.FrinxConductorWrapper import FrinxConductorWrapper
+from frinx.client.FrinxConductorWrapper import NextWorkerTask
+from frinx.client.FrinxConductorWrapper import TaskUpdater
+from frinx.common import json_codec
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTaskUpdater(TaskUpdater):
+    """
+    TaskUpdater of AsyncFrinxConductorWrapper. Updates are sent over the aiohttp session of the
+    wrapper (request) and awaited by the finished tasks instead of queued for update threads.
+    Failed updates are retried by the policy of TaskUpdater.
+    """
+
+    def __init__(self, request, max_retries=5, retry_delay=0.5, max_retry_delay=10):
+        super().__init__(
+            None,
+            thread_count=0,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            max_retry_delay=max_retry_delay,
+        )
+        self.request = request
+
+    async def update_with_retries_async(self, task):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.request("POST", "tasks", body=task, headers={"Accept": "text/plain"})
+                return True
+            except Exception as error:
+                if not self.is_retryable(error):
+                    logger.error("Unable to update a task %s", task["taskId"], exc_info=True)
+                    return False
+                if attempt == self.max_retries:
+                    logger.error(
+                        "Unable to update a task %s after %s attempts, it may have timed out",
+                        task["taskId"],
+                        attempt + 1,
+                        exc_info=True,
+                    )
+                    return False
+
+                delay = self.get_retry_delay(attempt)
+                logger.warning(
+                    "Unable to update a task %s, retrying in %.2f seconds",
+                    task["taskId"],
+                    delay,
+                    exc_info=True,
+                )
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def is_retryable(error):
+        """Connection errors, timeouts and 5xx responses of Conductor are transient."""
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status >= 500
+        return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+class AsyncFrinxConductorWrapper(FrinxConductorWrapper):
+    """
+    Asyncio based alternative of FrinxConductorWrapper.
+
+    All Conductor traffic (queue reads, polls, updates, external payloads) goes through a single
+    aiohttp session and every polled task runs as an asyncio task, so the number of in-flight
+    tasks is limited by max_concurrent_tasks instead of the number of OS threads. Exec functions
+    defined as coroutines (e.g. WorkerImpl with async def execute) run directly on the event
+    loop, blocking exec functions are offloaded to a pool of max_thread_count threads.
+
+    Task updates are retried like in FrinxConductorWrapper (AsyncTaskUpdater). Limits, cache
+    and thresholds of external payloads (ExternalPayloadStorage, external_output_threshold) and
+    stop() / shutdown() are shared with FrinxConductorWrapper, other keyword arguments are
+    passed to it as well.
+    """
+
+    def __init__(
+        self,
+        server_url,
+        max_concurrent_tasks=1000,
+        max_thread_count=10,
+        polling_interval=0.1,
+        worker_id=None,
+        headers=None,
+        poll_batch_size=10,
+        poll_batch_timeout=100,
+        task_type_scheduling=None,
+        dispatch_order="round_robin",
+        **kwargs,
+    ):
+        super().__init__(
+            server_url,
+            max_thread_count=max_thread_count,
+            polling_interval=polling_interval,
+            worker_id=worker_id,
+            headers=headers,
+            batch_poll=True,
+            poll_batch_size=poll_batch_size,
+            poll_batch_timeout=poll_batch_timeout,
+            task_type_scheduling=task_type_scheduling,
+            dispatch_order=dispatch_order,
+            **kwargs,
+        )
+        self.server_url = server_url.rstrip("/")
+        self.max_concurrent_tasks = max_concurrent_tasks
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_thread_count, thread_name_prefix="frinx-worker"
+        )
+        self.session = None
+        self.task_slots = None
+        self.running_tasks = set()
+        self.async_task_updater = AsyncTaskUpdater(self._request)
+
+    def start_workers(self):
+        self.register_task_definitions()
+        asyncio.run(self.run())
+
+    async def run(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrent_tasks)
+        async with aiohttp.ClientSession(
+            connector=connector, headers=self.taskClient.headers
+        ) as session:
+            self.session = session
+            self.task_slots = asyncio.Semaphore(self.max_concurrent_tasks)
+            queue_reader = asyncio.create_task(self.read_queues())
+            dispatcher = asyncio.create_task(self.dispatch_tasks())
+            try:
+                # Both run until stop(), a failure of either of them ends the other one too
+                done, _ = await asyncio.wait(
+                    [queue_reader, dispatcher], return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    task.result()
+            finally:
+                self.stopping.set()
+                queue_reader.cancel()
+                dispatcher.cancel()
+                await asyncio.gather(queue_reader, dispatcher, return_exceptions=True)
+                await self.shutdown_async()
+
+    async def shutdown_async(self):
+        # Running tasks keep executing on the loop while shutdown waits for them in a thread
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.shutdown)
+        for task in list(self.running_tasks):
+            task.cancel()
+        await asyncio.gather(*self.running_tasks, return_exceptions=True)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def read_queues(self):
+        logger.info("Starting a queue polling")
+        fail_count = 0
+        interval = self.polling_interval
+        while not self.stopping.is_set():
+            await asyncio.sleep(float(interval))
+            try:
+                queues_temp = await self.get_tasks_in_queue()
+                has_tasks = self.task_source.handle_tasks(queues_temp)
+                interval = self.next_polling_interval(interval, has_tasks)
+                fail_count = 0
+            except Exception:
+                logger.error(
+                    f"Unable to read a queue info after {fail_count} attempts", exc_info=True
+                )
+                self.task_source.handle_tasks({})
+                fail_count += 1
+                if fail_count > 10:
+                    raise
+
+    # Dispatch_tasks reserves tasks from the task source for free task slots and polls them
+    # concurrently. Every polled task is executed as a separate asyncio task.
+    async def dispatch_tasks(self):
+        while not self.stopping.is_set():
+            await self.task_slots.acquire()
+            free_slots = 1
+            while free_slots < self.poll_batch_size and not self.task_slots.locked():
+                await self.task_slots.acquire()
+                free_slots += 1
+
+            next_batch: NextWorkerTask = self.task_source.get_next_batch(free_slots)
+            if not next_batch:
+                self._release_slots(free_slots)
+                await asyncio.sleep(float(self.polling_interval))
+                continue
+
+            self._release_slots(free_slots - next_batch.count)
+            self._spawn(self.poll_and_execute(next_batch))
+
+    async def poll_and_execute(self, next_batch: NextWorkerTask):
+        polled_tasks = await self.poll_for_batch(next_batch.task_type, next_batch.count)
+
+        if len(polled_tasks) < next_batch.count:
+            missing = next_batch.count - len(polled_tasks)
+            self.task_source.task_finished(next_batch.task_type, missing)
+            self._release_slots(missing)
+            self.task_source.task_not_found_anymore(next_batch)
+
+        for polled_task in polled_tasks:
+            logger.info(
+                "Polled for a task %s of type %s", polled_task["taskId"], next_batch.task_type
+            )
+            self._spawn(self.execute_polled_task(polled_task, next_batch))
+
+    async def execute_polled_task(self, polled_task, next_task: NextWorkerTask):
+        self.track_task(polled_task)
+        task = polled_task
+        try:
+            # Check if task input is externalized and if so, download the input
+            task = await self.replace_external_payload_input(task)
+            if task is not None:
+                await self.execute_async(task, next_task.exec_function)
+        finally:
+            self.untrack_task(polled_task)
+            self.task_source.task_finished(next_task.task_type)
+            self._release_slots(1)
+
+    async def execute_async(self, task, exec_function):
+        try:
+            logger.info("Executing a task %s", task["taskId"])
+            if inspect.iscoroutinefunction(exec_function):
+                resp = await exec_function(task)
+            else:
+                loop = asyncio.get_running_loop()
+                resp = await loop.run_in_executor(self.executor, exec_function, task)
+            if resp is None:
+                error_msg = "Task execution function MUST return a response as a dict with status and output fields"
+                raise Exception(error_msg)
+            task["status"] = resp["status"]
+            task["outputData"] = resp.get("output", {})
+            task["logs"] = resp.get("logs", [])
+            logger.debug("Executing a task %s, response: %s", task["taskId"], resp)
+            await self.update_task_async(task)
+        except Exception:
+            await self.handle_task_exception(task)
+
+    async def handle_task_exception(self, task):
+        logger.error("Unable to execute a task %s", task["taskId"], exc_info=True)
+        error_info = traceback.format_exc().split("\n")[:-1]
+        task["status"] = "FAILED"
+        task["outputData"] = {
+            "Error while executing task": task.get("taskType", ""),
+            "traceback": error_info,
+        }
+        task["logs"] = ["Logs: %s" % traceback.format_exc()]
+        try:
+            await self.update_task_async(task)
+        except Exception:
+            logger.error(
+                "Unable to update a task %s, it may have timed out", task["taskId"], exc_info=True
+            )
+
+    async def replace_external_payload_input(self, task):
+        # No external payload placeholder present, just return original task
+        if TaskClient.EXTERNAL_INPUT_KEY not in task:
+            return task
+
+        path = task[TaskClient.EXTERNAL_INPUT_KEY]
+        try:
+            # Replace placeholder with real output
+            task["inputData"] = json_codec.loads(await self.download_external_payload(path))
+            task.pop(TaskClient.EXTERNAL_INPUT_KEY)
+            return task
+        except Exception:
+            logger.error(
+                "Unable to download external task input: %s for path: %s",
+                task["taskId"],
+                path,
+                exc_info=True,
+            )
+            await self.handle_task_exception(task)
+            return None
+
+    async def download_external_payload(self, path):
+        storage = self.external_payload_storage
+        content = storage.get_cached(path)
+        if content is not None:
+            return content
+
+        # Get the exact uri from conductor where the payload is stored
+        location = await self._request(
+            "GET",
+            "tasks/externalstoragelocation",
+            params={"path": path, "operation": "READ", "payloadType": "TASK_INPUT"},
+        )
+        if not location or "uri" not in location:
+            raise Exception("Unexpected output for external payload location: %s" % location)
+
+        async with self.session.get(location["uri"]) as response:
+            response.raise_for_status()
+            storage.check_payload_size(response.content_length or 0)
+            content = bytearray()
+            async for chunk in response.content.iter_chunked(storage.CHUNK_SIZE):
+                content += chunk
+                storage.check_payload_size(len(content))
+
+        content = bytes(content)
+        storage.add_to_cache(path, content)
+        return content
+
+    async def externalize_output(self, task):
+        """ExternalPayloadStorage.externalize_output over the aiohttp session."""
+        storage = self.external_payload_storage
+        content = storage.get_output_content(task)
+        if content is None:
+            return False
+
+        location = await self._request(
+            "GET",
+            "tasks/externalstoragelocation",
+            params={"path": "", "operation": "WRITE", "payloadType": "TASK_OUTPUT"},
+        )
+        if not location or "uri" not in location or "path" not in location:
+            raise Exception("Unexpected output for external payload location: %s" % location)
+
+        async with self.session.put(
+            location["uri"], data=content, headers={"Content-Type": "application/json"}
+        ) as response:
+            response.raise_for_status()
+        storage.set_output_path(task, content, location["path"])
+        return True
+
+    async def get_tasks_in_queue(self):
+        return await self._request(
+            "POST", "tasks/queue/sizes", body=self.task_source.registered_task_types
+        )
+
+    async def poll_for_batch(self, task_type, count):
+        params = {"workerid": self.worker_id, "count": count, "timeout": self.poll_batch_timeout}
+        try:
+            return await self._request("GET", f"tasks/poll/batch/{task_type}", params=params) or []
+        except Exception:
+            logger.error("Error while polling a task of type %s", task_type, exc_info=True)
+            return []
+
+    async def update_task_async(self, task):
+        try:
+            await self.externalize_output(task)
+        except Exception:
+            logger.error(
+                "Unable to upload output of a task %s, sending it inline",
+                task["taskId"],
+                exc_info=True,
+            )
+        await self.async_task_updater.update_with_retries_async(task)
+
+    async def _request(self, method, res_path, params=None, body=None, headers=None):
+        data = None
+        if body is not None:
+            data = json_codec.dumps(body)
+
+        async with self.session.request(
+            method, f"{self.server_url}/{res_path}", params=params, data=data, headers=headers
+        ) as response:
+            content = await response.read()
+            if response.status >= 400:
+                logger.error("Conductor request %s %s failed: %s", method, res_path, content)
+            response.raise_for_status()
+            if content == b"" or response.content_type != "application/json":
+                return None
+            return json_codec.loads(content)
+
+    def _release_slots(self, count):
+        for _ in range(count):
+            self.task_slots.release()
+
+    def _spawn(self, coroutine):
+        # Keep a reference, the event loop holds only weak references to tasks
+        task = asyncio.create_task(coroutine)
+        self.running_tasks.add(task)
+        task.add_done_callback(self.running_tasks.discard)
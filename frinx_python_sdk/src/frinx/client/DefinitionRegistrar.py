@@ -0,0 +1,150 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+
+def definition_hash(definition):
+    """Content hash of a task or workflow definition, independent of key order."""
+    content = json.dumps(definition, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(content.encode("utf8")).hexdigest()
+
+
+def is_subset(local, remote):
+    """
+    True if every value of the local definition equals the one Conductor returned. Conductor
+    adds defaults and audit fields (createTime, ownerApp, ...) to stored definitions.
+    """
+    if isinstance(local, dict):
+        return isinstance(remote, dict) and all(
+            key in remote and is_subset(value, remote[key]) for key, value in local.items()
+        )
+    if isinstance(local, list):
+        return (
+            isinstance(remote, list)
+            and len(local) == len(remote)
+            and all(is_subset(value, other) for value, other in zip(local, remote))
+        )
+    return local == remote
+
+
+class DefinitionRegistrar:
+    """
+    Registers task and workflow definitions to Conductor, sending only the changed ones.
+
+    Definitions stored in Conductor are fetched once (getAllTaskDefs, getAllWorkflowDefs) and
+    new or changed definitions are sent in a single bulk request (registerTaskDefs,
+    updateWorkflowDefs). With cache_file set, content hashes of registered definitions are kept
+    in the file per Conductor server; when none of the definitions changed since the last
+    registration, Conductor is not contacted at all. The cache file should not outlive the
+    Conductor metadata, e.g. it belongs to the container file system and not to a volume.
+    """
+
+    TASK_DEFS = "taskdefs"
+    WORKFLOW_DEFS = "workflows"
+
+    def __init__(self, metadata_client, cache_file=None, server_url=""):
+        self.metadata_client = metadata_client
+        self.cache_file = cache_file
+        self.server_url = server_url
+
+    def register_task_defs(self, task_defs):
+        """Register new and changed task definitions, returns the names of registered ones."""
+        return self._register(
+            self.TASK_DEFS,
+            {task_def["name"]: task_def for task_def in task_defs},
+            self.metadata_client.getAllTaskDefs,
+            self.metadata_client.registerTaskDefs,
+        )
+
+    def register_workflow_defs(self, workflow_defs, get_all=None, register=None):
+        """
+        Register new and changed workflow definitions, returns name:version keys of them.
+        Stored workflows are read by get_all and changed ones are sent by register, by default
+        getAllWorkflowDefs and updateWorkflowDefs of the metadata client.
+        """
+        return self._register(
+            self.WORKFLOW_DEFS,
+            {self.workflow_key(workflow): workflow for workflow in workflow_defs},
+            get_all or self.metadata_client.getAllWorkflowDefs,
+            register or self.metadata_client.updateWorkflowDefs,
+        )
+
+    @staticmethod
+    def workflow_key(workflow):
+        return f"{workflow['name']}:{workflow.get('version', 1)}"
+
+    def _register(self, kind, definitions, get_all, register):
+        hashes = {key: definition_hash(definition) for key, definition in definitions.items()}
+        cache = self.load_cache()
+        cached = cache.get(kind, {})
+        if all(cached.get(key) == value for key, value in hashes.items()):
+            logger.info(
+                "%s %s definitions unchanged since the last registration", len(hashes), kind
+            )
+            return []
+
+        changed = self.changed_keys(kind, definitions, get_all)
+        if changed:
+            logger.info("Registering %s of %s %s definitions", len(changed), len(hashes), kind)
+            register([definitions[key] for key in changed])
+        else:
+            logger.info("%s %s definitions registered already", len(hashes), kind)
+
+        cached.update(hashes)
+        cache[kind] = cached
+        self.store_cache(cache)
+        return changed
+
+    def changed_keys(self, kind, definitions, get_all):
+        try:
+            remote = get_all() or []
+        except Exception:
+            logger.warning("Unable to read %s from Conductor, registering all", kind, exc_info=True)
+            return list(definitions)
+
+        if kind == self.WORKFLOW_DEFS:
+            remote = {self.workflow_key(workflow): workflow for workflow in remote}
+        else:
+            remote = {task_def["name"]: task_def for task_def in remote}
+
+        return [
+            key
+            for key, definition in definitions.items()
+            if key not in remote or not is_subset(definition, remote[key])
+        ]
+
+    def load_cache(self):
+        if self.cache_file is None:
+            return {}
+        try:
+            with open(self.cache_file, "rb") as cache_file:
+                cache = json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning("Unable to read definition cache %s", self.cache_file, exc_info=True)
+            return {}
+        return cache.get(self.server_url, {})
+
+    def store_cache(self, server_cache):
+        if self.cache_file is None:
+            return
+        try:
+            with open(self.cache_file, "rb") as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            cache = {}
+        cache[self.server_url] = server_cache
+
+        # Written to a temporary file first, worker processes may read the cache concurrently
+        directory = os.path.dirname(os.path.abspath(self.cache_file))
+        try:
+            with tempfile.NamedTemporaryFile("w", dir=directory, delete=False) as temp_file:
+                json.dump(cache, temp_file)
+            os.replace(temp_file.name, self.cache_file)
+        except OSError:
+            logger.warning("Unable to write definition cache %s", self.cache_file, exc_info=True)
@@ -0,0 +1,172 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from frinx.common import json_codec
+
+logger = logging.getLogger(__name__)
+
+
+class ExternalPayloadStorage:
+    """
+    Downloads task inputs externalized by Conductor (externalInputPayloadStoragePath) and
+    uploads large task outputs to external storage (externalOutputPayloadStoragePath).
+
+    Payloads are streamed in chunks over the pooled session of the task client and rejected
+    once they grow over max_payload_size bytes. Downloaded payloads are kept as raw bytes in an
+    LRU cache of up to cache_size bytes keyed by storage path, so retried tasks with identical
+    inputs do not download them again. With prefetch_threads set, inputs of batch-polled tasks
+    can be downloaded concurrently (prefetch) before consumer threads pick the tasks up.
+
+    Task outputs serializing to more than output_threshold bytes are uploaded to the location
+    Conductor returns for a TASK_OUTPUT write, the task is then updated with the storage path
+    only, so large outputs do not slow down task updates. Task types producing large outputs
+    may have a threshold of their own (output_thresholds), the lower one applies.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        task_client,
+        max_payload_size=64 * 1024 * 1024,
+        cache_size=0,
+        prefetch_threads=0,
+        output_threshold=None,
+    ):
+        self.task_client = task_client
+        self.max_payload_size = max_payload_size
+        self.cache_size = cache_size
+        self.output_threshold = output_threshold
+        # Output thresholds by task type
+        self.output_thresholds = {}
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.cached_bytes = 0
+        # Downloads started by prefetch by storage path
+        self.prefetched = {}
+        self.executor = None
+        if prefetch_threads > 0:
+            self.executor = ThreadPoolExecutor(
+                max_workers=prefetch_threads, thread_name_prefix="frinx-payload"
+            )
+
+    def prefetch(self, path):
+        """Start a background download of the input stored at path."""
+        if self.executor is None:
+            return
+        with self.lock:
+            if path in self.prefetched or path in self.cache:
+                return
+            self.prefetched[path] = self.executor.submit(self.download, path)
+
+    def get_input(self, path):
+        """Return input data stored at path."""
+        with self.lock:
+            future = self.prefetched.pop(path, None)
+        content = future.result() if future is not None else self.download(path)
+        return json_codec.loads(content)
+
+    def download(self, path):
+        content = self.get_cached(path)
+        if content is not None:
+            return content
+
+        # Get the exact uri from conductor where the payload is stored
+        location = self.task_client.getTaskInputExternalPayloadLocation(path)
+        if "uri" not in location:
+            raise Exception("Unexpected output for external payload location: %s" % location)
+
+        content = self.fetch(location["uri"])
+        self.add_to_cache(path, content)
+        return content
+
+    def fetch(self, uri):
+        with self.task_client.session.get(
+            uri, headers=self.task_client.headers, timeout=self.task_client.timeout, stream=True
+        ) as response:
+            response.raise_for_status()
+            self.check_payload_size(int(response.headers.get("Content-Length", 0)))
+
+            content = bytearray()
+            for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                content += chunk
+                self.check_payload_size(len(content))
+            return bytes(content)
+
+    def check_payload_size(self, size):
+        if size > self.max_payload_size:
+            raise Exception(
+                "External payload of %s bytes exceeds the limit of %s bytes"
+                % (size, self.max_payload_size)
+            )
+
+    def get_cached(self, path):
+        """Downloaded payload stored at path, None if it is not cached."""
+        with self.lock:
+            content = self.cache.get(path)
+            if content is not None:
+                self.cache.move_to_end(path)
+            return content
+
+    def add_to_cache(self, path, content):
+        if len(content) > self.cache_size:
+            return
+        with self.lock:
+            if path in self.cache:
+                return
+            self.cache[path] = content
+            self.cached_bytes += len(content)
+            while self.cached_bytes > self.cache_size:
+                _, evicted = self.cache.popitem(last=False)
+                self.cached_bytes -= len(evicted)
+
+    def externalize_output(self, task):
+        """Upload outputData of task over output_threshold bytes, True if it was uploaded."""
+        content = self.get_output_content(task)
+        if content is None:
+            return False
+
+        location = self.task_client.getTaskOutputExternalPayloadLocation()
+        if "uri" not in location or "path" not in location:
+            raise Exception("Unexpected output for external payload location: %s" % location)
+
+        response = self.task_client.session.put(
+            location["uri"],
+            data=content,
+            headers={"Content-Type": "application/json"},
+            timeout=self.task_client.timeout,
+        )
+        response.raise_for_status()
+        self.set_output_path(task, content, location["path"])
+        return True
+
+    def get_output_content(self, task):
+        """Serialized outputData of task if it is to be externalized, None otherwise."""
+        threshold = self.get_output_threshold(task.get("taskType"))
+        if threshold is None or not task.get("outputData"):
+            return None
+
+        content = json_codec.dumps(task["outputData"])
+        return content if len(content) > threshold else None
+
+    def set_output_path(self, task, content, path):
+        """Replace outputData of task by the path its content was uploaded to."""
+        logger.debug(
+            "Output of a task %s (%s bytes) uploaded to %s", task["taskId"], len(content), path
+        )
+        task["outputData"] = {}
+        task[self.task_client.EXTERNAL_OUTPUT_KEY] = path
+
+    def get_output_threshold(self, task_type):
+        thresholds = [
+            threshold
+            for threshold in (self.output_threshold, self.output_thresholds.get(task_type))
+            if threshold is not None
+        ]
+        return min(thresholds) if thresholds else None
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
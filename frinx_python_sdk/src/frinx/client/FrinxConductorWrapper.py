@@ -1,17 +1,27 @@
 import copy
-import json
+import functools
+import inspect
 import logging
+import multiprocessing
+import queue
+import random
 import socket
 import threading
 import time
 import traceback
 import uuid
 from collections import defaultdict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from threading import Thread
 
 import requests
 from frinx.client.conductor import WFClientMgr
+from frinx.client.DefinitionRegistrar import DefinitionRegistrar
+from frinx.client.ExternalPayloadStorage import ExternalPayloadStorage
+from frinx.common import json_codec
+from frinx.common.event_loop import event_loop_thread
 
 logger = logging.getLogger(__name__)
 
@@ -29,75 +39,198 @@ DEFAULT_TASK_DEFINITION = {
 hostname = socket.gethostname()
 
 
+@dataclass
+class TaskTypeScheduling:
+    """
+    Scheduling of a task type among consumer threads.
+
+    max_concurrency: maximum number of tasks of the type executed (or reserved) at once,
+        None means unlimited.
+    weight: relative share of the type in round-robin when more types have queued tasks.
+    priority: types of a higher priority class are always picked before lower ones.
+    """
+
+    max_concurrency: int | None = None
+    weight: int = 1
+    priority: int = 0
+
+
 @dataclass
 class RegisteredWorkerTask:
     task_type: str
     exec_function: callable
+    scheduling: TaskTypeScheduling = None
 
 
 class TaskSource:
-    def __init__(self):
+    """
+    Tracks queued tasks of registered task types and picks the type to be polled next.
+
+    Task types with queued tasks and a free concurrency slot are kept in a ready ring per
+    priority class, so the next type is picked in constant time regardless of the number of
+    registered types. dispatch_order selects the type within the top priority class:
+    round_robin: weighted round-robin over the ready ring, a type is picked weight times
+        in a row before the ring rotates (default)
+    deepest: the type with the most queued tasks
+    oldest: the type whose queue has not been empty for the longest time
+    """
+
+    DISPATCH_ORDERS = ("round_robin", "deepest", "oldest")
+
+    def __init__(self, dispatch_order="round_robin"):
+        if dispatch_order not in self.DISPATCH_ORDERS:
+            raise ValueError(f"Unknown dispatch order {dispatch_order}")
+        self.dispatch_order = dispatch_order
         self.lock = threading.Lock()
+        # Notifies consumers waiting for tasks when a queue read found some
+        self.tasks_available = threading.Condition(self.lock)
         self.task_types = {}
-        self.task_types_list = None
+        # Names of registered task types, cached for queue size reads
+        self.registered_task_types = []
 
         self.actual_uuid = None
         self.filtered_queue = {}
         self.actual_task_types_running = defaultdict(int)
-        self.last_task_position = 0
+        # Time since the queue of a task type is reported as non-empty
+        self.queued_since = {}
 
-    def register_task_type(self, task_type, exec_function):
-        self.task_types[task_type] = RegisteredWorkerTask(task_type, exec_function)
-        self.task_types_list = list(self.task_types)
+        # Ready rings of task types by priority, priorities sorted from the highest
+        self.ready = {}
+        self.ready_task_types = set()
+        self.priorities = []
+        # Remaining picks of the type at the front of its ring before the ring rotates
+        self.credits = {}
+
+    def register_task_type(self, task_type, exec_function, scheduling=None):
+        scheduling = scheduling or TaskTypeScheduling()
+        with self.lock:
+            self.task_types[task_type] = RegisteredWorkerTask(task_type, exec_function, scheduling)
+            self.registered_task_types = list(self.task_types)
+            self.ready.setdefault(scheduling.priority, deque())
+            self.priorities = sorted(self.ready, reverse=True)
+            self.credits[task_type] = max(1, scheduling.weight)
+            self._update_ready(task_type)
 
     def handle_tasks(self, queue):
+        # Filter outside of the lock, consumers only wait for the swap
+        filtered_queue = {
+            key: value for key, value in queue.items() if key in self.task_types and value > 0
+        }
         with self.lock:
             self.actual_uuid = uuid.uuid4()
-            self.filtered_queue = {
-                key: value
-                for key, value in queue.items()
-                if key in self.task_types.keys() and value > 0
+            self.filtered_queue = filtered_queue
+            now = time.monotonic()
+            self.queued_since = {
+                task_type: self.queued_since.get(task_type, now) for task_type in filtered_queue
             }
+            # Types keep their position in the rings, so reads do not reset the round-robin
+            for ready in self.ready.values():
+                for task_type in [t for t in ready if t not in filtered_queue]:
+                    self._remove_ready(task_type)
+            for task_type in filtered_queue:
+                self._update_ready(task_type)
 
-    def round_robin_task_types(self):
-        task_type = self.task_types_list[self.last_task_position]
-        self.last_task_position += 1
-
-        if self.last_task_position == len(self.task_types):
-            self.last_task_position = 0
+            if self.ready_task_types:
+                self.tasks_available.notify_all()
+            return len(filtered_queue) > 0
 
-        return task_type
+    def wait_for_tasks(self, timeout):
+        """Block until there are queued tasks to be picked up or timeout expires."""
+        with self.lock:
+            if not self.ready_task_types:
+                self.tasks_available.wait(timeout)
 
     def get_next_task(self, last_task_type):
         with self.lock:
             if last_task_type:
-                self.actual_task_types_running[last_task_type] -= 1
+                self._release(last_task_type, 1)
+
+            return self._reserve_next(1)
+
+    def get_next_batch(self, max_count):
+        """Reserve up to max_count queued tasks of the next task type."""
+        with self.lock:
+            return self._reserve_next(max_count)
+
+    def task_finished(self, task_type, count=1):
+        with self.lock:
+            self._release(task_type, count)
+
+    def free_slots(self, task_type):
+        max_concurrency = self.task_types[task_type].scheduling.max_concurrency
+        if max_concurrency is None:
+            return None
+        return max_concurrency - self.actual_task_types_running[task_type]
+
+    def _release(self, task_type, count):
+        self.actual_task_types_running[task_type] -= count
+        if self.task_types[task_type].scheduling.max_concurrency is not None:
+            self._update_ready(task_type)
+            # Wake consumers waiting for a free slot of a limited type
+            self.tasks_available.notify(count)
 
-            if len(self.filtered_queue) == 0:
-                return None
+    def _is_ready(self, task_type):
+        free_slots = self.free_slots(task_type)
+        return self.filtered_queue.get(task_type, 0) > 0 and (free_slots is None or free_slots > 0)
 
-            task_type = None
-            while task_type not in self.filtered_queue:
-                task_type = self.round_robin_task_types()
+    def _update_ready(self, task_type):
+        if task_type in self.ready_task_types:
+            if not self._is_ready(task_type):
+                self._remove_ready(task_type)
+        elif self._is_ready(task_type):
+            self.ready[self.task_types[task_type].scheduling.priority].append(task_type)
+            self.ready_task_types.add(task_type)
 
-            self.actual_task_types_running[task_type] += 1
+    def _remove_ready(self, task_type):
+        ready = self.ready[self.task_types[task_type].scheduling.priority]
+        if ready[0] == task_type:
+            ready.popleft()
+        else:
+            ready.remove(task_type)
+        self.ready_task_types.discard(task_type)
+        self.credits[task_type] = max(1, self.task_types[task_type].scheduling.weight)
+
+    def _reserve_next(self, max_count):
+        if not self.ready_task_types:
+            return None
 
-            registered_task: RegisteredWorkerTask = self.task_types[task_type]
+        ready = next(self.ready[priority] for priority in self.priorities if self.ready[priority])
+        match self.dispatch_order:
+            case "deepest":
+                task_type = max(ready, key=self.filtered_queue.get)
+            case "oldest":
+                task_type = min(ready, key=self.queued_since.get)
+            case _:
+                if self.credits[ready[0]] <= 0:
+                    self.credits[ready[0]] = max(1, self.task_types[ready[0]].scheduling.weight)
+                    ready.rotate(-1)
+                task_type = ready[0]
+                self.credits[task_type] -= 1
 
-            self.filtered_queue[task_type] -= 1
-            if self.filtered_queue[task_type] <= 0:
-                self.filtered_queue.pop(task_type, None)
+        count = min(max_count, self.filtered_queue[task_type])
+        if self.free_slots(task_type) is not None:
+            count = min(count, self.free_slots(task_type))
+        self.actual_task_types_running[task_type] += count
 
-            next_worker = NextWorkerTask()
-            next_worker.task_type = task_type
-            next_worker.exec_function = registered_task.exec_function
-            next_worker.poll_uuid = self.actual_uuid
-            return next_worker
+        registered_task: RegisteredWorkerTask = self.task_types[task_type]
+
+        self.filtered_queue[task_type] -= count
+        if self.filtered_queue[task_type] <= 0:
+            self.filtered_queue.pop(task_type, None)
+        self._update_ready(task_type)
+
+        next_worker = NextWorkerTask()
+        next_worker.task_type = task_type
+        next_worker.exec_function = registered_task.exec_function
+        next_worker.poll_uuid = self.actual_uuid
+        next_worker.count = count
+        return next_worker
 
     def task_not_found_anymore(self, task_not_found):
         if self.actual_uuid == task_not_found.poll_uuid:
             with self.lock:
                 self.filtered_queue.pop(task_not_found.task_type, None)
+                self._update_ready(task_not_found.task_type)
 
 
 class NextWorkerTask:
@@ -105,11 +238,343 @@ class NextWorkerTask:
         self.task_type = None
         self.exec_function = None
         self.poll_uuid = None
+        self.count = 1
+
+
+class TaskUpdater:
+    """
+    Sends finished tasks to Conductor in background threads.
+
+    Consumer threads only enqueue the task and return to polling. The queue is bounded by
+    max_pending_updates, a full queue blocks the consumers (backpressure) until Conductor
+    catches up. An update failed on a connection error, timeout or 5xx response is retried
+    max_retries times with an exponential, jittered delay before the task is given up. Other
+    errors (e.g. 4xx for a task which already timed out) are not retried.
+    """
+
+    def __init__(
+        self,
+        task_client,
+        thread_count=4,
+        max_pending_updates=1000,
+        max_retries=5,
+        retry_delay=0.5,
+        max_retry_delay=10,
+    ):
+        self.task_client = task_client
+        self.thread_count = thread_count
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.pending_updates = queue.Queue(maxsize=max_pending_updates)
+
+    def start(self):
+        for i in range(self.thread_count):
+            thread = Thread(target=self.send_updates)
+            thread.daemon = True
+            thread.start()
+
+    def submit(self, task):
+        self.pending_updates.put(task)
+
+    def flush(self, timeout):
+        """Wait up to timeout seconds until all submitted updates are sent, True if they are."""
+        deadline = time.monotonic() + timeout
+        with self.pending_updates.all_tasks_done:
+            while self.pending_updates.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.pending_updates.all_tasks_done.wait(remaining)
+        return True
+
+    def send_updates(self):
+        while True:
+            task = self.pending_updates.get()
+            try:
+                self.update_with_retries(task)
+            finally:
+                self.pending_updates.task_done()
+
+    def update_with_retries(self, task):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.task_client.updateTask(task)
+                return True
+            except Exception as error:
+                if not self.is_retryable(error):
+                    logger.error("Unable to update a task %s", task["taskId"], exc_info=True)
+                    return False
+                if attempt == self.max_retries:
+                    logger.error(
+                        "Unable to update a task %s after %s attempts, it may have timed out",
+                        task["taskId"],
+                        attempt + 1,
+                        exc_info=True,
+                    )
+                    return False
+
+                delay = self.get_retry_delay(attempt)
+                logger.warning(
+                    "Unable to update a task %s, retrying in %.2f seconds",
+                    task["taskId"],
+                    delay,
+                    exc_info=True,
+                )
+                time.sleep(delay)
+
+    @staticmethod
+    def is_retryable(error):
+        """Connection errors, timeouts and 5xx responses of Conductor are transient."""
+        if isinstance(error, requests.HTTPError):
+            return error.response is not None and error.response.status_code >= 500
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+    def get_retry_delay(self, attempt):
+        # Full jitter keeps retries of many consumers from hitting Conductor at the same time
+        return random.uniform(0, min(self.max_retry_delay, self.retry_delay * 2**attempt))
+
+
+def return_task(task_client, task, worker_id, callback_after_seconds, reason):
+    """
+    Return a polled task to Conductor without executing it.
+
+    Conductor puts an IN_PROGRESS task back to its queue, the task can be polled again after
+    callback_after_seconds. Returns True if the update was sent.
+    """
+    logger.info(
+        "Returning a task %s to Conductor in %s seconds: %s",
+        task["taskId"],
+        callback_after_seconds,
+        reason,
+    )
+    try:
+        task_client.updateTask(
+            {
+                "taskId": task["taskId"],
+                "workflowInstanceId": task.get("workflowInstanceId"),
+                "workerId": worker_id,
+                "status": "IN_PROGRESS",
+                "callbackAfterSeconds": callback_after_seconds,
+                "outputData": {},
+                "logs": [reason],
+            }
+        )
+        return True
+    except Exception:
+        logger.error("Unable to return a task %s", task["taskId"], exc_info=True)
+        return False
+
+
+class PrefetchBuffer:
+    """
+    Tasks polled ahead of their execution, up to prefetch_count per task type.
+
+    A polled task is leased to the worker for its responseTimeoutSeconds. Buffered tasks whose
+    lease expires in less than lease_margin seconds are never executed, expiry_policy decides
+    what happens to them:
+    ack: the task is acked as IN_PROGRESS, Conductor puts it back to the queue right away
+    drop: the task is dropped, Conductor requeues it once its response timeout expires
+    """
+
+    EXPIRY_POLICIES = ("ack", "drop")
+
+    def __init__(self, task_client, worker_id, prefetch_count, lease_margin=5, expiry_policy="ack"):
+        if expiry_policy not in self.EXPIRY_POLICIES:
+            raise ValueError(f"Unknown prefetch expiry policy {expiry_policy}")
+        self.task_client = task_client
+        self.worker_id = worker_id
+        self.prefetch_count = prefetch_count
+        self.lease_margin = lease_margin
+        self.expiry_policy = expiry_policy
+        self.lock = threading.Lock()
+        # Buffered (task, lease expiration) pairs by task type, oldest first
+        self.buffers = defaultdict(deque)
+        self.counters = defaultdict(int)
+
+    def put(self, task_type, tasks):
+        now = time.monotonic()
+        with self.lock:
+            for task in tasks:
+                timeout = (
+                    task.get("responseTimeoutSeconds")
+                    or DEFAULT_TASK_DEFINITION["responseTimeoutSeconds"]
+                )
+                self.buffers[task_type].append((task, now + timeout))
+            self.counters["prefetched"] += len(tasks)
+
+    def take(self, task_type):
+        """Pop the oldest buffered task of task_type with a valid lease, None if there is none."""
+        expired = []
+        task = None
+        with self.lock:
+            buffer = self.buffers[task_type]
+            while buffer and task is None:
+                buffered_task, lease_expiration = buffer.popleft()
+                if lease_expiration - time.monotonic() > self.lease_margin:
+                    task = buffered_task
+                else:
+                    expired.append(buffered_task)
+            self.counters["hits" if task is not None else "misses"] += 1
+
+        self.handle_expired(expired)
+        return task
+
+    def missing(self, task_type):
+        """Number of tasks to be prefetched to fill the buffer of task_type."""
+        with self.lock:
+            return max(0, self.prefetch_count - len(self.buffers[task_type]))
+
+    def expire_tasks(self):
+        """Remove buffered tasks whose lease is about to expire."""
+        expired = []
+        with self.lock:
+            deadline = time.monotonic() + self.lease_margin
+            for buffer in self.buffers.values():
+                # Tasks are buffered in order of polling, expiring ones are at the front
+                while buffer and buffer[0][1] <= deadline:
+                    expired.append(buffer.popleft()[0])
+
+        self.handle_expired(expired)
+
+    def handle_expired(self, tasks):
+        for task in tasks:
+            if self.expiry_policy == "ack":
+                return_task(
+                    self.task_client, task, self.worker_id, 0, "Lease of a prefetched task expired"
+                )
+            else:
+                logger.warning("Dropping a prefetched task %s, its lease expired", task["taskId"])
+            with self.lock:
+                self.counters["acked" if self.expiry_policy == "ack" else "dropped"] += 1
+
+    def drain(self):
+        """Remove and return all buffered tasks."""
+        with self.lock:
+            tasks = [task for buffer in self.buffers.values() for task, _ in buffer]
+            self.buffers.clear()
+        return tasks
+
+    def add_depths(self, queues):
+        """Add buffered tasks to queue sizes read from Conductor, they are queued for consumers."""
+        with self.lock:
+            queues = dict(queues)
+            for task_type, buffer in self.buffers.items():
+                if buffer:
+                    queues[task_type] = queues.get(task_type, 0) + len(buffer)
+        return queues
+
+    def metrics(self):
+        """Buffer depth per task type and counters of prefetched, hit, missed and expired tasks."""
+        with self.lock:
+            return {
+                "depth": {task_type: len(buffer) for task_type, buffer in self.buffers.items()},
+                **self.counters,
+            }
+
+
+def execute_serialized(exec_function, serialized_task):
+    """Run exec_function in a worker process, task and response are passed as JSON bytes."""
+    response = exec_function(json_codec.loads(serialized_task))
+    return json_codec.dumps(response)
+
+
+class ProcessPoolTaskExecutor:
+    """
+    Executes exec functions of CPU bound task types in a pool of worker processes.
+
+    Only the JSON encoded task and response cross the process boundary, exec functions are
+    passed by reference and must be importable (module level functions, methods of module
+    level classes). Worker processes are spawned on the first execution.
+    """
+
+    def __init__(self, max_process_count=None):
+        self.max_process_count = max_process_count
+        self.lock = threading.Lock()
+        self.pool = None
+
+    def execute(self, exec_function, task):
+        serialized_task = json_codec.dumps(task)
+        future = self.get_pool().submit(execute_serialized, exec_function, serialized_task)
+        return json_codec.loads(future.result())
+
+    def get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                # Forking a process with running consumer threads is not safe
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.max_process_count,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self.pool
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self.lock:
+            if self.pool is not None:
+                self.pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+                self.pool = None
 
 
 class FrinxConductorWrapper:
+    """
+    Polls Conductor for registered task types and executes them in a pool of consumer threads.
+
+    By default every consumer thread polls a single task (pollForTask) right before executing it.
+    With batch_poll enabled, a dispatcher thread polls up to poll_batch_size tasks of one type
+    at once (pollForBatch, long-polling for poll_batch_timeout milliseconds) and hands them
+    over to the consumer threads, which saves one Conductor round trip per executed task.
+    Batch sizes are bounded by the queue sizes reported by Conductor and by the number of idle
+    consumer threads.
+
+    With prefetch_count set, a consumer thread polls the task it executes together with up to
+    prefetch_count more tasks of the same type, which are kept in a PrefetchBuffer for the next
+    consumers. Task types limited by max_concurrency are never prefetched.
+
+    Externalized task inputs are downloaded by ExternalPayloadStorage, in batch poll mode
+    concurrently by external_payload_prefetch_threads while the tasks wait for a consumer.
+    Outputs over external_output_threshold bytes are uploaded to external storage.
+
+    Task definitions of registered task types are sent to Conductor by start_workers (or
+    register_task_definitions), in one request and only when they changed.
+
+    stop() or shutdown() end start_workers gracefully: polling stops, running tasks get up to
+    shutdown_timeout seconds to finish and pending task updates are flushed. Polled tasks which
+    were not started yet (batch poll, prefetch) are returned to Conductor right away, updated to
+    IN_PROGRESS with callbackAfterSeconds 0. Tasks which did not finish in time are, with
+    shutdown_callback_after_seconds set, updated the same way with that delay, so Conductor hands
+    them to another worker without waiting for their responseTimeoutSeconds.
+    """
+
     def __init__(
-        self, server_url, max_thread_count, polling_interval=0.1, worker_id=None, headers=None
+        self,
+        server_url,
+        max_thread_count,
+        polling_interval=0.1,
+        worker_id=None,
+        headers=None,
+        max_polling_interval=2.0,
+        batch_poll=False,
+        poll_batch_size=10,
+        poll_batch_timeout=100,
+        update_thread_count=4,
+        max_pending_updates=1000,
+        request_timeout=60,
+        request_retries=3,
+        task_type_scheduling=None,
+        dispatch_order="round_robin",
+        max_process_count=None,
+        register_definitions=True,
+        task_types=None,
+        shutdown_timeout=30,
+        shutdown_callback_after_seconds=None,
+        prefetch_count=0,
+        prefetch_lease_margin=5,
+        prefetch_expiry_policy="ack",
+        external_payload_max_size=64 * 1024 * 1024,
+        external_payload_cache_size=16 * 1024 * 1024,
+        external_payload_prefetch_threads=0,
+        external_output_threshold=None,
+        definition_cache_file=None,
     ):
         # Synchronizes access to self.queues by producer thread (in read_queue) and consumer threads (in tasks_in_queue)
         self.lock = threading.Lock()
@@ -117,52 +582,261 @@ class FrinxConductorWrapper:
         self.conductor_task_url = server_url + "/metadata/taskdefs"
         self.headers = headers
         self.consumer_worker_count = max_thread_count
-        self.task_source = TaskSource()
+        self.task_source = TaskSource(dispatch_order)
+        self.task_type_scheduling = task_type_scheduling or {}
+        self.process_executor = ProcessPoolTaskExecutor(max_process_count)
+        # Worker processes of a WorkerSupervisor leave registration of definitions to the supervisor
+        self.register_definitions = register_definitions
+        # Task definitions registered by register, sent to Conductor by register_task_definitions
+        self.pending_task_definitions = {}
+        self.definition_cache_file = definition_cache_file
+        self.server_url = server_url
+        # Task types to be executed by this instance, None executes all registered types
+        self.task_types = set(task_types) if task_types is not None else None
 
         self.polling_interval = polling_interval
+        self.max_polling_interval = max(polling_interval, max_polling_interval)
 
-        wfcMgr = WFClientMgr(server_url, headers=headers)
+        self.batch_poll = batch_poll
+        self.poll_batch_size = poll_batch_size
+        self.poll_batch_timeout = poll_batch_timeout
+        # Polled tasks waiting for a consumer thread (batch poll mode only)
+        self.polled_tasks = queue.Queue()
+        # Number of consumer threads not executing nor having a task assigned (batch poll mode only)
+        self.idle_consumers = threading.Semaphore(max_thread_count)
+
+        # Every consumer, updater and the polling thread may hold a connection at the same time
+        wfcMgr = WFClientMgr(
+            server_url,
+            headers=headers,
+            pool_size=max_thread_count + update_thread_count + 2,
+            timeout=request_timeout,
+            retries=request_retries,
+        )
         self.taskClient = wfcMgr.taskClient
+        self.metadataClient = wfcMgr.metadataClient
         self.worker_id = worker_id or hostname
 
+        self.external_payload_storage = ExternalPayloadStorage(
+            self.taskClient,
+            max_payload_size=external_payload_max_size,
+            cache_size=external_payload_cache_size,
+            prefetch_threads=external_payload_prefetch_threads if batch_poll else 0,
+            output_threshold=external_output_threshold,
+        )
+
+        # Tasks polled ahead by consumer threads (per thread poll mode only)
+        self.prefetch_buffer = None
+        if prefetch_count > 0 and not batch_poll:
+            self.prefetch_buffer = PrefetchBuffer(
+                self.taskClient,
+                self.worker_id,
+                prefetch_count,
+                lease_margin=prefetch_lease_margin,
+                expiry_policy=prefetch_expiry_policy,
+            )
+
+        self.update_thread_count = update_thread_count
+        self.max_pending_updates = max_pending_updates
+        # Started with the workers, tasks are updated synchronously until then
+        self.task_updater = None
+
+        self.shutdown_timeout = shutdown_timeout
+        self.shutdown_callback_after_seconds = shutdown_callback_after_seconds
+        self.stopping = threading.Event()
+        self.shutdown_lock = threading.Lock()
+        self.shut_down = False
+        self.dispatcher_thread = None
+        # Polled tasks not finished yet by taskId, notified when a task finishes
+        self.in_flight_tasks = {}
+        self.in_flight_changed = threading.Condition()
+
     def start_workers(self):
+        self.register_task_definitions()
+
+        self.task_updater = TaskUpdater(
+            self.taskClient,
+            thread_count=self.update_thread_count,
+            max_pending_updates=self.max_pending_updates,
+        )
+        self.task_updater.start()
+
+        consumer = self.consume_task
+        if self.batch_poll:
+            consumer = self.consume_polled_task
+            self.dispatcher_thread = Thread(target=self.dispatch_tasks)
+            self.dispatcher_thread.daemon = True
+            self.dispatcher_thread.start()
+
         for i in range(self.consumer_worker_count):
-            thread = Thread(target=self.consume_task)
+            thread = Thread(target=consumer)
             thread.daemon = True
             thread.start()
 
         logger.info("Starting a queue polling")
         fail_count = 0
-        while True:
+        interval = self.polling_interval
+        while not self.stopping.wait(float(interval)):
             try:
-                time.sleep(float(self.polling_interval))
-                queues_temp = self.taskClient.getTasksInQueue("all")
-                self.task_source.handle_tasks(queues_temp)
+                queues_temp = self.taskClient.getTaskQueueSizes(
+                    self.task_source.registered_task_types
+                )
+                if self.prefetch_buffer is not None:
+                    self.prefetch_buffer.expire_tasks()
+                    queues_temp = self.prefetch_buffer.add_depths(queues_temp)
+                    logger.debug("Prefetch buffer: %s", self.prefetch_buffer.metrics())
+                has_tasks = self.task_source.handle_tasks(queues_temp)
+                interval = self.next_polling_interval(interval, has_tasks)
                 fail_count = 0
             except Exception:
                 logger.error(
                     f"Unable to read a queue info after {fail_count} attempts", exc_info=True
                 )
                 self.task_source.handle_tasks({})
-                fail_count = +1
+                fail_count += 1
                 if fail_count > 10:
-                    exit(1)
+                    self.shutdown()
+                    raise
+
+        self.shutdown()
+
+    def stop(self):
+        """Stop polling, start_workers then shuts down. Safe to call from signal handlers."""
+        self.stopping.set()
+
+    def shutdown(self, timeout=None, callback_after_seconds=None):
+        """
+        Stop polling and wait up to timeout seconds for running tasks and pending task updates.
+
+        Polled tasks not started yet are returned to Conductor immediately. Tasks not finished
+        in time are updated to IN_PROGRESS with callback_after_seconds (if set), so Conductor
+        requeues them after that delay.
+        Returns True if all running tasks finished, their updates were sent and not started
+        tasks were returned.
+        """
+        timeout = self.shutdown_timeout if timeout is None else timeout
+        if callback_after_seconds is None:
+            callback_after_seconds = self.shutdown_callback_after_seconds
+
+        with self.shutdown_lock:
+            if self.shut_down:
+                return True
+            self.shut_down = True
+
+            logger.info("Shutting down, waiting up to %s seconds for running tasks", timeout)
+            deadline = time.monotonic() + timeout
+            self.stopping.set()
+            with self.task_source.lock:
+                self.task_source.tasks_available.notify_all()
+
+            # Tasks polled by the dispatcher but not picked up by a consumer are not started
+            not_started = []
+            if self.dispatcher_thread is not None:
+                self.dispatcher_thread.join(max(0.0, deadline - time.monotonic()))
+                not_started.extend(self.drain_polled_tasks())
+            if self.prefetch_buffer is not None:
+                not_started.extend(self.prefetch_buffer.drain())
+            returned = self.return_not_started_tasks(not_started)
+
+            finished = self.wait_for_in_flight_tasks(deadline)
+            if self.task_updater is not None:
+                finished = (
+                    self.task_updater.flush(max(0.0, deadline - time.monotonic())) and finished
+                )
+
+            if callback_after_seconds is not None:
+                with self.in_flight_changed:
+                    unfinished = list(self.in_flight_tasks.values())
+                for task in unfinished:
+                    self.postpone_task(task, callback_after_seconds)
+
+            # Processes still running tasks after the deadline are not waited for
+            self.process_executor.shutdown(wait=finished, cancel_futures=not finished)
+            self.external_payload_storage.shutdown()
+            logger.info("Shutdown finished, all tasks finished: %s", finished)
+            return finished and returned
+
+    def drain_polled_tasks(self):
+        not_started = []
+        while True:
+            try:
+                polled_task, _ = self.polled_tasks.get_nowait()
+                not_started.append(polled_task)
+            except queue.Empty:
+                break
+
+        # Wake up the consumers blocked on the empty queue
+        for i in range(self.consumer_worker_count):
+            self.polled_tasks.put(None)
+        return not_started
+
+    def wait_for_in_flight_tasks(self, deadline):
+        with self.in_flight_changed:
+            while self.in_flight_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(
+                        "Tasks %s did not finish before shutdown", list(self.in_flight_tasks)
+                    )
+                    return False
+                self.in_flight_changed.wait(remaining)
+        return True
+
+    def return_not_started_tasks(self, tasks):
+        """Return polled tasks to Conductor to be polled again at once, True if all were sent."""
+        returned = True
+        for task in tasks:
+            returned = (
+                return_task(
+                    self.taskClient,
+                    task,
+                    self.worker_id,
+                    0,
+                    "Worker %s shut down before starting the task" % self.worker_id,
+                )
+                and returned
+            )
+        return returned
+
+    def postpone_task(self, task, callback_after_seconds):
+        return_task(
+            self.taskClient,
+            task,
+            self.worker_id,
+            callback_after_seconds,
+            "Worker %s shut down before finishing the task" % self.worker_id,
+        )
+
+    def track_task(self, task):
+        with self.in_flight_changed:
+            self.in_flight_tasks[task["taskId"]] = task
+
+    def untrack_task(self, task):
+        with self.in_flight_changed:
+            self.in_flight_tasks.pop(task["taskId"], None)
+            self.in_flight_changed.notify_all()
+
+    def next_polling_interval(self, interval, has_tasks):
+        """Back off exponentially while the queues of registered task types are empty."""
+        if has_tasks:
+            return self.polling_interval
+        return min(interval * 2, self.max_polling_interval)
 
     # Consume_task is executing tasks in the queue. The tasks are selected by round-robin from all task types.
-    # If there is no task for processing, the thread is in sleeping for a defined interval.
+    # If there is no task for processing, the thread waits until a queue read reports new tasks.
     def consume_task(self):
         last_task_type = None
-        while True:
+        while not self.stopping.is_set():
             next_task: NextWorkerTask = self.task_source.get_next_task(last_task_type)
             last_task_type = None
 
             if not next_task:
-                time.sleep(float(self.polling_interval))
+                self.task_source.wait_for_tasks(self.max_polling_interval)
                 continue
 
             last_task_type = next_task.task_type
 
-            polled_task = self.taskClient.pollForTask(next_task.task_type, self.worker_id)
+            polled_task = self.poll_task(next_task)
 
             if polled_task is None:
                 self.task_source.task_not_found_anymore(next_task)
@@ -172,46 +846,130 @@ class FrinxConductorWrapper:
                 "Polled for a task %s of type %s", polled_task["taskId"], next_task.task_type
             )
 
-            # Check if task input is externalized and if so, download the input
-            polled_task = self.replaceExternalPayloadInput(polled_task)
-            if polled_task is None:
-                # Error replacing external payload
+            self.track_task(polled_task)
+            try:
+                # Check if task input is externalized and if so, download the input
+                task = self.replaceExternalPayloadInput(polled_task)
+                if task is None:
+                    # Error replacing external payload
+                    continue
+
+                self.execute(task, next_task.exec_function)
+            finally:
+                self.untrack_task(polled_task)
+
+    def poll_task(self, next_task: NextWorkerTask):
+        task_type = next_task.task_type
+        if (
+            self.prefetch_buffer is None
+            or self.task_source.task_types[task_type].scheduling.max_concurrency is not None
+        ):
+            return self.taskClient.pollForTask(task_type, self.worker_id)
+
+        polled_task = self.prefetch_buffer.take(task_type)
+        if polled_task is not None:
+            return polled_task
+
+        # Prefetch no more tasks than are left in the queue, batch poll waits for the rest
+        with self.task_source.lock:
+            queued = self.task_source.filtered_queue.get(task_type, 0)
+        count = 1 + min(queued, self.prefetch_buffer.missing(task_type))
+        polled_tasks = self.taskClient.pollForBatch(
+            task_type, count, self.poll_batch_timeout, self.worker_id
+        )
+        if not polled_tasks:
+            return None
+        self.prefetch_buffer.put(task_type, polled_tasks[1:])
+        return polled_tasks[0]
+
+    # Dispatch_tasks polls tasks in batches for consumer threads (batch poll mode).
+    # A batch is never larger than the number of idle consumers, so polled tasks do not wait
+    # in the local queue while their response timeout is ticking in Conductor.
+    def dispatch_tasks(self):
+        while not self.stopping.is_set():
+            if not self.idle_consumers.acquire(timeout=self.max_polling_interval):
+                continue
+            idle_count = 1
+            while idle_count < self.poll_batch_size and self.idle_consumers.acquire(blocking=False):
+                idle_count += 1
+
+            next_batch: NextWorkerTask = self.task_source.get_next_batch(idle_count)
+            if not next_batch:
+                self.idle_consumers.release(idle_count)
+                self.task_source.wait_for_tasks(self.max_polling_interval)
                 continue
 
-            self.execute(polled_task, next_task.exec_function)
+            # Consumers not needed by the reserved batch size are free again
+            if next_batch.count < idle_count:
+                self.idle_consumers.release(idle_count - next_batch.count)
+
+            polled_tasks = self.taskClient.pollForBatch(
+                next_batch.task_type, next_batch.count, self.poll_batch_timeout, self.worker_id
+            )
+            polled_tasks = polled_tasks or []
+
+            if len(polled_tasks) < next_batch.count:
+                missing = next_batch.count - len(polled_tasks)
+                self.task_source.task_finished(next_batch.task_type, missing)
+                self.idle_consumers.release(missing)
+                self.task_source.task_not_found_anymore(next_batch)
+
+            for polled_task in polled_tasks:
+                logger.info(
+                    "Polled for a task %s of type %s", polled_task["taskId"], next_batch.task_type
+                )
+                if self.taskClient.EXTERNAL_INPUT_KEY in polled_task:
+                    # Download the input while the task waits for a consumer
+                    self.external_payload_storage.prefetch(
+                        polled_task[self.taskClient.EXTERNAL_INPUT_KEY]
+                    )
+                self.polled_tasks.put((polled_task, next_batch))
+
+    # Consume_polled_task is executing tasks polled by the dispatcher thread (batch poll mode).
+    # A None item is put to the queue by shutdown to stop the consumer.
+    def consume_polled_task(self):
+        while True:
+            polled = self.polled_tasks.get()
+            if polled is None:
+                return
+
+            polled_task, next_task = polled
+            self.track_task(polled_task)
+            try:
+                # Check if task input is externalized and if so, download the input
+                task = self.replaceExternalPayloadInput(polled_task)
+                if task is not None:
+                    self.execute(task, next_task.exec_function)
+            finally:
+                self.untrack_task(polled_task)
+                self.task_source.task_finished(next_task.task_type)
+                self.idle_consumers.release()
 
     def replaceExternalPayloadInput(self, task):
         # No external payload placeholder present, just return original task
         if self.taskClient.EXTERNAL_INPUT_KEY not in task:
             return task
 
-        location = {}
+        path = task[self.taskClient.EXTERNAL_INPUT_KEY]
         try:
-            # Get the exact uri from conductor where the payload is stored
-            location = self.taskClient.getTaskInputExternalPayloadLocation(
-                task[self.taskClient.EXTERNAL_INPUT_KEY]
-            )
-            if "uri" not in location:
-                raise Exception("Unexpected output for external payload location: %s" % location)
-
             # Replace placeholder with real output
+            task["inputData"] = self.external_payload_storage.get_input(path)
             task.pop(self.taskClient.EXTERNAL_INPUT_KEY)
-            task["inputData"] = requests.get(
-                location["uri"], headers=self.taskClient.headers
-            ).json()
             return task
 
         except Exception:
             logger.error(
                 "Unable to download external task input: %s for path: %s",
                 task["taskId"],
-                location,
+                path,
                 exc_info=True,
             )
             self.handleTaskException(task)
             return None
 
-    def register(self, task_type, task_definition, exec_function):
+    def register(
+        self, task_type, task_definition, exec_function, cpu_bound=False, output_threshold=None
+    ):
         if task_definition is None:
             task_definition = copy.deepcopy(DEFAULT_TASK_DEFINITION)
         else:
@@ -219,22 +977,62 @@ class FrinxConductorWrapper:
 
         task_definition["name"] = task_type
 
-        logger.debug("Registering a task of type %s with definition %s", task_type, task_definition)
-        task_meta = copy.deepcopy(task_definition)
-        task_meta["name"] = task_type
-        try:
-            res = requests.post(
-                self.conductor_task_url, data=json.dumps([task_meta]), headers=self.headers
+        if self.register_definitions:
+            logger.debug(
+                "Registering a task of type %s with definition %s", task_type, task_definition
             )
+            self.pending_task_definitions[task_type] = task_definition
+
+        if self.task_types is not None and task_type not in self.task_types:
+            return
+
+        if output_threshold is not None:
+            self.external_payload_storage.output_thresholds[task_type] = output_threshold
+
+        if cpu_bound:
+            exec_function = functools.partial(self.process_executor.execute, exec_function)
+
+        self.task_source.register_task_type(
+            task_type, exec_function, self.get_task_type_scheduling(task_type, task_definition)
+        )
+
+    def register_task_definitions(self):
+        """
+        Send task definitions of registered task types to Conductor in one request, only new and
+        changed ones are sent (DefinitionRegistrar). Called by start_workers.
+        """
+        if not self.pending_task_definitions:
+            return
+
+        task_definitions = list(self.pending_task_definitions.values())
+        self.pending_task_definitions = {}
+        registrar = DefinitionRegistrar(
+            self.metadataClient, cache_file=self.definition_cache_file, server_url=self.server_url
+        )
+        try:
+            registrar.register_task_defs(task_definitions)
         except Exception:
-            logger.error("Unable to register a task", exc_info=True)
+            logger.error("Unable to register task definitions", exc_info=True)
 
-        self.task_source.register_task_type(task_type, exec_function)
+    def get_task_type_scheduling(self, task_type, task_definition):
+        if task_type in self.task_type_scheduling:
+            return self.task_type_scheduling[task_type]
+
+        limits = [
+            task_definition[limit]
+            for limit in ("limitToThreadCount", "concurrentExecLimit")
+            if task_definition.get(limit)
+        ]
+        return TaskTypeScheduling(max_concurrency=min(limits) if limits else None)
 
     def execute(self, task, exec_function):
         try:
             logger.info("Executing a task %s", task["taskId"])
             resp = exec_function(task)
+            if inspect.isawaitable(resp):
+                # Coroutine exec functions (async workers) share one long-lived event loop,
+                # so sessions of the loop are reused across tasks
+                resp = event_loop_thread.run(resp)
             if resp is None:
                 error_msg = "Task execution function MUST return a response as a dict with status and output fields"
                 raise Exception(error_msg)
@@ -243,10 +1041,25 @@ class FrinxConductorWrapper:
             task["logs"] = resp.get("logs", [])
             logger.debug("Executing a task %s, response: %s", task["taskId"], resp)
             logger.debug("Executing a task %s, task body: %s", task["taskId"], task)
-            self.taskClient.updateTask(task)
+            self.update_task(task)
         except Exception:
             self.handleTaskException(task)
 
+    def update_task(self, task):
+        try:
+            self.external_payload_storage.externalize_output(task)
+        except Exception:
+            logger.error(
+                "Unable to upload output of a task %s, sending it inline",
+                task["taskId"],
+                exc_info=True,
+            )
+
+        if self.task_updater is None:
+            self.taskClient.updateTask(task)
+        else:
+            self.task_updater.submit(task)
+
     def handleTaskException(self, task):
         logger.error("Unable to execute a task %s", task["taskId"], exc_info=True)
         error_info = traceback.format_exc().split("\n")[:-1]
@@ -257,7 +1070,7 @@ class FrinxConductorWrapper:
         }
         task["logs"] = ["Logs: %s" % traceback.format_exc()]
         try:
-            self.taskClient.updateTask(task)
+            self.update_task(task)
         except Exception:
             logger.error(
                 "Unable to update a task %s, it may have timed out", task["taskId"], exc_info=True
@@ -0,0 +1,161 @@
+import logging
+import multiprocessing
+import os
+import signal
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerSupervisor:
+    """
+    Runs FrinxConductorWrapper instances in process_count forked worker processes.
+
+    Task definitions and workflows are registered once by the supervisor, worker processes only
+    register exec functions of their task types (register_definitions=False). With
+    task_type_groups every worker process executes one group of task types, otherwise all
+    processes execute all registered task types.
+
+    Crashed worker processes are restarted with an exponential delay. SIGTERM or SIGINT stop
+    the supervisor: worker processes get SIGTERM, stop polling and drain running tasks
+    (FrinxConductorWrapper.shutdown), they are killed if not exited in drain_timeout seconds.
+    drain_timeout should be longer than shutdown_timeout of the workers.
+
+    Args:
+        conductor_factory: callable creating a FrinxConductorWrapper, called with
+            register_definitions and task_types keyword arguments
+        register_tasks: callable registering workers to a FrinxConductorWrapper
+        register_workflows: optional callable registering workflows
+        process_count: number of worker processes, defaults to number of CPUs
+        task_type_groups: optional list of task type lists, one per worker process
+    """
+
+    def __init__(
+        self,
+        conductor_factory,
+        register_tasks,
+        register_workflows=None,
+        process_count=None,
+        task_type_groups=None,
+        restart_delay=1.0,
+        max_restart_delay=60.0,
+        drain_timeout=30.0,
+        monitor_interval=1.0,
+    ):
+        if task_type_groups is not None:
+            process_count = len(task_type_groups)
+
+        self.conductor_factory = conductor_factory
+        self.register_tasks = register_tasks
+        self.register_workflows = register_workflows
+        self.process_count = process_count or os.cpu_count() or 1
+        self.task_type_groups = task_type_groups
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.drain_timeout = drain_timeout
+        self.monitor_interval = monitor_interval
+
+        # Worker processes are forked, conductor_factory and register_tasks need not be picklable
+        self.mp_context = multiprocessing.get_context("fork")
+        self.processes = [None] * self.process_count
+        self.restart_count = [0] * self.process_count
+        self.restart_at = [0.0] * self.process_count
+        self.started_at = [0.0] * self.process_count
+        self.stopping = False
+
+    def run(self):
+        """Register definitions, start worker processes and supervise them until stopped."""
+        signal.signal(signal.SIGTERM, self._handle_stop_signal)
+        signal.signal(signal.SIGINT, self._handle_stop_signal)
+
+        self.register_definitions()
+        for index in range(self.process_count):
+            self.start_worker(index)
+
+        while not self.stopping:
+            time.sleep(self.monitor_interval)
+            self.check_workers()
+
+        self.stop_workers()
+
+    def register_definitions(self):
+        conductor = self.conductor_factory(register_definitions=True, task_types=[])
+        self.register_tasks(conductor)
+        conductor.register_task_definitions()
+        if self.register_workflows is not None:
+            self.register_workflows()
+        logger.info("Task definitions and workflows registered by supervisor %s", os.getpid())
+
+    def start_worker(self, index):
+        process = self.mp_context.Process(
+            target=self._run_worker, args=(index,), name=f"frinx-worker-{index}", daemon=False
+        )
+        process.start()
+        self.processes[index] = process
+        self.started_at[index] = time.monotonic()
+        logger.info("Worker process %s started with pid %s", index, process.pid)
+
+    def check_workers(self):
+        """Restart worker processes which exited, delaying restarts of crash looping ones."""
+        now = time.monotonic()
+        for index, process in enumerate(self.processes):
+            if process is None or process.is_alive() or self.stopping:
+                continue
+
+            if self.restart_at[index] == 0.0:
+                # A process running long enough is not crash looping
+                if now - self.started_at[index] > self.max_restart_delay:
+                    self.restart_count[index] = 0
+                delay = min(
+                    self.max_restart_delay, self.restart_delay * 2 ** self.restart_count[index]
+                )
+                logger.error(
+                    "Worker process %s (pid %s) exited with code %s, restarting in %.1f seconds",
+                    index,
+                    process.pid,
+                    process.exitcode,
+                    delay,
+                )
+                self.restart_at[index] = now + delay
+                self.restart_count[index] += 1
+
+            if now >= self.restart_at[index]:
+                self.restart_at[index] = 0.0
+                self.start_worker(index)
+
+    def stop_workers(self):
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + self.drain_timeout
+        for process in self.processes:
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("Worker process %s did not stop in time, killing it", process.pid)
+                process.kill()
+                process.join()
+
+    def _handle_stop_signal(self, signum, frame):
+        logger.info("Received signal %s, stopping worker processes", signum)
+        self.stopping = True
+
+    def _run_worker(self, index):
+        # Forked process inherits handlers of the supervisor
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        task_types = None
+        if self.task_type_groups is not None:
+            task_types = self.task_type_groups[index]
+
+        conductor = self.conductor_factory(register_definitions=False, task_types=task_types)
+        self.register_tasks(conductor)
+
+        # Drain running tasks on SIGTERM, start_workers returns after the shutdown.
+        # SIGINT from a terminal reaches the whole process group, the supervisor sends SIGTERM.
+        signal.signal(signal.SIGTERM, lambda signum, frame: conductor.stop())
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        conductor.start_workers()
@@ -21,6 +21,9 @@ import sys
 import warnings
 
 import requests
+from frinx.common import json_codec
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 hostname = socket.gethostname()
 
@@ -29,20 +32,26 @@ class BaseClient(object):
     printUrl = False
     headers = {"Content-Type": "application/json", "Accept": "application/json"}
 
-    def __init__(self, baseURL, baseResource, headers=None):
+    def __init__(self, baseURL, baseResource, headers=None, session=None, timeout=None):
         self.baseURL = baseURL
         self.baseResource = baseResource
+        # requests.Session keeps connections alive between calls, module requests does not
+        self.session = session or requests
+        # Seconds (or a (connect, read) tuple) to wait for the server, None waits forever
+        self.timeout = timeout
         if headers != None:
             self.headers = self.mergeTwoDicts(self.headers, headers)
 
     def get(self, resPath, queryParams=None):
         theUrl = "{}/{}".format(self.baseURL, resPath)
-        resp = requests.get(theUrl, params=queryParams, headers=self.headers)
+        resp = self.session.get(
+            theUrl, params=queryParams, headers=self.headers, timeout=self.timeout
+        )
         self.__checkForSuccess(resp)
         if resp.content == b"":
             return None
         else:
-            return resp.json()
+            return json_codec.loads(resp.content)
 
     def post(self, resPath, queryParams, body, headers=None):
         theUrl = "{}/{}".format(self.baseURL, resPath)
@@ -50,10 +59,14 @@ class BaseClient(object):
         if headers is not None:
             theHeader = self.mergeTwoDicts(self.headers, headers)
         if body is not None:
-            jsonBody = json.dumps(body, ensure_ascii=False).encode("utf8")
-            resp = requests.post(theUrl, params=queryParams, data=jsonBody, headers=theHeader)
+            jsonBody = json_codec.dumps(body)
+            resp = self.session.post(
+                theUrl, params=queryParams, data=jsonBody, headers=theHeader, timeout=self.timeout
+            )
         else:
-            resp = requests.post(theUrl, params=queryParams, headers=theHeader)
+            resp = self.session.post(
+                theUrl, params=queryParams, headers=theHeader, timeout=self.timeout
+            )
 
         self.__checkForSuccess(resp)
         return self.__return(resp, theHeader)
@@ -65,17 +78,23 @@ class BaseClient(object):
             theHeader = self.mergeTwoDicts(self.headers, headers)
 
         if body is not None:
-            jsonBody = json.dumps(body, ensure_ascii=False).encode("utf8")
-            resp = requests.put(theUrl, params=queryParams, data=jsonBody, headers=theHeader)
+            jsonBody = json_codec.dumps(body)
+            resp = self.session.put(
+                theUrl, params=queryParams, data=jsonBody, headers=theHeader, timeout=self.timeout
+            )
         else:
-            resp = requests.put(theUrl, params=queryParams, headers=theHeader)
+            resp = self.session.put(
+                theUrl, params=queryParams, headers=theHeader, timeout=self.timeout
+            )
 
         self.__print(resp)
         self.__checkForSuccess(resp)
 
     def delete(self, resPath, queryParams):
         theUrl = "{}/{}".format(self.baseURL, resPath)
-        resp = requests.delete(theUrl, params=queryParams, headers=self.headers)
+        resp = self.session.delete(
+            theUrl, params=queryParams, headers=self.headers, timeout=self.timeout
+        )
         self.__print(resp)
         self.__checkForSuccess(resp)
 
@@ -103,7 +122,7 @@ class BaseClient(object):
             if header["Accept"] == "text/plain":
                 retval = resp.text
             elif header["Accept"] == "application/json":
-                retval = resp.json()
+                retval = json_codec.loads(resp.content)
             else:
                 retval = resp.text
         return retval
@@ -119,8 +138,8 @@ class BaseClient(object):
 class MetadataClient(BaseClient):
     BASE_RESOURCE = "metadata"
 
-    def __init__(self, baseURL, headers=None):
-        BaseClient.__init__(self, baseURL, self.BASE_RESOURCE, headers)
+    def __init__(self, baseURL, headers=None, session=None, timeout=None):
+        BaseClient.__init__(self, baseURL, self.BASE_RESOURCE, headers, session, timeout)
 
     def getWorkflowDef(self, wfname, version=None):
         url = self.makeUrl("workflow/{}", wfname)
@@ -175,9 +194,10 @@ class MetadataClient(BaseClient):
 class TaskClient(BaseClient):
     BASE_RESOURCE = "tasks"
     EXTERNAL_INPUT_KEY = "externalInputPayloadStoragePath"
+    EXTERNAL_OUTPUT_KEY = "externalOutputPayloadStoragePath"
 
-    def __init__(self, baseURL, headers=None):
-        BaseClient.__init__(self, baseURL, self.BASE_RESOURCE, headers)
+    def __init__(self, baseURL, headers=None, session=None, timeout=None):
+        BaseClient.__init__(self, baseURL, self.BASE_RESOURCE, headers, session, timeout)
 
     def getTask(self, taskId):
         url = self.makeUrl("{}", taskId)
@@ -239,12 +259,20 @@ class TaskClient(BaseClient):
         params["payloadType"] = "TASK_INPUT"
         return self.get(url, params)
 
+    def getTaskOutputExternalPayloadLocation(self, path=""):
+        url = self.makeUrl("externalstoragelocation")
+        params = {}
+        params["path"] = path
+        params["operation"] = "WRITE"
+        params["payloadType"] = "TASK_OUTPUT"
+        return self.get(url, params)
+
 
 class WorkflowClient(BaseClient):
     BASE_RESOURCE = "workflow"
 
-    def __init__(self, baseURL, headers=None):
-        BaseClient.__init__(self, baseURL, self.BASE_RESOURCE, headers)
+    def __init__(self, baseURL, headers=None, session=None, timeout=None):
+        BaseClient.__init__(self, baseURL, self.BASE_RESOURCE, headers, session, timeout)
 
     def getWorkflow(self, wfId, includeTasks=True):
         url = self.makeUrl("{}", wfId)
@@ -304,8 +332,8 @@ class WorkflowClient(BaseClient):
 class EventServicesClient(BaseClient):
     BASE_RESOURCE = "event"
 
-    def __init__(self, baseURL, headers=None):
-        BaseClient.__init__(self, baseURL, self.BASE_RESOURCE, headers)
+    def __init__(self, baseURL, headers=None, session=None, timeout=None):
+        BaseClient.__init__(self, baseURL, self.BASE_RESOURCE, headers, session, timeout)
 
     def getEventHandlerDef(self, event, activeOnly=True):
         url = self.makeUrl("{}", event)
@@ -338,11 +366,45 @@ class EventServicesClient(BaseClient):
         return self.get(url)
 
 
+def create_session(pool_size=10, retries=3, backoff_factor=0.1):
+    """
+    Create a requests.Session keeping up to pool_size connections per host alive.
+
+    Connection errors and 502/503/504 responses of idempotent requests are retried with an
+    exponential backoff. POST requests (task updates, workflow starts) are retried only when
+    the connection could not be established.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "PUT", "DELETE", "HEAD"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 class WFClientMgr:
-    def __init__(self, server_url="http://localhost:8080/api/", headers=None):
-        self.workflowClient = WorkflowClient(server_url, headers)
-        self.taskClient = TaskClient(server_url, headers)
-        self.metadataClient = MetadataClient(server_url, headers)
+    def __init__(
+        self,
+        server_url="http://localhost:8080/api/",
+        headers=None,
+        pool_size=10,
+        timeout=60,
+        retries=3,
+    ):
+        self.session = create_session(pool_size=pool_size, retries=retries)
+        self.workflowClient = WorkflowClient(server_url, headers, self.session, timeout)
+        self.taskClient = TaskClient(server_url, headers, self.session, timeout)
+        self.metadataClient = MetadataClient(server_url, headers, self.session, timeout)
 
 
 def main():
@@ -0,0 +1,66 @@
+"""
+Long-lived event loop of synchronous workers.
+
+Coroutines of async workers and of async service layers (e.g. async Uniconfig requests) are run
+on one event loop in a daemon thread instead of a new loop per task, so aiohttp sessions bound
+to the loop, and their connections, are reused across tasks.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import threading
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Coroutine
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class EventLoopThread:
+    """
+    Event loop running in a daemon thread, so synchronous code can run coroutines on a
+    long-lived loop. The loop is started on first use, in every (forked) process of its own.
+    Callbacks of on_close (e.g. closing sessions of the loop) are awaited on the loop by close.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.pid: int | None = None
+        self.on_close: list[Callable[[], Awaitable[Any]]] = []
+
+    def run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Run coroutine on the loop and wait for its result, not to be called on the loop."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.get_loop()).result()
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        with self.lock:
+            if self.loop is None or self.pid != os.getpid():
+                self.loop = asyncio.new_event_loop()
+                self.pid = os.getpid()
+                thread = threading.Thread(
+                    target=self.loop.run_forever, name="event-loop", daemon=True
+                )
+                thread.start()
+            return self.loop
+
+    def close(self, timeout: float = 5) -> None:
+        """Await on_close callbacks on the loop, e.g. at exit."""
+        with self.lock:
+            loop = self.loop if self.pid == os.getpid() else None
+        if loop is None or not loop.is_running():
+            return
+        for callback in self.on_close:
+            try:
+                asyncio.run_coroutine_threadsafe(callback(), loop).result(timeout)
+            except Exception:
+                logger.warning("Unable to close %s", callback, exc_info=True)
+
+
+event_loop_thread = EventLoopThread()
+atexit.register(event_loop_thread.close)
@@ -1,4 +1,3 @@
-import json
 import os
 
 # from collections import namedtuple
@@ -6,6 +5,7 @@ import os
 from typing import Any
 from typing import Tuple
 
+from frinx.common import json_codec
 from requests import Response
 
 uniconfig_url_base = os.getenv("UNICONFIG_URL_BASE", "http://uniconfig:8181/rests")
@@ -35,11 +35,10 @@ additional_uniconfig_request_params = {"verify": False, "headers": uniconfig_hea
 
 
 def parse_response(response: Response) -> Tuple[int, dict[Any, Any]]:
-    decode = response.content.decode("utf8")
     try:
-        response_json = json.loads(decode if decode else "{}")
+        response_json = json_codec.loads(response.content) if response.content else {}
     except ValueError:
-        response_json = json.loads("{}")
+        response_json = {}
 
     response_code = response.status_code
     return response_code, response_json
@@ -1,8 +1,11 @@
-import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
 
 import requests
+from frinx.common import json_codec
 from frinx.common.frinx_rest import conductor_headers
 from frinx.common.frinx_rest import conductor_url_base
 
@@ -18,10 +21,11 @@ def register_workflow(workflow: str, overwrite: bool = False) -> None:
     try:
         match overwrite:
             case True:
-                logger.debug(json.dumps([json.loads(workflow)]))
+                # Workflow is serialized already, api expects an array of workflows
+                logger.debug(workflow)
                 response = requests.put(
                     workflow_import_url,
-                    data=json.dumps([json.loads(workflow)]),
+                    data=f"[{workflow}]".encode("utf8"),
                     headers=conductor_headers,
                     timeout=60,
                 )
@@ -32,11 +36,11 @@ def register_workflow(workflow: str, overwrite: bool = False) -> None:
                         response.content,
                     )
             case False:
-                logger.debug(json.dumps(json.loads(workflow)))
+                logger.debug(workflow)
 
                 response = requests.post(
                     workflow_import_url,
-                    data=json.dumps(json.loads(workflow)),
+                    data=workflow.encode("utf8"),
                     headers=conductor_headers,
                     timeout=60,
                 )
@@ -51,39 +55,246 @@ def register_workflow(workflow: str, overwrite: bool = False) -> None:
         raise err
 
 
-def import_workflows(path: str) -> None:
-    if os.path.isdir(path):
-        logger.info("Importing workflows from folder %s", path)
-        with os.scandir(path) as entries:
-            for entry in entries:
-                if entry.is_file() and entry.name.endswith(".json"):
-                    try:
-                        logger.info("Importing workflow %s", entry.name)
-                        with open(entry, "r") as payload_file:
-                            # api expects array in payload
-                            payload = []
-                            payload_json = json.load(payload_file)
-                            payload.append(payload_json)
-                            response = requests.put(
-                                workflow_import_url,
-                                data=json.dumps(payload),
-                                headers=conductor_headers,
-                                timeout=60,
-                            )
-                            logger.info("Response status code - %s", response.status_code)
-                            if response.status_code != 204:
-                                logger.warning(
-                                    "Import of workflow %s failed. "
-                                    "Ignoring the workflow. Response content: %s",
-                                    entry.name,
-                                    response.content,
-                                )
-                    except Exception as err:
-                        logger.error("Error while registering workflow %s", entry.name, err)
-                        raise err
-                elif entry.is_dir():
-                    import_workflows(entry.path)
-                else:
-                    logger.warning("Ignoring, unknown type %s", entry)
+@dataclass
+class WorkflowPayload:
+    """Serialized workflow definition and where it comes from (file path or class name)."""
+
+    source: str
+    name: str
+    content: bytes
+
+
+@dataclass
+class WorkflowImportResult:
+    source: str
+    name: str | None = None
+    status_code: int | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def validate_workflow(workflow: Any) -> None:
+    if not isinstance(workflow, dict):
+        raise ValueError("Workflow definition is not an object")
+    if not isinstance(workflow.get("name"), str) or not workflow["name"]:
+        raise ValueError("Workflow definition has no name")
+    if not isinstance(workflow.get("tasks"), list):
+        raise ValueError("Workflow definition has no list of tasks")
+
+
+def read_workflow_file(path: str) -> WorkflowPayload:
+    with open(path, "rb") as payload_file:
+        content = payload_file.read()
+    workflow = json_codec.loads(content)
+    validate_workflow(workflow)
+    return WorkflowPayload(source=path, name=workflow["name"], content=content)
+
+
+def find_workflow_files(path: str) -> list[str]:
+    files = []
+    for directory, _, names in os.walk(path):
+        files.extend(os.path.join(directory, name) for name in names if name.endswith(".json"))
+    return sorted(files)
+
+
+def split_duplicate_workflows(
+    payloads: list[WorkflowPayload],
+) -> tuple[list[WorkflowPayload], list[WorkflowImportResult]]:
+    """
+    Split payloads into workflows defined once and error results of workflows defined by more
+    than one payload (same name and version). Conductor would reject a list with both of them,
+    so none of the duplicates is sent.
+    """
+    from frinx.client.DefinitionRegistrar import DefinitionRegistrar
+
+    keys = [
+        DefinitionRegistrar.workflow_key(json_codec.loads(payload.content)) for payload in payloads
+    ]
+    sources: dict[str, list[str]] = {}
+    for payload, key in zip(payloads, keys):
+        sources.setdefault(key, []).append(payload.source)
+
+    unique = []
+    duplicates = []
+    for payload, key in zip(payloads, keys):
+        if len(sources[key]) == 1:
+            unique.append(payload)
+        else:
+            error = "Workflow %s is defined more than once: %s" % (key, ", ".join(sources[key]))
+            duplicates.append(
+                WorkflowImportResult(source=payload.source, name=payload.name, error=error)
+            )
+    return unique, duplicates
+
+
+def submit_workflows(
+    payloads: list[WorkflowPayload],
+    overwrite: bool = True,
+    batch_size: int = 50,
+    max_concurrency: int = 4,
+) -> list[WorkflowImportResult]:
+    """
+    Send workflow definitions to Conductor with up to max_concurrency requests at a time.
+
+    With overwrite, workflows are sent in lists of batch_size workflows (PUT). Conductor
+    rejects a whole list when one of the workflows is invalid, workflows of a rejected list
+    are then sent one by one, so every workflow gets its own result. Without overwrite,
+    every workflow is created by a request of its own (POST). Workflows defined more than once
+    are not sent, they get an error result (split_duplicate_workflows).
+    """
+    payloads, duplicates = split_duplicate_workflows(payloads)
+    if overwrite:
+        batches = [payloads[i : i + batch_size] for i in range(0, len(payloads), batch_size)]
     else:
+        batches = [[payload] for payload in payloads]
+
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_concurrency)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        def submit(batch: list[WorkflowPayload]) -> list[WorkflowImportResult]:
+            results = _submit_batch(session, batch, overwrite)
+            if len(batch) > 1 and not results[0].ok:
+                results = [_submit_batch(session, [payload], overwrite)[0] for payload in batch]
+            return results
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            results = [result for results in executor.map(submit, batches) for result in results]
+    return results + duplicates
+
+
+def _submit_batch(
+    session: requests.Session, batch: list[WorkflowPayload], overwrite: bool
+) -> list[WorkflowImportResult]:
+    try:
+        if overwrite:
+            # api expects an array of workflows
+            content = b"[" + b",".join(payload.content for payload in batch) + b"]"
+            response = session.put(
+                workflow_import_url, data=content, headers=conductor_headers, timeout=60
+            )
+        else:
+            response = session.post(
+                workflow_import_url, data=batch[0].content, headers=conductor_headers, timeout=60
+            )
+        status_code = response.status_code
+        error = None if response.ok else response.content.decode("utf8", errors="replace")
+    except Exception as err:
+        status_code, error = None, str(err)
+
+    return [
+        WorkflowImportResult(
+            source=payload.source, name=payload.name, status_code=status_code, error=error
+        )
+        for payload in batch
+    ]
+
+
+def get_workflow_defs() -> list[dict[str, Any]]:
+    response = requests.get(workflow_import_url, headers=conductor_headers, timeout=60)
+    response.raise_for_status()
+    return json_codec.loads(response.content)
+
+
+def update_workflows(
+    payloads: list[WorkflowPayload],
+    batch_size: int = 50,
+    max_concurrency: int = 4,
+    cache_file: str | None = None,
+) -> list[WorkflowImportResult]:
+    """
+    Send new and changed workflow definitions to Conductor (submit_workflows with overwrite).
+
+    Workflows stored in Conductor are read once and compared by DefinitionRegistrar, unchanged
+    workflows are not sent and get a result without status_code. With cache_file
+    (DEFINITION_CACHE_FILE by default), workflows not changed since the last registration
+    skip Conductor completely. Workflows defined more than once get an error result and are
+    not sent (split_duplicate_workflows).
+    """
+    from frinx.client.DefinitionRegistrar import DefinitionRegistrar
+
+    if cache_file is None:
+        cache_file = os.getenv("DEFINITION_CACHE_FILE")
+
+    payloads, duplicates = split_duplicate_workflows(payloads)
+
+    workflows = {}
+    for payload in payloads:
+        workflow = json_codec.loads(payload.content)
+        workflows[DefinitionRegistrar.workflow_key(workflow)] = (workflow, payload)
+
+    submitted: list[WorkflowImportResult] = []
+
+    def register(changed_workflows: list[dict[str, Any]]) -> None:
+        changed = [workflows[DefinitionRegistrar.workflow_key(w)][1] for w in changed_workflows]
+        submitted.extend(submit_workflows(changed, True, batch_size, max_concurrency))
+        if not all(result.ok for result in submitted):
+            # Rejected workflows are not cached as registered
+            raise Exception("Import of workflows failed")
+
+    registrar = DefinitionRegistrar(None, cache_file=cache_file, server_url=conductor_url_base)
+    try:
+        registrar.register_workflow_defs(
+            [workflow for workflow, _ in workflows.values()],
+            get_all=get_workflow_defs,
+            register=register,
+        )
+    except Exception:
+        if not submitted:
+            logger.warning("Unable to compare workflows, importing all of them", exc_info=True)
+            return submit_workflows(payloads, True, batch_size, max_concurrency) + duplicates
+
+    sent = {result.source for result in submitted}
+    unchanged = [
+        WorkflowImportResult(source=payload.source, name=payload.name)
+        for payload in payloads
+        if payload.source not in sent
+    ]
+    return submitted + unchanged + duplicates
+
+
+def log_import_results(results: list[WorkflowImportResult]) -> None:
+    for result in results:
+        if not result.ok:
+            logger.warning(
+                "Import of workflow %s (%s) failed. Ignoring the workflow. Response content: %s",
+                result.name,
+                result.source,
+                result.error,
+            )
+    logger.info("Imported %s of %s workflows", sum(result.ok for result in results), len(results))
+
+
+def import_workflows(
+    path: str, batch_size: int = 50, max_concurrency: int = 4
+) -> list[WorkflowImportResult]:
+    """
+    Import workflow definitions from JSON files in path and its subdirectories.
+
+    Files are read and validated concurrently, new and changed workflows are sent in lists of
+    batch_size workflows by up to max_concurrency requests at a time (update_workflows).
+    Returns a result per workflow file.
+    """
+    if not os.path.isdir(path):
         logger.error("Path to workflows %s is not a directory.", path)
+        return []
+
+    logger.info("Importing workflows from folder %s", path)
+    files = find_workflow_files(path)
+    payloads = []
+    results = []
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        futures = [executor.submit(read_workflow_file, file) for file in files]
+        for file, future in zip(files, futures):
+            try:
+                payloads.append(future.result())
+            except Exception as err:
+                results.append(WorkflowImportResult(source=file, error=f"Invalid workflow: {err}"))
+
+    results.extend(update_workflows(payloads, batch_size, max_concurrency))
+    log_import_results(results)
+    return results
@@ -0,0 +1,84 @@
+"""
+JSON encoding and decoding of Conductor, Uniconfig and Inventory traffic.
+
+Payloads are encoded to and decoded from UTF-8 bytes, so response bodies are parsed without
+decoding them to str first. orjson is used when it is installed, the codec can be selected by
+the FRINX_JSON_CODEC environment variable (orjson, json) or by set_codec.
+"""
+import json
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JsonCodec:
+    """Codec of the json standard library, non ASCII characters are encoded as UTF-8."""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf8")
+
+    def loads(self, data: bytes | bytearray | str) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    Codec of orjson, falling back to the json standard library for documents orjson rejects
+    (integers over 64 bits, NaN and Infinity literals).
+    """
+
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)  # type: ignore[no-any-return]
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, data: bytes | bytearray | str) -> Any:
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            return super().loads(data)
+
+
+CODECS = {JsonCodec.name: JsonCodec, OrjsonCodec.name: OrjsonCodec}
+
+
+def create_codec(name: str | None = None) -> JsonCodec:
+    if name is None:
+        name = OrjsonCodec.name if orjson is not None else JsonCodec.name
+    if name not in CODECS:
+        raise ValueError(f"Unknown JSON codec {name}")
+    if name == OrjsonCodec.name and orjson is None:
+        raise ValueError("JSON codec orjson is not installed")
+    return CODECS[name]()
+
+
+codec = create_codec(os.getenv("FRINX_JSON_CODEC"))
+
+
+def set_codec(name: str) -> None:
+    global codec
+    codec = create_codec(name)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode obj to UTF-8 JSON bytes."""
+    return codec.dumps(obj)
+
+
+def dumps_str(obj: Any) -> str:
+    """Encode obj to a JSON string."""
+    return codec.dumps(obj).decode("utf8")
+
+
+def loads(data: bytes | bytearray | str) -> Any:
+    """Decode JSON bytes (or str)."""
+    return codec.loads(data)
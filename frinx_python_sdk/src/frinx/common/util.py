@@ -2,6 +2,7 @@ import json
 from typing import Any
 
 import requests
+from frinx.common import json_codec
 
 
 def jsonify_description(
@@ -25,11 +26,10 @@ def jsonify_description(
 
 
 def parse_response(response: requests.Response) -> tuple[int, str]:
-    decode = response.content.decode("utf8")
     try:
-        response_json = json.loads(decode if decode else "{}")
+        response_json = json_codec.loads(response.content) if response.content else {}
     except ValueError:
-        response_json = json.loads("{}")
+        response_json = {}
 
     response_code = response.status_code
     return response_code, response_json
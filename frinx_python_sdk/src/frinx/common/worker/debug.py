@@ -0,0 +1,10 @@
+"""
+Debug mode of the worker runtime, enabled by the FRINX_DEBUG_MODELS environment variable.
+
+By default workers get polled tasks as a lightweight TaskView and return slotted TaskResult
+objects. In debug mode the polled task is validated by the pydantic Task model and TaskResult
+is the pydantic TaskResultModel, validating every assignment.
+"""
+import os
+
+DEBUG_MODELS = os.getenv("FRINX_DEBUG_MODELS", "false").lower() in ("1", "true")
@@ -2,9 +2,11 @@ from typing import Any
 from typing import TypeAlias
 
 from frinx.common.util import snake_to_camel_case
+from frinx.common.worker.debug import DEBUG_MODELS
 from pydantic import BaseModel
 from pydantic import Extra
 from pydantic import Field
+from pydantic import ValidationError
 
 WorkflowTask: TypeAlias = dict[str, str]
 TaskDef: TypeAlias = dict[str, str]
@@ -61,3 +63,48 @@ class Task(BaseModel):
         alias_generator = snake_to_camel_case
         allow_population_by_field_name = True
         # TODO  add validators
+
+
+class TaskView:
+    """
+    Lightweight view of a polled task with the attributes of Task, read from the raw task dict
+    on first access. Values are validated (coerced) by the Task field and missing ones get the
+    Task default, same as Task(**raw) would do, only for the fields actually read.
+
+    input_data is the raw task input, as in Task; worker_input holds the same input validated
+    by the WorkerInput of the executed worker (with its defaults and coercion applied).
+    The Task model is built only when something besides the task fields is needed (dict(), json()),
+    in debug mode (FRINX_DEBUG_MODELS) it is built and validated right away.
+    """
+
+    __slots__ = ("raw", "worker_input", "_task", "_fields")
+
+    def __init__(self, raw: dict[str, Any], worker_input: Any = None) -> None:
+        self.raw = raw
+        self.worker_input = worker_input
+        self._task: Task | None = Task(**raw) if DEBUG_MODELS else None
+        # Validated values of fields read so far by field name
+        self._fields: dict[str, Any] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        field = Task.__fields__.get(name)
+        if field is None or self._task is not None:
+            return getattr(self.task, name)
+        if name in self._fields:
+            return self._fields[name]
+
+        value = self.raw.get(field.alias)
+        if value is None:
+            value = field.get_default()
+        else:
+            value, error = field.validate(value, {}, loc=field.alias, cls=Task)
+            if error is not None:
+                raise ValidationError([error], Task)
+        self._fields[name] = value
+        return value
+
+    @property
+    def task(self) -> Task:
+        if self._task is None:
+            self._task = Task(**self.raw)
+        return self._task
@@ -2,12 +2,67 @@ from typing import Any
 
 from frinx.common.conductor_enums import TaskResultStatus
 from frinx.common.util import snake_to_camel_case
+from frinx.common.worker.debug import DEBUG_MODELS
 from pydantic import BaseModel
 from pydantic import Field
 from pydantic import validator
 
 
-class TaskResult(BaseModel):
+class TaskResult:
+    """
+    Result of a task execution, a slotted replacement of TaskResultModel with the same API.
+    Status is converted to TaskResultStatus and a str log to a list, no other validation is done.
+    """
+
+    __slots__ = ("_status", "output", "_logs")
+
+    def __init__(
+        self,
+        status: TaskResultStatus | str,
+        output: dict[str, Any] | None = None,
+        logs: list[str] | str | None = None,
+    ) -> None:
+        self.status = status  # type: ignore[assignment]
+        self.output = output if output is not None else {}
+        self.logs = logs if logs is not None else []  # type: ignore[assignment]
+
+    @property
+    def status(self) -> TaskResultStatus:
+        return self._status
+
+    @status.setter
+    def status(self, status: TaskResultStatus | str) -> None:
+        self._status = TaskResultStatus(status)
+
+    @property
+    def logs(self) -> list[str]:
+        return self._logs
+
+    @logs.setter
+    def logs(self, logs: list[str] | str) -> None:
+        self._logs = [logs] if isinstance(logs, str) else logs
+
+    def add_output_data(self, key: str, value: Any) -> None:
+        if self.output is None:
+            self.output = {}
+        self.output[key] = value
+
+    def add_output_data_dict(self, data: dict[str, Any]) -> None:
+        self.output = data
+
+    def dict(self) -> dict[str, Any]:
+        return {"status": self.status, "output": self.output, "logs": self.logs}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (TaskResult, TaskResultModel)):
+            return self.dict() == other.dict()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"TaskResult(status={self.status!r}, output={self.output!r}, logs={self.logs!r})"
+
+
+class TaskResultModel(BaseModel):
     status: TaskResultStatus
     output: dict[str, Any] = Field(default={})
     logs: list[str] | str = Field(default=[])
@@ -32,3 +87,7 @@ class TaskResult(BaseModel):
 
     def add_output_data_dict(self, data: dict[str, Any]) -> None:
         self.output = data
+
+
+if DEBUG_MODELS:
+    TaskResult = TaskResultModel  # type: ignore[misc,assignment]  # noqa: F811
@@ -1,6 +1,8 @@
+import inspect
 from abc import ABC
 from abc import abstractmethod
 from typing import Any
+from typing import ClassVar
 from typing import TypeAlias
 
 from frinx.client.FrinxConductorWrapper import FrinxConductorWrapper
@@ -8,6 +10,7 @@ from frinx.common.conductor_enums import TaskResultStatus
 from frinx.common.util import jsonify_description
 from frinx.common.util import snake_to_camel_case
 from frinx.common.worker.task import Task
+from frinx.common.worker.task import TaskView
 from frinx.common.worker.task_def import BaseTaskdef
 from frinx.common.worker.task_def import DefaultTaskDefinition
 from frinx.common.worker.task_def import TaskDefinition
@@ -21,6 +24,17 @@ RawTaskIO: TypeAlias = dict[str, Any]
 TaskExecLog: TypeAlias = str
 
 
+def _raw_task_result(task_result: TaskResult) -> RawTaskIO:
+    # TaskResultModel.dict() of the debug mode would copy the output
+    return {"status": task_result.status, "output": task_result.output, "logs": task_result.logs}
+
+
+def _failed_result(error: Exception) -> RawTaskIO:
+    return _raw_task_result(
+        TaskResult(status=TaskResultStatus.FAILED, logs=[TaskExecLog(str(error))])
+    )
+
+
 class Config:
     arbitrary_types_allowed = True
     alias_generator = snake_to_camel_case
@@ -31,6 +45,13 @@ class Config:
 class WorkerImpl(ABC):
     task_def: TaskDefinition = None
     task_def_template: type[BaseTaskdef] | type[DefaultTaskDefinition] = None
+    # CPU bound workers are executed in a process pool instead of consumer threads
+    cpu_bound: ClassVar[bool] = False
+    # Outputs over the threshold (bytes) are uploaded to external payload storage, even if
+    # the conductor client has no threshold set (external_output_threshold)
+    external_output_threshold: ClassVar[int | None] = None
+    # Task definitions built by task_definition_builder by worker class and template
+    _task_definitions: ClassVar[dict[tuple[type, Any], TaskDefinition]] = {}
 
     class WorkerDefinition(TaskDefinition):
         ...
@@ -44,7 +65,12 @@ class WorkerImpl(ABC):
     def __init__(
         self, task_def_template: type[BaseTaskdef] | type[DefaultTaskDefinition] = None
     ) -> None:
-        self.task_def = self.task_definition_builder(task_def_template)
+        key = (type(self), task_def_template)
+        task_def = WorkerImpl._task_definitions.get(key)
+        if task_def is None:
+            task_def = self.task_definition_builder(task_def_template)
+            WorkerImpl._task_definitions[key] = task_def
+        self.task_def = task_def.copy()
 
     @classmethod
     def task_definition_builder(
@@ -85,30 +111,59 @@ class WorkerImpl(ABC):
         return task_def
 
     def register(self, conductor_client: FrinxConductorWrapper) -> None:
+        exec_function = self._execute_wrapper
+        if inspect.iscoroutinefunction(self.execute):
+            exec_function = self._execute_wrapper_async
+
+        options = {}
+        if self.external_output_threshold is not None:
+            options["output_threshold"] = self.external_output_threshold
+
         conductor_client.register(
             task_type=self.task_def.name,
             task_definition=self.task_def.dict(by_alias=True, exclude_none=True),
-            exec_function=self._execute_wrapper,
+            exec_function=exec_function,
+            cpu_bound=self.cpu_bound,
+            **options,
         )
 
     @abstractmethod
     def execute(self, task: Task) -> TaskResult:
+        """Execute the task, may be also defined as a coroutine (async def execute)."""
         pass
 
     @classmethod
     def _execute_wrapper(cls, task: RawTaskIO) -> Any:
         try:
-            cls.WorkerInput.parse_obj(task["inputData"])
+            task_view = cls._task_view(task)
+        except ValidationError as error:
+            return _failed_result(error)
+
+        try:
+            task_result = cls.execute(cls, task_view)  # type: ignore[arg-type]
+            return _raw_task_result(task_result)
+
+        except Exception as error:
+            return _failed_result(error)
+
+    @classmethod
+    async def _execute_wrapper_async(cls, task: RawTaskIO) -> Any:
+        try:
+            task_view = cls._task_view(task)
         except ValidationError as error:
-            return TaskResult(status=TaskResultStatus.FAILED, logs=[TaskExecLog(str(error))]).dict()
+            return _failed_result(error)
 
         try:
-            # TODO check if ok
-            task_result = cls.execute(cls, Task(**task)).dict()  # type: ignore[arg-type]
-            return task_result
+            task_result = await cls.execute(cls, task_view)  # type: ignore[arg-type]
+            return _raw_task_result(task_result)
 
         except Exception as error:
-            return TaskResult(status=TaskResultStatus.FAILED, logs=[TaskExecLog(str(error))]).dict()
+            return _failed_result(error)
+
+    @classmethod
+    def _task_view(cls, task: RawTaskIO) -> TaskView:
+        # Input is validated once, execute gets it parsed as task.worker_input
+        return TaskView(task, cls.WorkerInput.parse_obj(task["inputData"]))
 
     @classmethod
     def validate(cls) -> None:
@@ -1,5 +1,10 @@
 import logging
 
+from frinx.common.import_workflows import WorkflowImportResult
+from frinx.common.import_workflows import WorkflowPayload
+from frinx.common.import_workflows import log_import_results
+from frinx.common.import_workflows import submit_workflows
+from frinx.common.import_workflows import update_workflows
 from frinx.common.workflow.workflow import WorkflowImpl
 
 logger = logging.getLogger(__name__)
@@ -19,17 +24,34 @@ class ServiceWorkflowsImpl:
             workflows = []
         self.service_workflows = self._inner_class_list(workflows, exclude)
 
-    def register(self, overwrite: bool = False) -> None:
+    def register(
+        self, overwrite: bool = False, batch_size: int = 50, max_concurrency: int = 4
+    ) -> list[WorkflowImportResult]:
         """
         Register workflows to conductor.
 
+        Workflows are built and sent together, with overwrite in lists of batch_size workflows,
+        by up to max_concurrency requests at a time. With overwrite, only new and changed
+        workflows are sent (update_workflows).
+
         Args:
             overwrite: Overwrite all workflow if exists.
+            batch_size: Number of workflows sent by one request.
+            max_concurrency: Number of concurrent requests.
+
+        Returns:
+            Result of registration of every workflow.
         """
-        for task in self.service_workflows:
-            # TODO check if need to run constructor
-            # task().register(overwrite)
-            task.register(overwrite)
+        if overwrite:
+            results = update_workflows(self.payloads(), batch_size, max_concurrency)
+        else:
+            results = submit_workflows(self.payloads(), overwrite, batch_size, max_concurrency)
+        log_import_results(results)
+        return results
+
+    def payloads(self) -> list[WorkflowPayload]:
+        """Serialized definitions of service workflows."""
+        return [workflow_class.payload() for workflow_class in self.service_workflows]
 
     @classmethod
     def _inner_class_list(
@@ -8,6 +8,7 @@ from typing import List
 from typing import Optional
 
 from frinx.common.conductor_enums import TimeoutPolicy
+from frinx.common.import_workflows import WorkflowPayload
 from frinx.common.import_workflows import register_workflow
 from frinx.common.util import jsonify_description
 from frinx.common.util import snake_to_camel_case
@@ -142,6 +143,16 @@ class WorkflowImpl(BaseModel, ABC):
     def register(cls, overwrite: bool = False) -> None:
         register_workflow(cls().json(by_alias=True, exclude_none=True), overwrite)
 
+    @classmethod
+    def payload(cls) -> WorkflowPayload:
+        """Serialized workflow definition, e.g. for update_workflows."""
+        workflow = cls()
+        return WorkflowPayload(
+            source=cls.__qualname__,
+            name=workflow.name,
+            content=workflow.json(by_alias=True, exclude_none=True).encode("utf8"),
+        )
+
     @abstractmethod
     def workflow_builder(self, workflow_inputs: WorkflowInput) -> None:
         pass
@@ -32,17 +32,20 @@ def register_tasks(conductor_client):
 
 def register_workflows():
     logging.info("Register workflows")
+    from frinx.common.import_workflows import log_import_results
+    from frinx.common.import_workflows import update_workflows
     from frinx.workflows.inventory.inventory_workflows import InventoryWorkflows
     from frinx.workflows.misc.test import TestForkWorkflow
     from frinx.workflows.misc.test import TestWorkflow
     from frinx.workflows.monitoring.influxdb import InfluxWF
     from frinx.workflows.uniconfig.transactions import UniconfigTransactions
 
-    TestWorkflow().register(overwrite=True)
-    TestForkWorkflow().register(overwrite=True)
-    UniconfigTransactions().register(overwrite=True)
-    InfluxWF().register(overwrite=True)
-    InventoryWorkflows().register(overwrite=True)
+    # Workflows are compared with Conductor at once, only new and changed ones are sent
+    payloads = [TestWorkflow.payload(), TestForkWorkflow.payload()]
+    payloads += UniconfigTransactions().payloads()
+    payloads += InfluxWF().payloads()
+    payloads += InventoryWorkflows().payloads()
+    log_import_results(update_workflows(payloads))
 
 
 def main():
@@ -56,14 +59,39 @@ def main():
     from frinx.common.frinx_rest import conductor_headers
     from frinx.common.frinx_rest import conductor_url_base
 
-    conductor_client = FrinxConductorWrapper(
-        server_url=conductor_url_base,
-        polling_interval=0.1,
-        max_thread_count=10,
-        headers=conductor_headers,
-    )
+    # Task outputs over the threshold (bytes) are uploaded to external payload storage
+    external_output_threshold = os.environ.get("EXTERNAL_OUTPUT_THRESHOLD")
+
+    def create_conductor_client(**kwargs):
+        return FrinxConductorWrapper(
+            server_url=conductor_url_base,
+            polling_interval=0.1,
+            max_thread_count=10,
+            headers=conductor_headers,
+            definition_cache_file=os.environ.get("DEFINITION_CACHE_FILE"),
+            external_output_threshold=(
+                int(external_output_threshold) if external_output_threshold else None
+            ),
+            **kwargs,
+        )
+
+    process_count = int(os.environ.get("WORKER_PROCESS_COUNT", "1"))
+    if process_count > 1:
+        from frinx.client.WorkerSupervisor import WorkerSupervisor
+
+        WorkerSupervisor(
+            conductor_factory=create_conductor_client,
+            register_tasks=register_tasks,
+            register_workflows=register_workflows,
+            process_count=process_count,
+        ).run()
+        return
+
+    conductor_client = create_conductor_client()
 
     register_tasks(conductor_client)
+    # Workflows referencing SIMPLE tasks are rejected until their task definitions exist
+    conductor_client.register_task_definitions()
     register_workflows()
     conductor_client.start_workers()
 
@@ -1,12 +1,12 @@
 from __future__ import print_function
 
-import json
 from typing import Any
 from typing import Optional
 
 import requests
 import requests.auth
 import requests.utils
+from frinx.common import json_codec
 from frinx.common.worker.task_result import TaskResult
 from frinx.common.worker.task_result import TaskResultStatus
 from pydantic import BaseModel
@@ -24,7 +24,7 @@ class HttpOutput(BaseModel):
 
 def http_task(http_request: dict[str, Any] | str) -> TaskResult:
     if isinstance(http_request, str):
-        http_request = json.loads(json.dumps(http_request))
+        http_request = json_codec.loads(http_request)
 
     uri = http_request["uri"]
     if uri is None:
@@ -50,7 +50,7 @@ def http_task(http_request: dict[str, Any] | str) -> TaskResult:
     headers.update(additional_headers)
 
     body = http_request.get("body", {})
-    body = body if isinstance(body, str) else json.dumps(body if body else {})
+    body = body if isinstance(body, str) else json_codec.dumps(body if body else {})
 
     timeout = http_request["timeout"] if "timeout" in http_request else 60.0
     verify_cert = http_request["verifyCertificate"] if "verifyCertificate" in http_request else True
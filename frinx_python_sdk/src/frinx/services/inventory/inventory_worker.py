@@ -1,4 +1,3 @@
-import copy
 import json
 from math import ceil
 
@@ -260,18 +259,13 @@ def page_device_dynamic_fork_tasks(
         task_reference_name_id = 0
 
         for device_id in page_ids:
-            task_body = copy.deepcopy(templates.TASK_BODY_TEMPLATE)
-            task_body["taskReferenceName"] = "devices_page_" + str(task_reference_name_id)
-            task_body["subWorkflowParam"]["name"] = task
-            dynamic_tasks.append(task_body)
-
-            per_device_params = dict({})
-            per_device_params.update({"page_id": device_id})
-            per_device_params.update({"page_size": device_step})
-            per_device_params.update({"labels": labels_list})
-            dynamic_tasks_i.update(
-                {"devices_page_" + str(task_reference_name_id): per_device_params}
-            )
+            task_reference_name = "devices_page_" + str(task_reference_name_id)
+            dynamic_tasks.append(templates.task_body_template(task_reference_name, task))
+            dynamic_tasks_i[task_reference_name] = {
+                "page_id": device_id,
+                "page_size": device_step,
+                "labels": labels_list,
+            }
             task_reference_name_id += 1
 
         return inventory_utils.InventoryOutput(
@@ -317,16 +311,12 @@ def all_devices_fork_tasks(
         for device in ids:
             device_id = device["node"]["name"]
 
-            task_body = copy.deepcopy(templates.TASK_BODY_TEMPLATE)
+            task_body = templates.task_body_template(device_id, task)
             if optional == "true":
                 task_body["optional"] = True
-            task_body["taskReferenceName"] = device_id
-            task_body["subWorkflowParam"]["name"] = task
             dynamic_tasks.append(task_body)
 
-            per_device_params = dict(task_params)
-            per_device_params.update({"device_id": device_id})
-            dynamic_tasks_i.update({device_id: per_device_params})
+            dynamic_tasks_i[device_id] = {**task_params, "device_id": device_id}
 
         return inventory_utils.InventoryOutput(
             data={"dynamic_tasks_i": dynamic_tasks_i, "dynamic_tasks": dynamic_tasks},
@@ -127,6 +127,17 @@ TASK_BODY_TEMPLATE = {
     "subWorkflowParam": {"name": "", "version": 1},
 }
 
+
+def task_body_template(task_reference_name: str, sub_workflow_name: str) -> dict[str, Any]:
+    """Returns a new dynamic fork task body running sub_workflow_name."""
+    return {
+        "name": "sub_task",
+        "taskReferenceName": task_reference_name,
+        "type": "SUB_WORKFLOW",
+        "subWorkflowParam": {"name": sub_workflow_name, "version": 1},
+    }
+
+
 LABEL_IDS_TEMPLATE = """
 query {
   labels {
@@ -176,6 +187,24 @@ query GetDevices($labels: [String!], $first: Int!, $after: String!) {
   }
 } """
 
+DEVICE_ZONE_PAGE_TEMPLATE = """
+query DeviceZones($first: Int!, $after: String!) {
+  devices(first: $first, after: $after) {
+    pageInfo {
+      endCursor
+      hasNextPage
+    }
+    edges {
+      node {
+        name
+        zone {
+          name
+        }
+      }
+    }
+  }
+} """
+
 DEVICE_INFO_TEMPLATE = """
 query Devices(
   $labels: [String!]
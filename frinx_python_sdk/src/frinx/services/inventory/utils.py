@@ -1,9 +1,9 @@
 import copy
 import dataclasses
-import json
 from enum import Enum
 from typing import Any
 
+from frinx.common import json_codec
 from frinx.common.frinx_rest import inventory_url_base
 from frinx.common.frinx_rest import x_tenant_id
 from frinx.services.inventory import templates
@@ -65,9 +65,9 @@ def execute_inventory(body: str, variables: Any) -> InventoryOutput:
         case None:
             pass
         case dict():
-            variables = json.dumps(variables)
+            variables = json_codec.dumps_str(variables)
         case _:
-            variables = json.loads(str(variables))
+            variables = json_codec.loads(str(variables))
 
     response = client.execute(query=body, variables=variables)
 
@@ -92,6 +92,36 @@ def get_zone_id(zone_name: str) -> str | None:
     return None
 
 
+def get_device_zones(page_size: int = 1000) -> dict[str, str]:
+    """Zone names of all devices in inventory, device name -> zone name."""
+    device_zones = {}
+    after = ""
+    while True:
+        variables = {"first": page_size, "after": after}
+        body = execute_inventory(templates.DEVICE_ZONE_PAGE_TEMPLATE, variables)
+        if body.code != 200:
+            raise Exception(body.data)
+
+        devices = body.data["devices"]
+        for edge in devices["edges"]:
+            device_zones[edge["node"]["name"]] = edge["node"]["zone"]["name"]
+        if not devices["pageInfo"]["hasNextPage"]:
+            return device_zones
+        after = devices["pageInfo"]["endCursor"]
+
+
+def get_device_zone(device_name: str) -> str | None:
+    """Zone name of the device, None if the device is not in inventory."""
+    body = execute_inventory(templates.DEVICE_INFO_TEMPLATE, {"deviceName": device_name})
+    if body.code != 200:
+        raise Exception(body.data)
+
+    for edge in body.data["devices"]["edges"]:
+        if edge["node"]["name"] == device_name:
+            return edge["node"]["zone"]["name"]
+    return None
+
+
 def get_all_devices(labels: str) -> dict:
     device_id_name = copy.deepcopy(templates.DEVICE_BY_LABEL_TEMPLATE)
 
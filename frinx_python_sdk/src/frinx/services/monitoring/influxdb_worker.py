@@ -25,12 +25,10 @@ def influx_query_data(
     response = InfluxOutput(code=404, data={}, logs=None)
 
     with InfluxDbWrapper(token=token, org=org).client() as client:
-        output = (
-            client.query_api().query(json.loads(json.dumps(query))).to_values(columns=format_data)
-        )
+        output = client.query_api().query(query).to_values(columns=format_data)
 
         client.close()
-        response.data["output"] = json.loads(json.dumps(output))
+        response.data["output"] = output
         response.code = 200
 
     return response
@@ -0,0 +1,351 @@
+"""
+Async variant of uniconfig_worker on a shared aiohttp session (async_utils.uniconfig_client).
+
+Functions take the same inputs and return the same UniconfigOutput as their uniconfig_worker
+counterparts, so async workers can drive many devices concurrently, e.g. by asyncio.gather.
+Every function optionally takes an aiohttp session to be used instead of the shared one.
+Requests to multiple Uniconfig clusters (commit, transactions) are sent concurrently.
+
+Devices are routed to their Uniconfig clusters in the default executor, the routing index may
+read zones of devices from Inventory and must not block the event loop.
+"""
+import asyncio
+from typing import Any
+
+import aiohttp
+import requests
+from frinx.common import json_codec
+from frinx.services.uniconfig import async_utils
+from frinx.services.uniconfig import routing
+from frinx.services.uniconfig import templates
+from frinx.services.uniconfig import utils as uniconfig_utils
+from frinx.services.uniconfig.models import UniconfigContext
+from frinx.services.uniconfig.models import UniconfigCookies
+from frinx.services.uniconfig.models import UniconfigCookiesMultizone
+from frinx.services.uniconfig.models import UniconfigOutput
+from frinx.services.uniconfig.models import UniconfigTransactionList
+from frinx.services.uniconfig.uniconfig_worker import parse_transaction_list
+from frinx.services.uniconfig.uniconfig_worker import parse_uniconfig_context
+from frinx.services.uniconfig.uniconfig_worker import structured_data_url
+from frinx.services.uniconfig.uniconfig_worker import write_structured_data_request
+from frinx.services.uniconfig.utils import DeviceWithCluster
+
+
+async def get_uniconfig_cluster(device_id: str) -> str:
+    """Async uniconfig_utils.get_uniconfig_cluster_from_task."""
+    if routing.device_zone_index is None:
+        return uniconfig_utils.get_uniconfig_cluster_from_task(device_id)
+    return await asyncio.get_running_loop().run_in_executor(
+        None, uniconfig_utils.get_uniconfig_cluster_from_task, device_id
+    )
+
+
+async def get_devices_by_uniconfig(devices: list[str]) -> list[DeviceWithCluster]:
+    """Async uniconfig_utils.get_devices_by_uniconfig."""
+    if routing.device_zone_index is None:
+        return uniconfig_utils.get_devices_by_uniconfig(devices)
+    return await asyncio.get_running_loop().run_in_executor(
+        None, uniconfig_utils.get_devices_by_uniconfig, devices
+    )
+
+
+def extract_uniconfig_cookies(uniconfig_context, uc_cluster: str) -> UniconfigCookies:
+    """Cookies of the transaction in uc_cluster, see uniconfig_utils.extract_uniconfig_cookies."""
+    uniconfig_cookies_multizone = uniconfig_utils.extract_uniconfig_cookies_multizone(
+        uniconfig_context
+    )
+    return uniconfig_cookies_multizone.get(uc_cluster, {}) or {}
+
+
+async def read_structured_data(
+    device_id: str,
+    uri: str,
+    uniconfig_context: UniconfigContext,
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigOutput:
+    """Async uniconfig_worker.read_structured_data."""
+    uc_cluster = await get_uniconfig_cluster(device_id)
+    return await read_structured_data_from_cluster(
+        device_id, uri, parse_uniconfig_context(uniconfig_context), uc_cluster, session
+    )
+
+
+async def read_structured_data_from_cluster(
+    device_id: str,
+    uri: str,
+    uniconfig_context: UniconfigContext,
+    uc_cluster: str,
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigOutput:
+    """read_structured_data of a device already routed to uc_cluster."""
+    id_url = structured_data_url(device_id, uri, uc_cluster)
+    uniconfig_cookies = extract_uniconfig_cookies(uniconfig_context, uc_cluster)
+
+    response = await async_utils.request("GET", id_url, cookies=uniconfig_cookies, session=session)
+    return UniconfigOutput(code=response.code, data=response.data, url=id_url)
+
+
+async def write_structured_data(
+    device_id: str,
+    uri: str,
+    template: str | dict,
+    params,
+    uniconfig_context: UniconfigContext,
+    method="PUT",
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigOutput:
+    """Async uniconfig_worker.write_structured_data."""
+    try:
+        uc_cluster = await get_uniconfig_cluster(device_id)
+        id_url, data_json = write_structured_data_request(
+            device_id, uri, template, params, uc_cluster
+        )
+        uniconfig_context = parse_uniconfig_context(uniconfig_context)
+        uniconfig_cookies = extract_uniconfig_cookies(uniconfig_context, uc_cluster)
+        response = await async_utils.request(
+            method, id_url, data=data_json, cookies=uniconfig_cookies, session=session
+        )
+        return UniconfigOutput(code=response.code, data=response.data, url=id_url)
+    except Exception as error:
+        return UniconfigOutput(
+            data={"error": error}, logs=f"Unable to update device with ID {device_id}", code=500
+        )
+
+
+async def delete_structured_data(
+    device_id: str,
+    uri: str,
+    uniconfig_context: UniconfigContext,
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigOutput:
+    """Async uniconfig_worker.delete_structured_data."""
+    try:
+        uc_cluster = await get_uniconfig_cluster(device_id)
+        id_url = structured_data_url(device_id, uri, uc_cluster)
+        uniconfig_cookies = extract_uniconfig_cookies(uniconfig_context, uc_cluster)
+        response = await async_utils.request(
+            "DELETE", id_url, cookies=uniconfig_cookies, session=session
+        )
+        return UniconfigOutput(code=response.code, data=response.data, url=id_url)
+    except Exception as error:
+        return UniconfigOutput(
+            data={"error": error}, logs=f"Unable to update device with ID {device_id}", code=500
+        )
+
+
+async def commit(
+    devices: list[object],
+    uniconfig_context: UniconfigContext,
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigOutput:
+    """Async uniconfig_worker.commit."""
+    if isinstance(uniconfig_context, str):
+        uniconfig_context = json_codec.loads(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies_multizone(uniconfig_context)
+    devices = uniconfig_utils.parse_devices(devices)
+    devices_by_uniconfig = await get_devices_by_uniconfig(devices)
+
+    return await async_utils.request_uniconfig(
+        devices_by_uniconfig, templates.uniconfig_url_uniconfig_commit, uniconfig_cookies, session
+    )
+
+
+async def dryrun_commit(
+    devices: list[object],
+    uniconfig_context: UniconfigContext,
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigOutput:
+    """Async uniconfig_worker.dryrun_commit."""
+    if isinstance(uniconfig_context, str):
+        uniconfig_context = json_codec.loads(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies_multizone(uniconfig_context)
+    devices = uniconfig_utils.parse_devices(devices)
+    devices_by_uniconfig = await get_devices_by_uniconfig(devices)
+
+    return await async_utils.request_uniconfig(
+        devices_by_uniconfig,
+        templates.uniconfig_url_uniconfig_dryrun_commit,
+        uniconfig_cookies,
+        session,
+    )
+
+
+async def calc_diff(
+    devices: list,
+    uniconfig_context: UniconfigTransactionList,
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigOutput:
+    """Async uniconfig_worker.calc_diff."""
+    return await _request_transaction_list(
+        devices, uniconfig_context, templates.uniconfig_url_uniconfig_calculate_diff, session
+    )
+
+
+async def sync_from_network(
+    devices: list[object],
+    uniconfig_context: UniconfigTransactionList,
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigOutput:
+    """Async uniconfig_worker.sync_from_network."""
+    return await _request_transaction_list(
+        devices, uniconfig_context, templates.uniconfig_url_uniconfig_sync_from_network, session
+    )
+
+
+async def replace_config_with_oper(
+    devices: list[object],
+    uniconfig_context: UniconfigTransactionList,
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigOutput:
+    """Async uniconfig_worker.replace_config_with_oper."""
+    return await _request_transaction_list(
+        devices,
+        uniconfig_context,
+        templates.uniconfig_url_uniconfig_replace_config_with_operational,
+        session,
+    )
+
+
+async def _request_transaction_list(devices, uniconfig_context, url, session):
+    uniconfig_context = parse_transaction_list(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies_multizone(uniconfig_context)
+    devices = uniconfig_utils.parse_devices(devices)
+    devices_by_uniconfig = await get_devices_by_uniconfig(devices)
+
+    return await async_utils.request_uniconfig(
+        devices_by_uniconfig, url, uniconfig_cookies, session
+    )
+
+
+async def create_tx_multizone(
+    devices: list[str], oam_domain=None, session: aiohttp.ClientSession | None = None
+) -> UniconfigOutput:
+    """
+    Async uniconfig_worker.create_tx_multizone, transactions of all Uniconfig clusters are
+    created concurrently. If any of them fails, the created ones are closed.
+    """
+    devices = uniconfig_utils.parse_devices(devices, fail_on_empty=False)
+    devices_by_uniconfig = await get_devices_by_uniconfig(devices)
+
+    responses = await asyncio.gather(
+        *[
+            async_utils.create_tx_internal(device.uc_cluster, session=session)
+            for device in devices_by_uniconfig
+        ]
+    )
+
+    uniconfig_cookies_multizone = {}
+    failed = None
+    for device, response in zip(devices_by_uniconfig, responses):
+        if response.code == requests.codes.created:
+            uniconfig_cookies_multizone[device.uc_cluster] = response.data["uniconfig_cookies"]
+        elif failed is None:
+            failed = (device, response)
+
+    if failed is not None:
+        device, response = failed
+        await async_utils.close_tx_multizone_internal(uniconfig_cookies_multizone, session)
+        return UniconfigOutput(
+            code=response.code,
+            data={"failed_zone": device.uc_cluster, "response": response.data},
+            logs=[
+                f'Unable to create multizone transactions. Failed for: "{device.uc_cluster}".Close sent to already opened transactions: "{uniconfig_cookies_multizone}"'
+            ],
+        )
+
+    return UniconfigOutput(
+        code=responses[-1].code if responses else 500,
+        data={"uniconfig_cookies_multizone": uniconfig_cookies_multizone},
+        logs=[
+            f'Transactions created successfully for: "{devices_by_uniconfig}" with context: "{uniconfig_cookies_multizone}"'
+        ],
+    )
+
+
+async def close_tx_multizone(
+    uniconfig_context: UniconfigCookiesMultizone, session: aiohttp.ClientSession | None = None
+) -> UniconfigOutput:
+    """Async uniconfig_worker.close_tx_multizone."""
+    uniconfig_cookies_multizone = uniconfig_utils.extract_uniconfig_cookies_multizone(
+        uniconfig_context
+    )
+    response = await async_utils.close_tx_multizone_internal(uniconfig_cookies_multizone, session)
+    return UniconfigOutput(code=response.code, data={"UNICONFIGTXID_multizone": response.data})
+
+
+async def read_structured_data_bulk(
+    reads: list[tuple[str, str]],
+    uniconfig_context: UniconfigContext | None = None,
+    max_concurrency: int = 10,
+    timeout: float = 60,
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigOutput:
+    """
+    Read structured data of many (device_id, uri) pairs, at most max_concurrency of them at
+    once. Each response is folded into the output as soon as it arrives:
+
+    {
+        "results": {"<device_id>": {"<uri>": <response body>}},
+        "errors": {"<device_id>": {"<uri>": {"response_code": 404, "response_body": ...}}},
+        "summary": {"reads": 3, "completed": 2, "failed": 1}
+    }
+
+    Reads not finished within timeout seconds are cancelled and reported in errors. The output
+    fails (code 500) only if there were reads and none of them succeeded.
+    """
+    reads = list(dict.fromkeys((device_id, uri) for device_id, uri in reads))
+    uniconfig_context = parse_uniconfig_context(uniconfig_context)
+    results: dict[str, dict[str, Any]] = {}
+    errors: dict[str, dict[str, Any]] = {}
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    # Clusters of all devices are resolved at once, reads do not route devices by themselves
+    devices_by_uniconfig = await get_devices_by_uniconfig(
+        list(dict.fromkeys(device for device, _ in reads))
+    )
+    clusters = {
+        device: devices.uc_cluster
+        for devices in devices_by_uniconfig
+        for device in devices.device_names
+    }
+
+    async def read(device_id: str, uri: str) -> None:
+        async with semaphore:
+            try:
+                response = await read_structured_data_from_cluster(
+                    device_id, uri, uniconfig_context, clusters[device_id], session
+                )
+            except Exception as error:
+                errors.setdefault(device_id, {})[uri] = {"error": str(error)}
+                return
+        if requests.codes.ok <= response.code < requests.codes.multiple_choices:
+            results.setdefault(device_id, {})[uri] = response.data
+        else:
+            errors.setdefault(device_id, {})[uri] = {
+                "response_code": response.code,
+                "response_body": response.data,
+            }
+
+    pending = set()
+    if reads:
+        tasks = [asyncio.ensure_future(read(device_id, uri)) for device_id, uri in reads]
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task, (device_id, uri) in zip(tasks, reads):
+            if task in pending:
+                errors.setdefault(device_id, {})[uri] = {
+                    "error": f"Deadline of {timeout} seconds exceeded"
+                }
+
+    failed = sum(len(device_errors) for device_errors in errors.values())
+    return UniconfigOutput(
+        code=500 if reads and failed == len(reads) else requests.codes.ok,
+        data={
+            "results": results,
+            "errors": errors,
+            "summary": {"reads": len(reads), "completed": len(reads) - failed, "failed": failed},
+        },
+        logs=[f"Read {len(reads) - failed} of {len(reads)}, {len(pending)} timed out"],
+    )
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import os
+import weakref
+from string import Template
+from typing import Any
+
+import aiohttp
+import requests
+from frinx.common import json_codec
+from frinx.common.event_loop import event_loop_thread
+from frinx.common.frinx_rest import additional_uniconfig_request_params
+from frinx.common.frinx_rest import uniconfig_headers
+from frinx.services.uniconfig.models import ClusterWithDevices
+from frinx.services.uniconfig.models import TransactionMeta
+from frinx.services.uniconfig.models import UniconfigCookies
+from frinx.services.uniconfig.models import UniconfigCookiesMultizone
+from frinx.services.uniconfig.models import UniconfigOutput
+from frinx.services.uniconfig.models import UniconfigRpcResponse
+from frinx.services.uniconfig.templates import UNICONFIGTXID
+from frinx.services.uniconfig.templates import uniconfig_url_uniconfig_tx_close
+from frinx.services.uniconfig.templates import uniconfig_url_uniconfig_tx_create
+from frinx.services.uniconfig.utils import create_commit_request
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncUniconfigClient:
+    """
+    Shared aiohttp session of Uniconfig, one per event loop, keeping up to pool_size
+    connections (per Uniconfig cluster up to pool_size_per_host) alive.
+
+    Transaction cookies (UNICONFIGTXID, uniconfig_server_id) are sent with every request they
+    belong to and are never stored in the shared session (DummyCookieJar).
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 100,
+        pool_size_per_host: int = 0,
+        timeout: float = 60,
+        verify: bool = additional_uniconfig_request_params["verify"],
+    ) -> None:
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.timeout = timeout
+        self.verify = verify
+        self.sessions: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def session(self) -> aiohttp.ClientSession:
+        """Session of the running event loop."""
+        loop = asyncio.get_running_loop()
+        session = self.sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                ssl=None if self.verify else False,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                cookie_jar=aiohttp.DummyCookieJar(),
+                headers=uniconfig_headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self.sessions[loop] = session
+        return session
+
+    async def close(self) -> None:
+        """Close session of the running event loop."""
+        session = self.sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+uniconfig_client = AsyncUniconfigClient(timeout=float(os.getenv("UNICONFIG_REQUEST_TIMEOUT", "60")))
+# Synchronous workers run coroutines of this module on the shared loop, see uniconfig_worker
+event_loop_thread.on_close.append(uniconfig_client.close)
+
+
+async def request(
+    method: str,
+    url: str,
+    cookies: dict[str, Any] | None = None,
+    data: Any = None,
+    timeout: float | None = None,
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigRpcResponse:
+    """Request of Uniconfig, timeout defaults to the one of the session."""
+    session = session or uniconfig_client.session()
+    logger.debug("Uniconfig request %s %s", method, url)
+    async with session.request(
+        method,
+        url,
+        cookies=cookies or None,
+        data=data,
+        timeout=aiohttp.ClientTimeout(total=timeout) if timeout is not None else session.timeout,
+    ) as response:
+        content = await response.read()
+        try:
+            response_json = json_codec.loads(content) if content else {}
+        except ValueError:
+            response_json = {}
+
+        return UniconfigRpcResponse(
+            code=response.status, data=response_json, cookies=parse_response_cookies(response)
+        )
+
+
+def parse_response_cookies(response: aiohttp.ClientResponse) -> TransactionMeta:
+    tx_id = response.cookies.get(UNICONFIGTXID)
+    server_id = response.cookies.get("uniconfig_server_id")
+    return TransactionMeta(
+        uniconfig_server_id=server_id.value if server_id is not None else None,
+        UNICONFIGTXID=tx_id.value if tx_id is not None else None,
+    )
+
+
+async def request_uniconfig(
+    devices: list[ClusterWithDevices],
+    url: Template,
+    uniconfig_cookies_multizone: UniconfigCookies | UniconfigCookiesMultizone,
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigOutput:
+    """Send the RPC at url to all Uniconfig clusters of devices concurrently."""
+
+    async def request_cluster(device: ClusterWithDevices) -> tuple[str, UniconfigRpcResponse]:
+        cluster_url = url.substitute({"base_url": device.uc_cluster})
+        uniconfig_cookies = uniconfig_cookies_multizone.get(device.uc_cluster, {})
+        data = json_codec.dumps(create_commit_request(device.device_names))
+        response = await request(
+            "POST", cluster_url, data=data, cookies=uniconfig_cookies, session=session
+        )
+        return cluster_url, response
+
+    results = await asyncio.gather(*[request_cluster(device) for device in devices])
+
+    responses = []
+    for device, (cluster_url, response) in zip(devices, results):
+        match response.code:
+            case requests.codes.ok:
+                if response.data["output"]["overall-status"] == "complete":
+                    uniconfig_cookies = uniconfig_cookies_multizone.get(device.uc_cluster, {})
+                    responses.append(
+                        {
+                            "url": cluster_url,
+                            "UNICONFIGTXID": uniconfig_cookies.get(UNICONFIGTXID, ""),
+                            "response_code": response.code,
+                            "response_body": response.data,
+                        }
+                    )
+            case _:
+                return UniconfigOutput(code=response.code, data=response.data, url=cluster_url)
+
+    return UniconfigOutput(code=requests.codes.ok, data={"responses": responses})
+
+
+async def create_tx_internal(
+    uniconfig_cluster: str, session: aiohttp.ClientSession | None = None
+) -> UniconfigOutput:
+    id_url = uniconfig_url_uniconfig_tx_create.substitute({"base_url": uniconfig_cluster})
+
+    response = await request("POST", id_url, session=session)
+    match response.code:
+        case requests.codes.created:
+            return UniconfigOutput(
+                code=response.code,
+                data=UniconfigCookies(uniconfig_cookies=response.cookies).dict(
+                    by_alias=True, exclude_none=True
+                ),
+            )
+
+    return UniconfigOutput(code=response.code, data=response.data)
+
+
+async def close_tx_internal(
+    uniconfig_cookies: TransactionMeta,
+    uniconfig_cluster: str,
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigOutput:
+    tx_id = uniconfig_cookies.transaction_id
+
+    id_url = uniconfig_url_uniconfig_tx_close.substitute({"base_url": uniconfig_cluster})
+    cookies = uniconfig_cookies.dict(by_alias=True, exclude_none=True)
+    response = await request("POST", id_url, cookies=cookies, session=session)
+    match response.code:
+        case requests.codes.ok:
+            return UniconfigOutput(code=response.code, data={"UNICONFIGTXID": tx_id})
+
+    return UniconfigOutput(
+        code=response.code,
+        data={
+            "UNICONFIGTXID": tx_id,
+            "response_body": response.data,
+            "response_code": response.code,
+        },
+    )
+
+
+async def close_tx_multizone_internal(
+    uniconfig_cookies_multizone: UniconfigCookiesMultizone,
+    session: aiohttp.ClientSession | None = None,
+) -> UniconfigOutput:
+    """Close transactions of all Uniconfig clusters concurrently."""
+    clusters = list(uniconfig_cookies_multizone)
+    cookies = [
+        TransactionMeta(**dict(uniconfig_cookies_multizone.get(uc_cluster)))
+        for uc_cluster in clusters
+    ]
+    responses = await asyncio.gather(
+        *[
+            close_tx_internal(uniconfig_cookies, uc_cluster, session=session)
+            for uniconfig_cookies, uc_cluster in zip(cookies, clusters)
+        ]
+    )
+
+    close_tx_response = {}
+    response_code = 200
+    for uc_cluster, uniconfig_cookies, response in zip(clusters, cookies, responses):
+        close_tx_response[uc_cluster] = {
+            "UNICONFIGTXID": uniconfig_cookies.transaction_id,
+            "status": response.code,
+        }
+        match response.code:
+            case 404 | 500 | 400:
+                response_code = response.code
+
+    return UniconfigOutput(code=response_code, data=close_tx_response)
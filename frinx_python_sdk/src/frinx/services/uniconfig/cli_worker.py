@@ -1,11 +1,10 @@
-import copy
-import json
 import logging
 from string import Template
 from typing import Any
 from typing import Optional
 
 from aiohttp import ClientSession
+from frinx.common import json_codec
 from frinx.common.frinx_rest import uniconfig_headers
 from frinx.common.frinx_rest import uniconfig_url_base
 
@@ -23,9 +22,7 @@ async def execute_and_read_rpc_cli(
     timeout: Optional[int] = None,
     output_timer=None,
 ):
-    execute_and_read_template = {"input": {"command": ""}}
-    exec_body = copy.deepcopy(execute_and_read_template)
-    exec_body["input"]["command"] = command
+    exec_body = {"input": {"command": command}}
 
     if output_timer:
         exec_body["input"]["wait-for-output-timer"] = output_timer
@@ -37,12 +34,12 @@ async def execute_and_read_rpc_cli(
     try:
         async with session.post(
             id_url,
-            data=json.dumps(exec_body),
+            data=json_codec.dumps(exec_body),
             ssl=False,
             headers=uniconfig_headers,
             timeout=timeout,
         ) as req:
-            res = await req.json()
+            res = json_codec.loads(await req.read())
             logger.info("LLDP raw data: %s", res["output"]["output"])
             return res["output"]["output"]
     except Exception:
@@ -57,22 +54,7 @@ from frinx.services.uniconfig import utils as uniconfig_utils
 from frinx.services.uniconfig.models import UniconfigContext
 from frinx.services.uniconfig.models import UniconfigOutput
 
-sync_mount_template = {
-    "input": {
-        "node-id": "",
-        "cli": {
-            "cli-topology:host": "",
-            "cli-topology:port": "",
-            "cli-topology:transport-type": "ssh",
-            "cli-topology:device-type": "",
-            "cli-topology:device-version": "",
-            "cli-topology:username": "",
-            "cli-topology:password": "",
-            "cli-topology:journal-size": 500,
-            "cli-topology:dry-run-journal-size": 180,
-        },
-    }
-}
+sync_mount_template = templates.cli_sync_mount_template
 
 
 def execute_mount_cli(
@@ -112,7 +94,7 @@ def execute_mount_cli(
     if parsing_engine is None:
         parsing_engine = "tree-parser"
 
-    mount_body = copy.deepcopy(sync_mount_template)
+    mount_body = templates.cli_sync_mount_body()
 
     mount_body["input"]["node-id"] = device_id
     mount_body["input"]["cli"]["cli-topology:host"] = host
@@ -129,12 +111,12 @@ def execute_mount_cli(
     # ].get("install-uniconfig-node-enabled", True)
 
     id_url = templates.uniconfig_url_cli_mount_sync.substitute(
-        {"base_url": uniconfig_utils.get_uniconfig_cluster_from_task()}
+        {"base_url": uniconfig_utils.get_uniconfig_cluster_from_task(device_id)}
     )
 
     # TODO finish
 
-    # response = uniconfig_utils.request("POST", id_url, data=json.dumps(mount_body), timeout=600)
+    # response = uniconfig_utils.request("POST", id_url, data=json_codec.dumps(mount_body), timeout=600)
     # match response.code:
     #     case 200:
     #         logs = f"Mount point with ID {device_id} configured"
@@ -178,11 +160,11 @@ def execute_mount_cli(
 def execute_unmount_cli(device_id: str) -> UniconfigOutput:
     try:
         id_url = templates.uniconfig_url_cli_unmount_sync.substitute(
-            {"base_url": uniconfig_utils.get_uniconfig_cluster_from_task()}
+            {"base_url": uniconfig_utils.get_uniconfig_cluster_from_task(device_id)}
         )
 
         unmount_body = {"input": {"node-id": device_id, "connection-type": "cli"}}
-        response = uniconfig_utils.request("POST", id_url, data=json.dumps(unmount_body))
+        response = uniconfig_utils.request("POST", id_url, data=json_codec.dumps(unmount_body))
 
         return UniconfigOutput(
             code=response.code,
@@ -208,25 +190,26 @@ def execute_and_read_rpc_cli(
 ) -> UniconfigOutput:
     params = params if params else {}
 
-    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context, device_id)
 
     commands = Template(template).substitute(params)
-    execute_and_read_template = {"input": {"ios-cli:command": ""}}
-    exec_body = copy.deepcopy(execute_and_read_template)
-    exec_body["input"]["ios-cli:command"] = commands
+    exec_body = {"input": {"ios-cli:command": commands}}
 
     if output_timer:
         exec_body["input"]["wait-for-output-timer"] = output_timer
 
     id_url = (
         templates.uniconfig_url_cli_mount_rpc.substitute(
-            {"id": device_id, "base_url": uniconfig_utils.get_uniconfig_cluster_from_task()}
+            {
+                "id": device_id,
+                "base_url": uniconfig_utils.get_uniconfig_cluster_from_task(device_id),
+            }
         )
         + "/yang-ext:mount/cli-unit-generic:execute-and-read"
     )
 
     response = uniconfig_utils.request(
-        "POST", id_url, data=json.dumps(exec_body), cookies=uniconfig_cookies, timeout=timeout
+        "POST", id_url, data=json_codec.dumps(exec_body), cookies=uniconfig_cookies, timeout=timeout
     )
     match response.code:
         case 200:
@@ -240,10 +223,10 @@ def execute_and_read_rpc_cli(
 def execute_get_cli_journal(
     device_id: str, uniconfig_context: UniconfigContext, timeout: Optional[int] = None
 ) -> UniconfigOutput:
-    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context, device_id)
 
     id_url = templates.uniconfig_url_cli_read_journal.substitute(
-        {"id": device_id, "base_url": uniconfig_utils.get_uniconfig_cluster_from_task()}
+        {"id": device_id, "base_url": uniconfig_utils.get_uniconfig_cluster_from_task(device_id)}
     )
 
     response = uniconfig_utils.request(
@@ -259,7 +242,7 @@ def execute_get_cli_journal(
     return UniconfigOutput(code=response.code, data=response.data, url=id_url, logs=logs)
 
 
-execute_template = {"input": {"command": "", "wait-for-output-timer": "5"}}
+execute_template = templates.cli_execute_template
 
 
 def execute_cli(
@@ -271,22 +254,23 @@ def execute_cli(
 ) -> UniconfigOutput:
     params = params if params else {}
 
-    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context, device_id)
 
     commands = Template(template).substitute(params)
-    exec_body = copy.deepcopy(execute_template)
-
-    exec_body["input"]["command"] = commands
+    exec_body = templates.cli_execute_body(commands)
 
     id_url = (
         templates.uniconfig_url_cli_mount_rpc.substitute(
-            {"id": device_id, "base_url": uniconfig_utils.get_uniconfig_cluster_from_task()}
+            {
+                "id": device_id,
+                "base_url": uniconfig_utils.get_uniconfig_cluster_from_task(device_id),
+            }
         )
         + "/yang-ext:mount/cli-unit-generic:execute"
     )
 
     response = uniconfig_utils.request(
-        "POST", id_url, data=json.dumps(exec_body), cookies=uniconfig_cookies, timeout=timeout
+        "POST", id_url, data=json_codec.dumps(exec_body), cookies=uniconfig_cookies, timeout=timeout
     )
 
     match response.code:
@@ -307,22 +291,23 @@ def execute_and_expect_cli(
 ) -> UniconfigOutput:
     params = params if params else {}
 
-    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context, device_id)
 
     commands = Template(template).substitute(params)
-    exec_body = copy.deepcopy(execute_template)
-
-    exec_body["input"]["command"] = commands
+    exec_body = templates.cli_execute_body(commands)
 
     id_url = (
         templates.uniconfig_url_cli_mount_rpc.substitute(
-            {"id": device_id, "base_url": uniconfig_utils.get_uniconfig_cluster_from_task()}
+            {
+                "id": device_id,
+                "base_url": uniconfig_utils.get_uniconfig_cluster_from_task(device_id),
+            }
         )
         + "/yang-ext:mount/cli-unit-generic:execute-and-expect"
     )
 
     response = uniconfig_utils.request(
-        "POST", id_url, data=json.dumps(exec_body), cookies=uniconfig_cookies, timeout=timeout
+        "POST", id_url, data=json_codec.dumps(exec_body), cookies=uniconfig_cookies, timeout=timeout
     )
 
     match response.code:
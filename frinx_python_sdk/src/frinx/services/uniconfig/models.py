@@ -11,6 +11,9 @@ class TransactionMeta(BaseModel):
     transaction_id: Optional[str] = Field(alias="UNICONFIGTXID", default=None)
     uniconfig_server_id: Optional[str] = Field(default=None)
 
+    class Config:
+        allow_population_by_field_name = True
+
 
 class UniconfigOutput(BaseModel):
     code: int
@@ -43,12 +46,12 @@ class ClusterWithDevices(BaseModel):
         min_anystr_length = 1
 
 
-UniconfigCookiesMultizone: typing.TypeAlias = dict[str, ClusterWithDevices]
+UniconfigCookiesMultizone: typing.TypeAlias = dict[str, dict[str, Any]]
 
 
 class UniconfigContext(BaseModel):
     started_by_wf: str | None = None
-    uniconfig_cookies_multizone: TransactionMeta | None = None
+    uniconfig_cookies_multizone: UniconfigCookiesMultizone | None = None
 
     class Config:
         min_anystr_length = 1
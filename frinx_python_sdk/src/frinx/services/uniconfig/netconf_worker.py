@@ -1,10 +1,9 @@
-import copy
-import json
 import logging
 from string import Template
 from typing import Union
 
 from aiohttp import ClientSession
+from frinx.common import json_codec
 from frinx.common.frinx_rest import uniconfig_headers
 from frinx.common.frinx_rest import uniconfig_url_base
 
@@ -27,7 +26,7 @@ async def read_structured_data(
     id_url = Template(topology_uri).substitute({"id": device_name}) + "/yang-ext:mount" + uri
     try:
         async with session.get(id_url, ssl=False, headers=uniconfig_headers) as request:
-            response = await request.json()
+            response = json_codec.loads(await request.read())
             logger.info("LLDP raw data: %s", response["output"]["output"])
             return response["output"]["output"]
     except Exception:
@@ -43,26 +42,7 @@ from frinx.services.uniconfig.models import NetconfInputBody
 from frinx.services.uniconfig.models import UniconfigContext
 from frinx.services.uniconfig.models import UniconfigOutput
 
-sync_mount_template = {
-    "input": {
-        "node-id": "",
-        "netconf": {
-            "netconf-node-topology:host": "",
-            "netconf-node-topology:port": 2022,
-            "netconf-node-topology:keepalive-delay": 5,
-            "netconf-node-topology:max-connection-attempts": 1,
-            "netconf-node-topology:connection-timeout-millis": 60000,
-            "netconf-node-topology:default-request-timeout-millis": 60000,
-            "netconf-node-topology:tcp-only": False,
-            "netconf-node-topology:username": "",
-            "netconf-node-topology:password": "",
-            "netconf-node-topology:sleep-factor": 1.0,
-            "uniconfig-config:uniconfig-native-enabled": True,
-            "netconf-node-topology:edit-config-test-option": "set",
-            "uniconfig-config:blacklist": {"extension": ["tailf:display-when false"]},
-        },
-    }
-}
+sync_mount_template = templates.netconf_sync_mount_template
 
 
 def execute_mount_netconf(
@@ -86,7 +66,7 @@ def execute_mount_netconf(
 ):
     device_id = device_id
 
-    mount_body = copy.deepcopy(sync_mount_template)
+    mount_body = templates.netconf_sync_mount_body()
     mount_body["input"]["node-id"] = device_id
     mount_body["input"]["netconf"]["netconf-node-topology:host"] = host
     mount_body["input"]["netconf"]["netconf-node-topology:port"] = port
@@ -146,10 +126,12 @@ def execute_mount_netconf(
         }
 
     id_url = templates.uniconfig_url_netconf_mount_sync.substitute(
-        {"base_url": uniconfig_utils.get_uniconfig_cluster_from_task()}
+        {"base_url": uniconfig_utils.get_uniconfig_cluster_from_task(device_id)}
     )
 
-    response = uniconfig_utils.request("POST", url=id_url, data=json.dumps(mount_body), timeout=600)
+    response = uniconfig_utils.request(
+        "POST", url=id_url, data=json_codec.dumps(mount_body), timeout=600
+    )
 
     error_message_for_already_installed = "Node has already been installed using NETCONF protocol"
 
@@ -187,10 +169,10 @@ def execute_mount_netconf(
 
 def execute_unmount_netconf(device_id: str) -> UniconfigOutput:
     id_url = templates.uniconfig_url_netconf_unmount_sync.substitute(
-        {"base_url": uniconfig_utils.get_uniconfig_cluster_from_task()}
+        {"base_url": uniconfig_utils.get_uniconfig_cluster_from_task(device_id)}
     )
     unmount_body = {"input": {"node-id": device_id, "connection-type": "netconf"}}
-    response = uniconfig_utils.request("POST", id_url, data=json.dumps(unmount_body))
+    response = uniconfig_utils.request("POST", id_url, data=json_codec.dumps(unmount_body))
 
     return UniconfigOutput(
         code=response.code,
@@ -201,10 +183,10 @@ def execute_unmount_netconf(device_id: str) -> UniconfigOutput:
 
 
 def execute_check_connected_netconf(device_id: str, uniconfig_context: UniconfigContext):
-    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context, device_id)
 
     id_url = templates.uniconfig_url_netconf_mount_oper.substitute(
-        {"id": device_id, "base_url": uniconfig_utils.get_uniconfig_cluster_from_task()}
+        {"id": device_id, "base_url": uniconfig_utils.get_uniconfig_cluster_from_task(device_id)}
     )
 
     response = uniconfig_utils.request("GET", id_url, cookies=uniconfig_cookies)
@@ -222,11 +204,14 @@ def execute_check_connected_netconf(device_id: str, uniconfig_context: Uniconfig
 def read_structured_data_sync(
     device_id: str, uri: str, uniconfig_context: UniconfigContext
 ) -> UniconfigOutput:
-    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context, device_id)
 
     id_url = (
         templates.uniconfig_url_netconf_mount.substitute(
-            {"id": device_id, "base_url": uniconfig_utils.get_uniconfig_cluster_from_task()}
+            {
+                "id": device_id,
+                "base_url": uniconfig_utils.get_uniconfig_cluster_from_task(device_id),
+            }
         )
         + "/yang-ext:mount"
         + (uri if uri else "")
@@ -250,7 +235,7 @@ def execute_mount_any(mount_body: NetconfInputBody):
     )
 
     response = uniconfig_utils.request(
-        "POST", url=id_url, data=json.dumps(mount_body.json(exclude_none=True)), timeout=600
+        "POST", url=id_url, data=json_codec.dumps(mount_body.dict(exclude_none=True)), timeout=600
     )
 
     error_message_for_already_installed = "Node has already been installed using NETCONF protocol"
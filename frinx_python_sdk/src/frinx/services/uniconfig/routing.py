@@ -0,0 +1,175 @@
+import logging
+import os
+import threading
+import time
+from string import Template
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_device_zones() -> dict[str, str]:
+    from frinx.services.inventory.utils import get_device_zones
+
+    return get_device_zones()
+
+
+def fetch_device_zone(device_name: str) -> str | None:
+    from frinx.services.inventory.utils import get_device_zone
+
+    return get_device_zone(device_name)
+
+
+class DeviceZoneIndex:
+    """
+    Thread-safe in-memory index of Uniconfig zones of devices (device name -> zone name) built
+    from Inventory, so routing a device to its Uniconfig cluster is a dictionary lookup.
+
+    The whole index is loaded from Inventory page by page and reloaded when older than ttl
+    seconds. The reload runs in a background thread, lookups are served from the current index
+    meanwhile; only the first load is waited for. Devices missing in the index (e.g. added to
+    Inventory since the last load) are looked up one by one and added to the index, or by
+    reloading the index if there are more than max_lookups of them. Devices unknown to Inventory
+    are kept as None until the next reload and are routed to the default Uniconfig cluster by
+    callers.
+
+    Inventory is never queried under the lock, the index is only swapped under it.
+    Zone names are turned into URLs of Uniconfig clusters by zone_url_template ($zone).
+    """
+
+    # Delay of the next reload after Inventory failed
+    RETRY_INTERVAL = 10
+
+    def __init__(
+        self,
+        zone_url_template: str,
+        ttl: float = 300,
+        max_lookups: int = 10,
+        fetch_all: Callable[[], dict[str, str]] = fetch_device_zones,
+        fetch_device: Callable[[str], str | None] = fetch_device_zone,
+    ) -> None:
+        self.zone_url_template = Template(zone_url_template)
+        self.ttl = ttl
+        self.max_lookups = max_lookups
+        self.fetch_all = fetch_all
+        self.fetch_device = fetch_device
+        # Guards swapping of zones
+        self.lock = threading.Lock()
+        # Held by the one thread reloading the index
+        self.reload_lock = threading.Lock()
+        self.zones: dict[str, str | None] = {}
+        self.expires = 0.0
+        # Number of finished reloads
+        self.generation = 0
+
+    def zone_url(self, zone: str | None) -> str | None:
+        return None if zone is None else self.zone_url_template.substitute({"zone": zone})
+
+    def cluster(self, device: str) -> str | None:
+        """URL of the Uniconfig cluster of the device, None if the zone is not known."""
+        return self.clusters([device])[device]
+
+    def clusters(self, devices: list[str]) -> dict[str, str | None]:
+        """URLs of Uniconfig clusters of devices, in the order of devices."""
+        zones = self.resolve(devices)
+        return {device: self.zone_url(zones.get(device)) for device in devices}
+
+    def resolve(self, devices: list[str]) -> dict[str, str | None]:
+        if time.monotonic() >= self.expires:
+            if self.generation:
+                self.reload_in_background()
+            else:
+                self.reload()
+        zones = self.zones
+        if any(device not in zones for device in devices):
+            zones = self.lookup(devices)
+        return zones
+
+    def reload(self) -> dict[str, str | None]:
+        """Reload the index, or wait for the reload already running in another thread."""
+        generation = self.generation
+        with self.reload_lock:
+            # Reloaded by another thread meanwhile
+            if self.generation == generation:
+                self._reload()
+            return self.zones
+
+    def reload_in_background(self) -> None:
+        """Start reloading the index in a background thread unless a reload is running."""
+        if not self.reload_lock.acquire(blocking=False):
+            return
+        try:
+            threading.Thread(
+                target=self._reload_and_release, name="device-zone-index", daemon=True
+            ).start()
+        except Exception:
+            self.reload_lock.release()
+            raise
+
+    def lookup(self, devices: list[str]) -> dict[str, str | None]:
+        zones = self.zones
+        missing = list(dict.fromkeys(device for device in devices if device not in zones))
+        if not missing:
+            return zones
+
+        if len(missing) > self.max_lookups:
+            zones = self.reload()
+            # Devices unknown to Inventory
+            found = {device: None for device in missing if device not in zones}
+        else:
+            try:
+                found = {device: self.fetch_device(device) for device in missing}
+            except Exception:
+                logger.warning("Unable to read zones of %s from Inventory", missing, exc_info=True)
+                return zones
+
+        if not found:
+            return zones
+        with self.lock:
+            zones = dict(self.zones)
+            zones.update(found)
+            self.zones = zones
+        return zones
+
+    def _reload_and_release(self) -> None:
+        try:
+            self._reload()
+        finally:
+            self.reload_lock.release()
+
+    def _reload(self) -> None:
+        started = time.monotonic()
+        try:
+            zones = self.fetch_all()
+        except Exception:
+            logger.warning("Unable to read zones of devices from Inventory", exc_info=True)
+            self.expires = started + min(self.ttl, self.RETRY_INTERVAL)
+            self.generation += 1
+            return
+
+        logger.info("Loaded zones of %s devices from Inventory", len(zones))
+        with self.lock:
+            self.zones = zones
+        self.expires = started + self.ttl
+        self.generation += 1
+
+    def clear(self) -> None:
+        with self.reload_lock, self.lock:
+            self.zones = {}
+            self.expires = 0.0
+            self.generation = 0
+
+
+def create_device_zone_index() -> DeviceZoneIndex | None:
+    """Index of UNICONFIG_ZONE_URL_TEMPLATE, e.g. http://$zone:8181/rests, None if not set."""
+    zone_url_template = os.getenv("UNICONFIG_ZONE_URL_TEMPLATE")
+    if not zone_url_template:
+        return None
+    return DeviceZoneIndex(
+        zone_url_template,
+        ttl=float(os.getenv("UNICONFIG_ZONE_INDEX_TTL", "300")),
+        max_lookups=int(os.getenv("UNICONFIG_ZONE_INDEX_MAX_LOOKUPS", "10")),
+    )
+
+
+device_zone_index = create_device_zone_index()
@@ -53,3 +53,62 @@ uniconfig_url_netconf_unmount_sync = Template(
 uniconfig_url_netconf_mount_oper = Template(
     "$base_url/data/network-topology:network-topology/topology=topology-netconf/node=$id?content=nonconfig"
 )
+
+
+# Request bodies are modified by callers, so the *_body factories build a new body per request
+# instead of deep copies of shared templates. The *_template constants are default bodies kept
+# for existing callers, they are not to be modified.
+
+
+def cli_sync_mount_body() -> dict[str, Any]:
+    """Returns a new CLI mount body with default values, callers are free to modify it."""
+    return {
+        "input": {
+            "node-id": "",
+            "cli": {
+                "cli-topology:host": "",
+                "cli-topology:port": "",
+                "cli-topology:transport-type": "ssh",
+                "cli-topology:device-type": "",
+                "cli-topology:device-version": "",
+                "cli-topology:username": "",
+                "cli-topology:password": "",
+                "cli-topology:journal-size": 500,
+                "cli-topology:dry-run-journal-size": 180,
+            },
+        }
+    }
+
+
+def netconf_sync_mount_body() -> dict[str, Any]:
+    """Returns a new NETCONF mount body with default values, callers are free to modify it."""
+    return {
+        "input": {
+            "node-id": "",
+            "netconf": {
+                "netconf-node-topology:host": "",
+                "netconf-node-topology:port": 2022,
+                "netconf-node-topology:keepalive-delay": 5,
+                "netconf-node-topology:max-connection-attempts": 1,
+                "netconf-node-topology:connection-timeout-millis": 60000,
+                "netconf-node-topology:default-request-timeout-millis": 60000,
+                "netconf-node-topology:tcp-only": False,
+                "netconf-node-topology:username": "",
+                "netconf-node-topology:password": "",
+                "netconf-node-topology:sleep-factor": 1.0,
+                "uniconfig-config:uniconfig-native-enabled": True,
+                "netconf-node-topology:edit-config-test-option": "set",
+                "uniconfig-config:blacklist": {"extension": ["tailf:display-when false"]},
+            },
+        }
+    }
+
+
+def cli_execute_body(command: str) -> dict[str, Any]:
+    """Returns a new CLI execute body."""
+    return {"input": {"command": command, "wait-for-output-timer": "5"}}
+
+
+cli_sync_mount_template = cli_sync_mount_body()
+netconf_sync_mount_template = netconf_sync_mount_body()
+cli_execute_template = cli_execute_body("")
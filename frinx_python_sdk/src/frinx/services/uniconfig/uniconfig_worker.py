@@ -1,7 +1,7 @@
-import json
 from string import Template
 
 import requests
+from frinx.common import json_codec
 from frinx.common.frinx_rest import conductor_headers
 from frinx.common.frinx_rest import conductor_url_base
 from frinx.services.uniconfig import templates
@@ -13,6 +13,76 @@ from frinx.services.uniconfig.models import UniconfigTransactionList
 from frinx.services.uniconfig.utils import request as uniconfig_request
 
 
+def structured_data_url(device_id: str, uri: str, uc_cluster: str | None = None) -> str:
+    """
+    Validate device_id and uri and return URL of configuration of the device in Uniconfig,
+    in uc_cluster if given, in the cluster of the zone of the device otherwise.
+    """
+    if len(device_id) == 0:
+        raise Exception("Missing input device_id")
+    if not isinstance(device_id, str):
+        raise Exception("Bad input device_id")
+    if uri is None:
+        raise Exception("Missing input uri")
+    if not isinstance(uri, str):
+        raise Exception("Bad input uri")
+
+    uri = uniconfig_utils.apply_functions(uri)
+    return (
+        templates.uniconfig_url_uniconfig_mount.substitute(
+            {
+                "id": device_id,
+                "base_url": uc_cluster
+                or uniconfig_utils.get_uniconfig_cluster_from_task(device_id),
+            }
+        )
+        + "/frinx-uniconfig-topology:configuration"
+        + (uri if uri else "")
+    )
+
+
+def write_structured_data_request(
+    device_id: str, uri: str, template: str | dict, params, uc_cluster: str | None = None
+) -> tuple[str, str]:
+    """Return URL and body of a write of configuration with params substituted in both."""
+    if len(template) == 0:
+        raise Exception("Missing input template")
+    if not isinstance(template, dict | str):
+        raise Exception("Bad input template")
+
+    id_url = structured_data_url(device_id, uri, uc_cluster)
+    params = uniconfig_utils.apply_functions(params)
+    params = json_codec.loads(params) if isinstance(params, str) else (params if params else {})
+    data_json = (
+        template
+        if isinstance(template, str)
+        else json_codec.dumps_str(template if template else {})
+    )
+    return Template(id_url).substitute(params), Template(data_json).substitute(params)
+
+
+def parse_uniconfig_context(uniconfig_context) -> UniconfigContext:
+    if uniconfig_context is None or uniconfig_context == "":
+        uniconfig_context = UniconfigContext()
+    if isinstance(uniconfig_context, str):
+        uniconfig_context = UniconfigContext(**json_codec.loads(uniconfig_context))
+    if isinstance(uniconfig_context, dict):
+        uniconfig_context = UniconfigContext(**uniconfig_context)
+    if not isinstance(uniconfig_context, UniconfigContext):
+        raise Exception("Bad input uniconfig_context")
+    return uniconfig_context
+
+
+def parse_transaction_list(uniconfig_context) -> UniconfigTransactionList:
+    if uniconfig_context is None or uniconfig_context == "":
+        uniconfig_context = UniconfigTransactionList()
+    if isinstance(uniconfig_context, str):
+        uniconfig_context = UniconfigTransactionList(uniconfig_context=uniconfig_context)
+    if not isinstance(uniconfig_context, UniconfigTransactionList):
+        raise Exception("Bad input uniconfig_context")
+    return uniconfig_context
+
+
 def read_structured_data(
     device_id: str, uri: str, uniconfig_context: UniconfigContext
 ) -> UniconfigOutput:
@@ -34,43 +104,86 @@ def read_structured_data(
             data (dict) : JSON response from UniConfig
             url (str): Request URL
     """
-    # try:
-    if len(device_id) == 0:
-        raise Exception("Missing input device_id")
-    if not isinstance(device_id, str):
-        raise Exception("Bad input device_id")
-    if uri is None:
-        raise Exception("Missing input uri")
-    if not isinstance(uri, str):
-        raise Exception("Bad input uri")
+    id_url = structured_data_url(device_id, uri)
+    uniconfig_context = parse_uniconfig_context(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context, device_id)
 
-    if uniconfig_context is None or uniconfig_context == "":
-        uniconfig_context = UniconfigContext()
-    if isinstance(uniconfig_context, str):
-        uniconfig_context = UniconfigContext(**json.loads(uniconfig_context))
-    if isinstance(uniconfig_context, dict):
-        uniconfig_context = UniconfigContext(**uniconfig_context)
-    if not isinstance(uniconfig_context, UniconfigContext):
-        raise Exception("Bad input uniconfig_context")
+    response = uniconfig_utils.request(method="GET", url=id_url, cookies=uniconfig_cookies)
+    return UniconfigOutput(code=response.code, data=response.data, url=id_url)
 
-    print(type(uniconfig_context), uniconfig_context.dict())
-    uri = uniconfig_utils.apply_functions(uri)
-    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context)
 
-    id_url = (
-        templates.uniconfig_url_uniconfig_mount.substitute(
-            {"id": device_id, "base_url": uniconfig_utils.get_uniconfig_cluster_from_task()}
+def parse_reads(reads=None, devices=None, uri=None) -> list[tuple[str, str]]:
+    """
+    (device_id, uri) pairs of reads given as [{"device_id": ..., "uri": ...}] or
+    [[device_id, uri]], or of devices (list or comma separated) all read at the same uri.
+    """
+    if isinstance(reads, str):
+        reads = json_codec.loads(reads)
+    parsed_reads = []
+    for read in reads or []:
+        match read:
+            case {"device_id": str(device_id), "uri": str(read_uri)}:
+                parsed_reads.append((device_id, read_uri))
+            case [str(device_id), str(read_uri)]:
+                parsed_reads.append((device_id, read_uri))
+            case _:
+                raise Exception(f"Bad input reads: {read}")
+
+    if devices:
+        if uri is None:
+            raise Exception("Missing input uri")
+        parsed_reads.extend(
+            (device_id, uri) for device_id in uniconfig_utils.parse_devices(devices)
+        )
+    return parsed_reads
+
+
+def read_structured_data_bulk(
+    reads: list[dict[str, str] | list[str]] | None = None,
+    devices: str | list[str] | None = None,
+    uri: str | None = None,
+    uniconfig_context: UniconfigContext | None = None,
+    max_concurrency: int = 10,
+    timeout: float = 60,
+) -> UniconfigOutput:
+    """
+    Read configuration of many devices in one task instead of a task per device.
+
+    Args:
+        reads: list of {"device_id": ..., "uri": ...} (or [device_id, uri]) to be read
+        devices: devices (list or comma separated) to be read at uri, in addition to reads
+        uri: str
+        uniconfig_context: UniconfigContext
+        max_concurrency: maximum of reads sent to Uniconfig at once
+        timeout: deadline of all reads in seconds, unfinished reads are reported as errors
+
+    Returns:
+        UniconfigOutput:
+            code (int) : 200, or 500 if none of the reads succeeded
+            data (dict) : responses of successful reads by device and uri (results),
+                errors of failed reads by device and uri (errors) and counts (summary)
+
+    Task input example:
+    {
+        "reads": [
+            {"device_id": "IOS01", "uri": "/frinx-openconfig-interfaces:interfaces"},
+            {"device_id": "IOS02", "uri": "/frinx-openconfig-interfaces:interfaces"}
+        ],
+        "max_concurrency": 10,
+        "timeout": 60
+    }
+    """
+    from frinx.services.uniconfig import async_uniconfig_worker
+    from frinx.services.uniconfig import async_utils
+
+    parsed_reads = parse_reads(reads, devices, uri)
+
+    # The long-lived loop keeps its Uniconfig session, connections are reused across tasks
+    return async_utils.event_loop_thread.run(
+        async_uniconfig_worker.read_structured_data_bulk(
+            parsed_reads, uniconfig_context, max_concurrency, timeout
         )
-        + "/frinx-uniconfig-topology:configuration"
-        + (uri if uri else "")
     )
-    response = uniconfig_utils.request(method="GET", url=id_url, cookies=uniconfig_cookies)
-    return UniconfigOutput(code=response.code, data=response.data, url=id_url)
-    # except Exception as e:
-    #     # TODO status code check
-    #     return UniconfigOutput(
-    #         data={ "error":e }, logs="Unable to read device with ID %s" % device_id, code=500
-    #     )
 
 
 def write_structured_data(
@@ -101,46 +214,9 @@ def write_structured_data(
     """
     # TODO valid method input?
     try:
-        if len(device_id) == 0:
-            raise Exception("Missing input device_id")
-        if not isinstance(device_id, str):
-            raise Exception("Bad input device_id")
-        if uri is None:
-            raise Exception("Missing input uri")
-        if not isinstance(uri, str):
-            raise Exception("Bad input uri")
-        if len(template) == 0:
-            raise Exception("Missing input template")
-        if not isinstance(template, dict | str):
-            raise Exception("Bad input template")
-
-        if uniconfig_context is None or uniconfig_context == "":
-            uniconfig_context = UniconfigContext()
-        if isinstance(uniconfig_context, str):
-            uniconfig_context = UniconfigContext(**json.loads(uniconfig_context))
-        if isinstance(uniconfig_context, dict):
-            uniconfig_context = UniconfigContext(**uniconfig_context)
-        if not isinstance(uniconfig_context, UniconfigContext):
-            raise Exception("Bad input uniconfig_context")
-
-        uri = uniconfig_utils.apply_functions(uri)
-        params = uniconfig_utils.apply_functions(params)
-        params = json.loads(params) if isinstance(params, str) else (params if params else {})
-        uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context)
-        data_json = (
-            template if isinstance(template, str) else json.dumps(template if template else {})
-        )
-        data_json = Template(data_json).substitute(params)
-
-        id_url = (
-            templates.uniconfig_url_uniconfig_mount.substitute(
-                {"id": device_id, "base_url": uniconfig_utils.get_uniconfig_cluster_from_task()}
-            )
-            + "/frinx-uniconfig-topology:configuration"
-            + (uri if uri else "")
-        )
-
-        id_url = Template(id_url).substitute(params)
+        id_url, data_json = write_structured_data_request(device_id, uri, template, params)
+        uniconfig_context = parse_uniconfig_context(uniconfig_context)
+        uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context, device_id)
         response = uniconfig_utils.request(
             method=method, url=id_url, data=data_json, cookies=uniconfig_cookies
         )
@@ -173,25 +249,8 @@ def delete_structured_data(
             url (str): Request URL
     """
     try:
-        if len(device_id) == 0:
-            raise Exception("Missing input device_id")
-        if not isinstance(device_id, str):
-            raise Exception("Bad input device_id")
-        if uri is None:
-            raise Exception("Missing input uri")
-        if not isinstance(uri, str):
-            raise Exception("Bad input uri")
-
-        uri = uniconfig_utils.apply_functions(uri)
-        uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context)
-
-        id_url = (
-            templates.uniconfig_url_uniconfig_mount.substitute(
-                {"id": device_id, "base_url": uniconfig_utils.get_uniconfig_cluster_from_task()}
-            )
-            + "/frinx-uniconfig-topology:configuration"
-            + (uri if uri else "")
-        )
+        id_url = structured_data_url(device_id, uri)
+        uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context, device_id)
         response = uniconfig_utils.request(method="DELETE", url=id_url, cookies=uniconfig_cookies)
         return UniconfigOutput(code=response.code, data=response.data, url=id_url)
     except Exception as error:
@@ -219,7 +278,7 @@ def commit(devices: list[object], uniconfig_context: UniconfigContext) -> Unicon
     """
 
     if isinstance(uniconfig_context, str):
-        uniconfig_context = json.loads(uniconfig_context)
+        uniconfig_context = json_codec.loads(uniconfig_context)
     uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies_multizone(uniconfig_context)
     devices = uniconfig_utils.parse_devices(devices)
     devices_by_uniconfig = uniconfig_utils.get_devices_by_uniconfig(devices)
@@ -247,8 +306,8 @@ def dryrun_commit(devices: list[object], uniconfig_context: UniconfigContext) ->
     """
 
     if isinstance(uniconfig_context, str):
-        uniconfig_context = json.loads(uniconfig_context)
-    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context)
+        uniconfig_context = json_codec.loads(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies_multizone(uniconfig_context)
     devices = uniconfig_utils.parse_devices(devices)
     devices_by_uniconfig = uniconfig_utils.get_devices_by_uniconfig(devices)
 
@@ -273,16 +332,9 @@ def calc_diff(devices: list, uniconfig_context: UniconfigTransactionList) -> Uni
             url (str): Request URL
     """
 
-    if uniconfig_context is None or uniconfig_context == "":
-        uniconfig_context = UniconfigTransactionList()
-    if isinstance(uniconfig_context, str):
-        uniconfig_context = UniconfigTransactionList(uniconfig_context=uniconfig_context)
-    if not isinstance(uniconfig_context, UniconfigTransactionList):
-        raise Exception("Bad input uniconfig_context")
-
-    print(uniconfig_context)
+    uniconfig_context = parse_transaction_list(uniconfig_context)
 
-    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies_multizone(uniconfig_context)
     devices = uniconfig_utils.parse_devices(devices)
     devices_by_uniconfig = uniconfig_utils.get_devices_by_uniconfig(devices)
 
@@ -309,14 +361,9 @@ def sync_from_network(
             url (str): Request URL
     """
 
-    if uniconfig_context is None or uniconfig_context == "":
-        uniconfig_context = UniconfigTransactionList()
-    if isinstance(uniconfig_context, str):
-        uniconfig_context = UniconfigTransactionList(uniconfig_context=uniconfig_context)
-    if not isinstance(uniconfig_context, UniconfigTransactionList):
-        raise Exception("Bad input uniconfig_context")
+    uniconfig_context = parse_transaction_list(uniconfig_context)
 
-    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies_multizone(uniconfig_context)
     devices = uniconfig_utils.parse_devices(devices)
     devices_by_uniconfig = uniconfig_utils.get_devices_by_uniconfig(devices)
 
@@ -343,14 +390,9 @@ def replace_config_with_oper(
             url (str): Request URL
     """
 
-    if uniconfig_context is None or uniconfig_context == "":
-        uniconfig_context = UniconfigTransactionList()
-    if isinstance(uniconfig_context, str):
-        uniconfig_context = UniconfigTransactionList(uniconfig_context=uniconfig_context)
-    if not isinstance(uniconfig_context, UniconfigTransactionList):
-        raise Exception("Bad input uniconfig_context")
+    uniconfig_context = parse_transaction_list(uniconfig_context)
 
-    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies(uniconfig_context)
+    uniconfig_cookies = uniconfig_utils.extract_uniconfig_cookies_multizone(uniconfig_context)
     devices = uniconfig_utils.parse_devices(devices)
     devices_by_uniconfig = uniconfig_utils.get_devices_by_uniconfig(devices)
 
@@ -387,34 +429,7 @@ def create_tx_multizone(devices: list[str], oam_domain=None) -> UniconfigOutput:
     devices = uniconfig_utils.parse_devices(devices, fail_on_empty=False)
     devices_by_uniconfig = uniconfig_utils.get_devices_by_uniconfig(devices)
 
-    uniconfig_cookies_multizone = {}
-    response = UniconfigOutput(code=500, data={})
-
-    for device in devices_by_uniconfig:
-        response = uniconfig_utils.create_tx_internal(uniconfig_cluster=device.uc_cluster)
-        match response.code:
-            case requests.codes.created:
-                uniconfig_cookies_multizone[device.uc_cluster] = response.data["uniconfig_cookies"]
-            case _:
-                for already_opened_tx_uc_cluster in uniconfig_cookies_multizone:
-                    uniconfig_utils.close_tx_internal(
-                        uniconfig_cookies_multizone[already_opened_tx_uc_cluster],
-                        already_opened_tx_uc_cluster,
-                    )
-                return UniconfigOutput(
-                    code=response.code,
-                    data={"failed_zone": device.uc_cluster, "response": response.data},
-                    logs=[
-                        f'Unable to create multizone transactions. Failed for: "{device.uc_cluster}".Close sent to already opened transactions: "{uniconfig_cookies_multizone}"'
-                    ],
-                )
-    return UniconfigOutput(
-        code=response.code,
-        data={"uniconfig_cookies_multizone": uniconfig_cookies_multizone},
-        logs=[
-            f'Transactions created successfully for: "{devices_by_uniconfig}" with context: "{uniconfig_cookies_multizone}"'
-        ],
-    )
+    return uniconfig_utils.create_tx_multizone_internal(devices_by_uniconfig)
 
 
 def close_tx_multizone(uniconfig_context: UniconfigCookiesMultizone) -> UniconfigOutput:
@@ -1,30 +1,116 @@
-import json
+import logging
+import os
 import re
+import threading
 import urllib
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
 from string import Template
+from typing import Any
+from typing import Callable
 
 import frinx.common.frinx_rest
 import requests
+from frinx.client.conductor import create_session
+from frinx.common import json_codec
+from frinx.common.frinx_rest import additional_uniconfig_request_params
 from frinx.common.frinx_rest import uniconfig_headers
 from frinx.common.frinx_rest import uniconfig_url_base
 from frinx.common.util import parse_response
+from frinx.services.uniconfig import routing
 from frinx.services.uniconfig.models import *
 from frinx.services.uniconfig.templates import UNICONFIGTXID
+from frinx.services.uniconfig.templates import uniconfig_url_uniconfig_commit
 from frinx.services.uniconfig.templates import uniconfig_url_uniconfig_tx_close
 from frinx.services.uniconfig.templates import uniconfig_url_uniconfig_tx_create
+from frinx.services.uniconfig.templates import uniconfig_url_uniconfig_tx_metadata
+from frinx.services.uniconfig.templates import uniconfig_url_uniconfig_tx_revert
 
+logger = logging.getLogger(__name__)
+
+DeviceWithCluster = namedtuple("devices", ["uc_cluster", "device_names"])
+
+
+class UniconfigClient:
+    """
+    Thread-safe HTTP client of Uniconfig keeping a pool of up to pool_size keep-alive
+    connections per Uniconfig cluster (scheme and host of the request URL), so requests of all
+    worker threads reuse established (TLS) connections.
+
+    Connection failures are retried up to retries times, idempotent requests also on 502, 503
+    and 504 responses (create_session). Transaction cookies (UNICONFIGTXID,
+    uniconfig_server_id) are sent with every request they belong to and are never stored in
+    the shared sessions, so concurrent transactions do not leak into each other.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        timeout: float = 60,
+        retries: int = 3,
+        backoff_factor: float = 0.1,
+        verify: bool = additional_uniconfig_request_params["verify"],
+    ) -> None:
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.verify = verify
+        self.lock = threading.Lock()
+        self.sessions: dict[str, requests.Session] = {}
+
+    def session(self, url: str) -> requests.Session:
+        parsed_url = urllib.parse.urlsplit(url)
+        cluster = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        with self.lock:
+            session = self.sessions.get(cluster)
+            if session is None:
+                session = create_session(self.pool_size, self.retries, self.backoff_factor)
+                session.verify = self.verify
+                session.headers.update(uniconfig_headers)
+                # Cookies of responses are returned to callers, not kept for other requests
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                self.sessions[cluster] = session
+            return session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        cookies: dict[str, Any] | None = None,
+        data: Any = None,
+        timeout: float | None = None,
+    ) -> requests.Response:
+        return self.session(url).request(
+            method=method,
+            url=url,
+            cookies=cookies,
+            data=data,
+            timeout=timeout if timeout is not None else self.timeout,
+        )
+
+    def close(self) -> None:
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
 
-def request(method, url, cookies=None, data=None, timeout=60) -> UniconfigRpcResponse:
-    print(method, url, cookies)
-    response = requests.request(
-        method=method,
-        url=url,
-        cookies=cookies,
-        data=data,
-        timeout=timeout,
-        headers=uniconfig_headers,
-    )
+
+uniconfig_client = UniconfigClient(
+    pool_size=int(os.getenv("UNICONFIG_POOL_SIZE", "10")),
+    timeout=float(os.getenv("UNICONFIG_REQUEST_TIMEOUT", "60")),
+    retries=int(os.getenv("UNICONFIG_REQUEST_RETRIES", "3")),
+)
+
+# Upper bound of Uniconfig clusters a multizone operation talks to at once
+MAX_CLUSTER_CONCURRENCY = int(os.getenv("UNICONFIG_CLUSTER_CONCURRENCY", "16"))
+
+
+def request(method, url, cookies=None, data=None, timeout=None) -> UniconfigRpcResponse:
+    """Request of Uniconfig, timeout defaults to the client one (UNICONFIG_REQUEST_TIMEOUT)."""
+    logger.debug("Uniconfig request %s %s", method, url)
+    response = uniconfig_client.request(method, url, cookies=cookies, data=data, timeout=timeout)
 
     code, data = parse_response(response)
     response_cookies = parse_response_cookies(response)
@@ -52,10 +138,10 @@ def apply_functions(uri: str) -> str:
 
 
 def extract_uniconfig_cookies(
-    uniconfig_context: UniconfigContext | UniconfigTransactionList,
+    uniconfig_context: UniconfigContext | UniconfigTransactionList, device_id: str | None = None
 ) -> UniconfigCookies:
     uniconfig_cookies_multizone = extract_uniconfig_cookies_multizone(uniconfig_context)
-    cluster_for_device = get_uniconfig_cluster_from_task()
+    cluster_for_device = get_uniconfig_cluster_from_task(device_id)
     return uniconfig_cookies_multizone.get(cluster_for_device, {}) or {}
 
 
@@ -75,20 +161,36 @@ def extract_uniconfig_cookies_multizone(
         case UniconfigContext():
             return uniconfig_context.dict().get("uniconfig_cookies_multizone", {}) or {}
         case str():
-            return json.loads(uniconfig_context).dict().get("uniconfig_cookies_multizone", {}) or {}
+            return (
+                json_codec.loads(uniconfig_context).dict().get("uniconfig_cookies_multizone", {})
+                or {}
+            )
         case _:
             return UniconfigCookiesMultizone()
 
 
-def get_uniconfig_cluster_from_task() -> str:
-    # TODO Is that single node???
-    return uniconfig_url_base
+def get_uniconfig_cluster_from_task(device_id: str | None = None) -> str:
+    """
+    URL of the Uniconfig cluster (zone) of the device, uniconfig_url_base if the zone is not
+    known or routing by zones (routing.device_zone_index) is not configured.
+    """
+    if device_id is None or routing.device_zone_index is None:
+        return uniconfig_url_base
+    return routing.device_zone_index.cluster(device_id) or uniconfig_url_base
 
 
-def get_devices_by_uniconfig(devices):
-    device_with_cluster = namedtuple("devices", ["uc_cluster", "device_names"])
+def get_devices_by_uniconfig(devices: list[str]) -> list[DeviceWithCluster]:
+    """Devices grouped by their Uniconfig clusters, see get_uniconfig_cluster_from_task."""
+    if not devices or routing.device_zone_index is None:
+        return [DeviceWithCluster(uc_cluster=uniconfig_url_base, device_names=devices)]
 
-    return [device_with_cluster(uc_cluster=uniconfig_url_base, device_names=devices)]
+    devices_by_cluster = {}
+    for device, cluster in routing.device_zone_index.clusters(devices).items():
+        devices_by_cluster.setdefault(cluster or uniconfig_url_base, []).append(device)
+    return [
+        DeviceWithCluster(uc_cluster=cluster, device_names=device_names)
+        for cluster, device_names in devices_by_cluster.items()
+    ]
 
 
 def parse_devices(devices=None, fail_on_empty=True) -> list[object]:
@@ -126,45 +228,56 @@ def create_commit_request(device_list: list) -> dict:
     return commit_body
 
 
-def commit_uniconfig(
+def map_clusters(function: Callable[[Any], Any], clusters: list) -> list:
+    """
+    Call function for every item of clusters (one per Uniconfig cluster) concurrently, the
+    results are returned in the order of clusters, so a multizone operation takes the latency
+    of the slowest cluster instead of the sum of all of them.
+    """
+    if len(clusters) <= 1:
+        return [function(cluster) for cluster in clusters]
+    with ThreadPoolExecutor(max_workers=min(len(clusters), MAX_CLUSTER_CONCURRENCY)) as executor:
+        return list(executor.map(function, clusters))
+
+
+def request_clusters(
     devices: list[ClusterWithDevices],
     url: Template,
     uniconfig_cookies_multizone: UniconfigCookies | UniconfigCookiesMultizone,
-) -> UniconfigOutput:
-    responses = []
-    original_url = url
+) -> list[tuple[str, str, UniconfigRpcResponse]]:
+    """Send the RPC at url to all Uniconfig clusters of devices, returns url, tx_id, response."""
 
-    for device in devices:
-        url = original_url.substitute({"base_url": device.uc_cluster})
+    def request_cluster(device: ClusterWithDevices) -> tuple[str, str, UniconfigRpcResponse]:
+        cluster_url = url.substitute({"base_url": device.uc_cluster})
         uniconfig_cookies = uniconfig_cookies_multizone.get(device.uc_cluster, {})
         tx_id = uniconfig_cookies.get(UNICONFIGTXID, "")
-        data = create_request(device.device_names)
+        data = json_codec.dumps(create_commit_request(device.device_names))
+        response = request("POST", cluster_url, data=data, cookies=uniconfig_cookies)
+        return cluster_url, tx_id, response
 
-        response = request("POST", url, data=data, cookies=uniconfig_cookies)
+    return map_clusters(request_cluster, devices)
 
+
+def commit_uniconfig(
+    devices: list[ClusterWithDevices],
+    url: Template,
+    uniconfig_cookies_multizone: UniconfigCookies | UniconfigCookiesMultizone,
+) -> UniconfigOutput | UniconfigRpcResponse:
+    responses = []
+
+    for cluster_url, tx_id, response in request_clusters(devices, url, uniconfig_cookies_multizone):
         match response.code:
             case requests.codes.ok:
                 if response.data["output"]["overall-status"] == "complete":
                     responses.append(
                         {
-                            "url": str(url),
+                            "url": cluster_url,
                             "UNICONFIGTXID": tx_id,
                             "response_code": response.code,
                             "response_body": response.data,
                         }
                     )
             case _:
-                error_messages = {}
-                try:
-                    nodes = response.data["output"]["node-results"]["node-result"]
-
-                    for node in nodes:
-                        if node.get("error-message"):
-                            error_messages.update({node["node-id"]: node["error-message"]})
-
-                except KeyError:
-                    error_messages["uncaught_error"] = response
-
                 return response
 
     return UniconfigOutput(code=requests.codes.ok, data={"responses": responses})
@@ -172,24 +285,16 @@ def commit_uniconfig(
 
 def request_uniconfig(
     devices: list[ClusterWithDevices], url: Template, uniconfig_cookies_multizone: UniconfigCookies
-) -> UniconfigOutput:
+) -> UniconfigOutput | UniconfigRpcResponse:
     responses = []
 
-    original_url = url
-    for device in devices:
-        url = original_url.substitute({"base_url": device.uc_cluster})
-        uniconfig_cookies = uniconfig_cookies_multizone.get(device.uc_cluster, {})
-        tx_id = uniconfig_cookies.get("UNICONFIGTXID", "")
-        data = create_commit_request(device.device_names)
-
-        response = request("POST", url, data=json.dumps(data), cookies=uniconfig_cookies)
-
+    for cluster_url, tx_id, response in request_clusters(devices, url, uniconfig_cookies_multizone):
         match response.code:
             case requests.codes.ok:
                 if response.data["output"]["overall-status"] == "complete":
                     responses.append(
                         {
-                            "url": str(url),
+                            "url": cluster_url,
                             "UNICONFIGTXID": tx_id,
                             "response_code": response.code,
                             "response_body": response.data,
@@ -208,7 +313,10 @@ def create_tx_internal(uniconfig_cluster: str) -> UniconfigOutput:
     match response.code:
         case requests.codes.created:
             return UniconfigOutput(
-                code=response.code, data=UniconfigCookies(uniconfig_cookies=response.cookies).dict()
+                code=response.code,
+                data=UniconfigCookies(uniconfig_cookies=response.cookies).dict(
+                    by_alias=True, exclude_none=True
+                ),
             )
 
     return UniconfigOutput(code=response.code, data=response.data)
@@ -218,7 +326,8 @@ def close_tx_internal(uniconfig_cookies: TransactionMeta, uniconfig_cluster) ->
     tx_id = uniconfig_cookies.transaction_id
 
     id_url = uniconfig_url_uniconfig_tx_close.substitute({"base_url": uniconfig_cluster})
-    response = request("POST", id_url, cookies=uniconfig_cookies.dict())
+    cookies = uniconfig_cookies.dict(by_alias=True, exclude_none=True)
+    response = request("POST", id_url, cookies=cookies)
     match response.code:
         case requests.codes.ok:
             return UniconfigOutput(code=response.code, data={"UNICONFIGTXID": tx_id})
@@ -234,14 +343,23 @@ def close_tx_internal(uniconfig_cookies: TransactionMeta, uniconfig_cluster) ->
 
 
 def close_tx_multizone_internal(uniconfig_cookies_multizone: UniconfigCookiesMultizone):
+    """Close transactions of all Uniconfig clusters concurrently."""
+    clusters = list(uniconfig_cookies_multizone)
+    cookies = [
+        TransactionMeta(**dict(uniconfig_cookies_multizone.get(uc_cluster)))
+        for uc_cluster in clusters
+    ]
+    responses = map_clusters(
+        lambda cluster_cookies: close_tx_internal(*cluster_cookies), list(zip(cookies, clusters))
+    )
+
     close_tx_response = {}
     response_code = 200
-    for uc_cluster in uniconfig_cookies_multizone:
-        uniconfig_cookies = TransactionMeta(**dict(uniconfig_cookies_multizone.get(uc_cluster)))
-        tx_id = uniconfig_cookies.transaction_id
-        response = close_tx_internal(uniconfig_cookies, uc_cluster)
-
-        close_tx_response[uc_cluster] = {"UNICONFIGTXID": tx_id, "status": response.code}
+    for uc_cluster, uniconfig_cookies, response in zip(clusters, cookies, responses):
+        close_tx_response[uc_cluster] = {
+            "UNICONFIGTXID": uniconfig_cookies.transaction_id,
+            "status": response.code,
+        }
 
         match response.code:
             case 404 | 500 | 400:
@@ -250,6 +368,43 @@ def close_tx_multizone_internal(uniconfig_cookies_multizone: UniconfigCookiesMul
     return UniconfigOutput(code=response_code, data=close_tx_response)
 
 
+def create_tx_multizone_internal(devices: list[ClusterWithDevices]) -> UniconfigOutput:
+    """
+    Create transactions in all Uniconfig clusters of devices concurrently. If any of them fails,
+    the created ones are closed (concurrently) and the first failed cluster in the order of
+    devices is reported.
+    """
+    responses = map_clusters(lambda device: create_tx_internal(device.uc_cluster), devices)
+
+    uniconfig_cookies_multizone = {}
+    failed = None
+    for device, response in zip(devices, responses):
+        if response.code == requests.codes.created:
+            uniconfig_cookies_multizone[device.uc_cluster] = response.data["uniconfig_cookies"]
+        elif failed is None:
+            failed = (device, response)
+
+    if failed is not None:
+        device, response = failed
+        # Best effort closing opened transactions, if unsuccessful, UC cleans them up eventually
+        close_tx_multizone_internal(uniconfig_cookies_multizone)
+        return UniconfigOutput(
+            code=response.code,
+            data={"failed_zone": device.uc_cluster, "response": response.data},
+            logs=[
+                f'Unable to create multizone transactions. Failed for: "{device.uc_cluster}".Close sent to already opened transactions: "{uniconfig_cookies_multizone}"'
+            ],
+        )
+
+    return UniconfigOutput(
+        code=requests.codes.created if responses else 500,
+        data={"uniconfig_cookies_multizone": uniconfig_cookies_multizone},
+        logs=[
+            f'Transactions created successfully for: "{devices}" with context: "{uniconfig_cookies_multizone}"'
+        ],
+    )
+
+
 def find_opened_contexts_in_wf(failed_wf, response_json):
     opened_contexts = []
     committed_contexts = []
@@ -285,30 +440,110 @@ def find_opened_contexts_in_wf(failed_wf, response_json):
     return opened_contexts, committed_contexts
 
 
-# TODO finalize
-# def revert_tx_multizone(uniconfig_cookies_multizone):
-#     # return_logs.info("Reverting transactions in UCs on context: '%s'", uniconfig_cookies_multizone)
-#
-#     close_tx_response = {}
-#
-#     for uc_cluster in uniconfig_cookies_multizone:
-#         uniconfig_cookies = uniconfig_cookies_multizone[uc_cluster]
-#         tx_id = uniconfig_cookies["UNICONFIGTXID"]
-#         response = check_and_revert_tx(uniconfig_cookies, uc_cluster)
-#
-#         close_tx_response[uc_cluster] = {"UNICONFIGTXID": tx_id, "status": response["status"]}
-#
-#         if response["status"] != util.COMPLETED_STATUS:
-#             # Failing to revert is an error
-#             # return_logs.error(
-#             #     "Unable to revert multizone transactions for : '%s'. Response: '%s'",
-#             #     uc_cluster,
-#             #     response,
-#             # )
-#             return util.failed_response({"UNICONFIGTXID_multizone": close_tx_response})
-#
-#     # return_logs.info(
-#     #     "Multizone transactions reverted successfully for: '%s'",
-#     #     [zone for zone in uniconfig_cookies_multizone],
-#     # )
-#     return util.completed_response({"UNICONFIGTXID_multizone": close_tx_response})
+def revert_tx_multizone(uniconfig_cookies_multizone: UniconfigCookiesMultizone) -> UniconfigOutput:
+    """Revert committed transactions of all Uniconfig clusters concurrently."""
+    clusters = list(uniconfig_cookies_multizone)
+    cookies = [
+        TransactionMeta(**dict(uniconfig_cookies_multizone.get(uc_cluster)))
+        for uc_cluster in clusters
+    ]
+    responses = map_clusters(
+        lambda cluster_cookies: check_and_revert_tx(*cluster_cookies), list(zip(cookies, clusters))
+    )
+
+    revert_tx_response = {}
+    response_code = requests.codes.ok
+    for uc_cluster, uniconfig_cookies, response in zip(clusters, cookies, responses):
+        revert_tx_response[uc_cluster] = {
+            "UNICONFIGTXID": uniconfig_cookies.transaction_id,
+            "status": response.code,
+        }
+        # Failing to revert is an error, the first failed cluster is reported
+        if response.code != requests.codes.ok and response_code == requests.codes.ok:
+            logger.error(
+                "Unable to revert multizone transactions for: '%s'. Response: '%s'",
+                uc_cluster,
+                response.data,
+            )
+            response_code = response.code
+
+    return UniconfigOutput(code=response_code, data={"UNICONFIGTXID_multizone": revert_tx_response})
+
+
+def check_and_revert_tx(
+    uniconfig_cookies: TransactionMeta, uniconfig_cluster: str
+) -> UniconfigOutput:
+    """
+    Revert transaction of uniconfig_cookies in a dedicated transaction: 1. create the
+    transaction, 2. check the transaction log, 3. revert and 4. commit the reverted changes.
+    """
+    tx_id_to_revert = uniconfig_cookies.transaction_id
+
+    response = create_tx_internal(uniconfig_cluster)
+    if response.code != requests.codes.created:
+        # If we cannot create a dedicated transaction to perform rollback, we need to return error
+        return UniconfigOutput(
+            code=response.code,
+            data={"UNICONFIGTXID": tx_id_to_revert, "create_tx_response": response.data},
+        )
+
+    uniconfig_cookies_for_revert = response.data["uniconfig_cookies"]
+
+    # Check transaction log for failed transaction
+    id_url = uniconfig_url_uniconfig_tx_metadata.substitute(
+        {"base_url": uniconfig_cluster, "tx_id": tx_id_to_revert}
+    )
+    response = request("GET", id_url, cookies=uniconfig_cookies_for_revert)
+    if response.code == requests.codes.not_found:
+        # Transaction rollback can be skipped, there are no changes in that TX
+        close_tx_internal(TransactionMeta(**uniconfig_cookies_for_revert), uniconfig_cluster)
+        return UniconfigOutput(code=requests.codes.ok, data={"UNICONFIGTXID": tx_id_to_revert})
+    elif response.code != requests.codes.ok:
+        # Revert is attempted anyway, even though the log cannot be found due to unexpected error
+        logger.warning(
+            "Transaction log of '%s' not found, status code: '%s'. Will attempt revert anyway.",
+            tx_id_to_revert,
+            response.code,
+        )
+
+    response = revert_tx_internal(uniconfig_cluster, tx_id_to_revert, uniconfig_cookies_for_revert)
+    if response.code != requests.codes.ok:
+        return UniconfigOutput(
+            code=response.code,
+            data={"UNICONFIGTXID": tx_id_to_revert, "revert_response": response.data},
+        )
+
+    response = commit_uniconfig(
+        [ClusterWithDevices(uc_cluster=uniconfig_cluster, device_names=[])],
+        uniconfig_url_uniconfig_commit,
+        {uniconfig_cluster: uniconfig_cookies_for_revert},
+    )
+    if response.code != requests.codes.ok:
+        return UniconfigOutput(
+            code=response.code,
+            data={"UNICONFIGTXID": tx_id_to_revert, "commit_response": response.data},
+        )
+
+    return UniconfigOutput(code=requests.codes.ok, data={"UNICONFIGTXID": tx_id_to_revert})
+
+
+def revert_tx_internal(uniconfig_cluster: str, tx_id: str, uniconfig_cookies) -> UniconfigOutput:
+    id_url = uniconfig_url_uniconfig_tx_revert.substitute({"base_url": uniconfig_cluster})
+    data = {
+        "input": {
+            "ignore-non-existing-nodes": True,
+            "target-transactions": {"transaction": [tx_id]},
+        }
+    }
+    response = request("POST", id_url, data=json_codec.dumps(data), cookies=uniconfig_cookies)
+    if response.code != requests.codes.ok:
+        return UniconfigOutput(
+            code=response.code,
+            data={
+                "UNICONFIGTXID": tx_id,
+                "response_body": response.data,
+                "response_code": response.code,
+            },
+        )
+
+    return UniconfigOutput(code=response.code, data={"UNICONFIGTXID": tx_id})
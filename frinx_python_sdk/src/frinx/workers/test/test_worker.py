@@ -117,6 +117,8 @@ class TestWorker(ServiceWorkersImpl):
             return task_result
 
     class LoremIpsum(WorkerImpl):
+        cpu_bound = True
+
         class WorkerDefinition(TaskDefinition):
             name = "TEST_lorem_ipsum"
             description = "testing purposes: text generator"
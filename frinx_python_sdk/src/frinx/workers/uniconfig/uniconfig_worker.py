@@ -42,6 +42,37 @@ class Uniconfig(ServiceWorkersImpl):
 
     ###############################################################################
 
+    class UniconfigReadStructuredDeviceDataBulk(WorkerImpl):
+        class WorkerDefinition(TaskDefinition):
+            name = "UNICONFIG_read_structured_device_data_bulk"
+            description = (
+                "Read configuration or operational data of many devices in structured format"
+            )
+            labels = ["BASICS", "UNICONFIG", "OPENCONFIG"]
+            response_timeout_seconds = 600
+            timeout_seconds = 600
+
+        # Bulk outputs grow with the number of reads, large ones go to external storage
+        external_output_threshold = 1024 * 1024
+
+        class WorkerInput(TaskInput):
+            reads: Optional[list[dict[str, str] | list[str]]]
+            devices: Optional[str | list[str]]
+            uri: Optional[str]
+            uniconfig_context: Optional[dict[str, Any]]
+            max_concurrency: int = 10
+            timeout: float = 60
+
+        class WorkerOutput(TaskOutput):
+            response_code: int
+            response_body: Any
+
+        def execute(self, task: Task) -> TaskResult:
+            response = uniconfig.read_structured_data_bulk(**task.input_data)
+            return response_handler(response)
+
+    ###############################################################################
+
     class UniconfigWriteStructuredDeviceData(WorkerImpl):
         class WorkerDefinition(TaskDefinition):
             name = "UNICONFIG_write_structured_device_data"
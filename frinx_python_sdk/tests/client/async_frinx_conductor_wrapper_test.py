@@ -0,0 +1,194 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock
+from unittest.mock import Mock
+
+import aiohttp
+from aiohttp import test_utils
+from aiohttp import web
+from frinx.client.AsyncFrinxConductorWrapper import AsyncFrinxConductorWrapper
+from frinx.client.AsyncFrinxConductorWrapper import AsyncTaskUpdater
+from frinx.common.conductor_enums import TaskResultStatus
+from frinx.common.worker.task import Task
+from frinx.common.worker.task_def import TaskDefinition
+from frinx.common.worker.task_def import TaskInput
+from frinx.common.worker.task_result import TaskResult
+from frinx.common.worker.worker import WorkerImpl
+
+
+class AsyncEcho(WorkerImpl):
+    class WorkerDefinition(TaskDefinition):
+        name = "TEST_async_echo"
+        description = "testing purposes: returns input unchanged"
+
+    class WorkerInput(TaskInput):
+        input: str
+
+    async def execute(self, task: Task) -> TaskResult:
+        task_result = TaskResult(status=TaskResultStatus.COMPLETED)
+        task_result.add_output_data("output", task.input_data["input"])
+        return task_result
+
+
+def blocking_exec_function(task):
+    return {"status": "COMPLETED", "output": {"output": task["inputData"]["input"]}}
+
+
+class TestAsyncFrinxConductorWrapper(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.conductor = AsyncFrinxConductorWrapper("http://conductor/api", max_thread_count=2)
+        self.conductor.update_task_async = AsyncMock()
+
+    async def test_execute_coroutine_worker(self):
+        task = {"taskId": "1", "inputData": {"input": "hello"}}
+        await self.conductor.execute_async(task, AsyncEcho._execute_wrapper_async)
+
+        updated = self.conductor.update_task_async.call_args.args[0]
+        self.assertEqual("COMPLETED", updated["status"])
+        self.assertEqual({"output": "hello"}, updated["outputData"])
+
+    async def test_execute_blocking_worker_in_thread_pool(self):
+        task = {"taskId": "1", "inputData": {"input": "hello"}}
+        await self.conductor.execute_async(task, blocking_exec_function)
+
+        updated = self.conductor.update_task_async.call_args.args[0]
+        self.assertEqual("COMPLETED", updated["status"])
+        self.assertEqual({"output": "hello"}, updated["outputData"])
+
+    async def test_execute_failing_worker(self):
+        task = {"taskId": "1", "taskType": "TEST", "inputData": {}}
+        await self.conductor.execute_async(task, lambda _: None)
+
+        updated = self.conductor.update_task_async.call_args.args[0]
+        self.assertEqual("FAILED", updated["status"])
+        self.assertEqual("TEST", updated["outputData"]["Error while executing task"])
+
+    def test_register_coroutine_worker(self):
+        registered = {}
+
+        class Client:
+            def register(self, task_type, task_definition, exec_function, cpu_bound=False):
+                registered[task_type] = exec_function
+
+        AsyncEcho().register(Client())
+        self.assertEqual(AsyncEcho._execute_wrapper_async, registered["TEST_async_echo"])
+
+
+class TestAsyncFrinxConductorWrapperRun(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.conductor = AsyncFrinxConductorWrapper(
+            "http://conductor/api", max_thread_count=2, polling_interval=0.001
+        )
+        self.conductor.update_task_async = AsyncMock()
+
+    def test_task_definitions_registered(self):
+        self.conductor.register_task_definitions = Mock()
+        self.conductor.run = AsyncMock()
+
+        self.conductor.start_workers()
+
+        self.conductor.register_task_definitions.assert_called_once()
+        self.conductor.run.assert_awaited_once()
+
+    async def test_queue_read_failure_ends_run(self):
+        self.conductor.get_tasks_in_queue = AsyncMock(side_effect=Exception("unavailable"))
+
+        with self.assertRaisesRegex(Exception, "unavailable"):
+            await asyncio.wait_for(self.conductor.run(), 5)
+        self.assertEqual(11, self.conductor.get_tasks_in_queue.await_count)
+        self.assertTrue(self.conductor.shut_down)
+
+    async def test_stop_waits_for_running_tasks(self):
+        async def exec_function(task):
+            self.conductor.stop()
+            await asyncio.sleep(0.1)
+            return {"status": "COMPLETED", "output": {}}
+
+        self.conductor.register("TEST", None, exec_function)
+        self.conductor.get_tasks_in_queue = AsyncMock(return_value={"TEST": 1})
+        polled = [[{"taskId": "1"}]]
+        self.conductor.poll_for_batch = AsyncMock(
+            side_effect=lambda *args: polled.pop() if polled else []
+        )
+
+        await asyncio.wait_for(self.conductor.run(), 5)
+
+        updated = self.conductor.update_task_async.call_args.args[0]
+        self.assertEqual("COMPLETED", updated["status"])
+        self.assertEqual({}, self.conductor.in_flight_tasks)
+
+
+class TestAsyncTaskUpdater(unittest.IsolatedAsyncioTestCase):
+    async def test_update_retried(self):
+        request = AsyncMock(side_effect=[aiohttp.ClientConnectionError(), None])
+        task_updater = AsyncTaskUpdater(request, retry_delay=0.01)
+
+        self.assertTrue(await task_updater.update_with_retries_async({"taskId": "1"}))
+        self.assertEqual(2, request.await_count)
+
+    async def test_client_errors_not_retried(self):
+        error = aiohttp.ClientResponseError(Mock(), (), status=404)
+        request = AsyncMock(side_effect=error)
+        task_updater = AsyncTaskUpdater(request, retry_delay=0.01)
+
+        self.assertFalse(await task_updater.update_with_retries_async({"taskId": "1"}))
+        self.assertEqual(1, request.await_count)
+        self.assertTrue(AsyncTaskUpdater.is_retryable(asyncio.TimeoutError()))
+
+
+class TestAsyncFrinxConductorWrapperConductor(unittest.IsolatedAsyncioTestCase):
+    """Updates and external payloads sent over the aiohttp session to a fake Conductor."""
+
+    async def asyncSetUp(self) -> None:
+        self.updates = []
+        self.storage = {"input.json": json.dumps({"input": "stored"}).encode()}
+        app = web.Application()
+        app.router.add_get("/api/tasks/externalstoragelocation", self.location)
+        app.router.add_post("/api/tasks", self.update)
+        app.router.add_route("*", "/storage/{path}", self.stored)
+        self.server = test_utils.TestServer(app)
+        await self.server.start_server()
+        self.addAsyncCleanup(self.server.close)
+
+        url = str(self.server.make_url("/api"))
+        self.conductor = AsyncFrinxConductorWrapper(url, external_output_threshold=100)
+        self.conductor.session = aiohttp.ClientSession()
+        self.addAsyncCleanup(self.conductor.session.close)
+
+    async def location(self, request):
+        path = request.query["path"] or "output.json"
+        uri = str(self.server.make_url(f"/storage/{path}"))
+        return web.json_response({"uri": uri, "path": path})
+
+    async def update(self, request):
+        self.updates.append(await request.json())
+        return web.Response(text="1")
+
+    async def stored(self, request):
+        path = request.match_info["path"]
+        if request.method == "PUT":
+            self.storage[path] = await request.read()
+            return web.Response()
+        return web.Response(body=self.storage[path], content_type="application/json")
+
+    async def test_external_input_downloaded(self):
+        task = {"taskId": "1", "externalInputPayloadStoragePath": "input.json"}
+        task = await self.conductor.replace_external_payload_input(task)
+
+        self.assertEqual({"input": "stored"}, task["inputData"])
+        self.assertNotIn("externalInputPayloadStoragePath", task)
+
+    async def test_large_output_uploaded(self):
+        output = {"text": "x" * 200}
+        task = {"taskId": "1", "status": "COMPLETED", "outputData": output}
+        await self.conductor.update_task_async(task)
+
+        self.assertEqual(output, json.loads(self.storage["output.json"]))
+        self.assertEqual(1, len(self.updates))
+        self.assertEqual({}, self.updates[0]["outputData"])
+        self.assertEqual("output.json", self.updates[0]["externalOutputPayloadStoragePath"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from unittest.mock import MagicMock
+
+from frinx.client.conductor import TaskClient
+from frinx.client.conductor import WFClientMgr
+
+
+class TestWFClientMgr(unittest.TestCase):
+    def test_clients_share_pooled_session(self):
+        wfc_mgr = WFClientMgr("http://conductor/api", pool_size=42, timeout=5, retries=2)
+
+        for client in [wfc_mgr.taskClient, wfc_mgr.metadataClient, wfc_mgr.workflowClient]:
+            self.assertIs(wfc_mgr.session, client.session)
+            self.assertEqual(5, client.timeout)
+
+        adapter = wfc_mgr.session.get_adapter("http://conductor/api")
+        self.assertEqual(42, adapter._pool_maxsize)
+        self.assertEqual(2, adapter.max_retries.total)
+        self.assertNotIn("POST", adapter.max_retries.allowed_methods)
+
+    def test_request_timeout(self):
+        session = MagicMock()
+        session.get.return_value.content = b""
+        task_client = TaskClient("http://conductor/api", session=session, timeout=(1, 30))
+
+        task_client.getTasksInQueue("all")
+
+        session.get.assert_called_once_with(
+            "http://conductor/api/tasks/queue/all",
+            params=None,
+            headers=task_client.headers,
+            timeout=(1, 30),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from frinx.client.DefinitionRegistrar import DefinitionRegistrar
+from frinx.client.DefinitionRegistrar import definition_hash
+from frinx.client.DefinitionRegistrar import is_subset
+from frinx.client.FrinxConductorWrapper import FrinxConductorWrapper
+
+
+def task_def(name, timeout=60):
+    return {"name": name, "timeoutSeconds": timeout, "inputKeys": ["device_id"]}
+
+
+def stored_task_def(name, timeout=60):
+    # Conductor adds audit fields and defaults to stored definitions
+    return {**task_def(name, timeout), "createTime": 1680000000000, "retryCount": 3}
+
+
+class TestDefinitionRegistrar(unittest.TestCase):
+    def setUp(self) -> None:
+        self.metadata_client = MagicMock()
+        self.metadata_client.getAllTaskDefs.return_value = [
+            stored_task_def("TEST_echo"),
+            stored_task_def("TEST_sleep", timeout=600),
+        ]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_file = os.path.join(directory.name, "definitions.json")
+
+    def test_only_changed_registered(self):
+        registrar = DefinitionRegistrar(self.metadata_client)
+        changed = registrar.register_task_defs(
+            [task_def("TEST_echo"), task_def("TEST_sleep", timeout=60), task_def("TEST_new")]
+        )
+
+        self.assertEqual(["TEST_sleep", "TEST_new"], changed)
+        self.metadata_client.getAllTaskDefs.assert_called_once()
+        self.metadata_client.registerTaskDefs.assert_called_once_with(
+            [task_def("TEST_sleep", timeout=60), task_def("TEST_new")]
+        )
+
+    def test_nothing_registered(self):
+        registrar = DefinitionRegistrar(self.metadata_client)
+        self.assertEqual([], registrar.register_task_defs([task_def("TEST_echo")]))
+        self.metadata_client.registerTaskDefs.assert_not_called()
+
+    def test_all_registered_when_definitions_not_readable(self):
+        self.metadata_client.getAllTaskDefs.side_effect = Exception("unavailable")
+        registrar = DefinitionRegistrar(self.metadata_client)
+        registrar.register_task_defs([task_def("TEST_echo")])
+        self.metadata_client.registerTaskDefs.assert_called_once_with([task_def("TEST_echo")])
+
+    def test_cache_file(self):
+        registrar = DefinitionRegistrar(self.metadata_client, self.cache_file, "http://conductor")
+        registrar.register_task_defs([task_def("TEST_echo"), task_def("TEST_new")])
+        self.assertEqual(1, self.metadata_client.getAllTaskDefs.call_count)
+
+        # Unchanged definitions, Conductor is not contacted
+        registrar.register_task_defs([task_def("TEST_new"), task_def("TEST_echo")])
+        self.assertEqual(1, self.metadata_client.getAllTaskDefs.call_count)
+        self.assertEqual(1, self.metadata_client.registerTaskDefs.call_count)
+
+        registrar.register_task_defs([task_def("TEST_echo", timeout=30)])
+        self.assertEqual(2, self.metadata_client.getAllTaskDefs.call_count)
+        self.metadata_client.registerTaskDefs.assert_called_with([task_def("TEST_echo", 30)])
+
+        # Cache is kept per Conductor server
+        other = DefinitionRegistrar(self.metadata_client, self.cache_file, "http://other")
+        other.register_task_defs([task_def("TEST_echo", timeout=30)])
+        self.assertEqual(3, self.metadata_client.getAllTaskDefs.call_count)
+
+    def test_failed_registration_not_cached(self):
+        self.metadata_client.registerTaskDefs.side_effect = Exception("rejected")
+        registrar = DefinitionRegistrar(self.metadata_client, self.cache_file)
+        with self.assertRaises(Exception):
+            registrar.register_task_defs([task_def("TEST_new")])
+        self.assertEqual({}, registrar.load_cache())
+
+    def test_workflow_defs(self):
+        stored = {
+            "name": "Test_workflow",
+            "version": 1,
+            "tasks": [{"name": "TEST_echo", "type": "SIMPLE", "optional": False}],
+            "updateTime": 1680000000000,
+        }
+        self.metadata_client.getAllWorkflowDefs.return_value = [stored]
+        registrar = DefinitionRegistrar(self.metadata_client)
+
+        workflow = {"name": "Test_workflow", "version": 1, "tasks": [{"name": "TEST_echo"}]}
+        self.assertEqual([], registrar.register_workflow_defs([workflow]))
+
+        workflow_v2 = {**workflow, "version": 2}
+        self.assertEqual(["Test_workflow:2"], registrar.register_workflow_defs([workflow_v2]))
+        self.metadata_client.updateWorkflowDefs.assert_called_once_with([workflow_v2])
+
+    def test_is_subset(self):
+        self.assertTrue(is_subset({"a": [{"b": 1}]}, {"a": [{"b": 1, "c": 2}], "d": 3}))
+        self.assertFalse(is_subset({"a": [{"b": 1}]}, {"a": [{"b": 1}, {"b": 2}]}))
+        self.assertFalse(is_subset({"a": 1}, {}))
+        self.assertEqual(definition_hash({"a": 1, "b": 2}), definition_hash({"b": 2, "a": 1}))
+
+
+class TestTaskDefinitionRegistration(unittest.TestCase):
+    def test_definitions_registered_in_one_request(self):
+        from frinx.workers.test.test_worker import TestWorker
+
+        conductor = FrinxConductorWrapper("http://conductor/api", max_thread_count=1)
+        conductor.metadataClient = MagicMock()
+        conductor.metadataClient.getAllTaskDefs.return_value = []
+        TestWorker().register(conductor)
+        conductor.metadataClient.registerTaskDefs.assert_not_called()
+
+        conductor.register_task_definitions()
+        conductor.metadataClient.registerTaskDefs.assert_called_once()
+        names = [
+            task_def["name"]
+            for task_def in conductor.metadataClient.registerTaskDefs.call_args[0][0]
+        ]
+        self.assertIn("TEST_echo", names)
+        self.assertIn("TEST_sleep", names)
+
+        conductor.register_task_definitions()
+        conductor.metadataClient.registerTaskDefs.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
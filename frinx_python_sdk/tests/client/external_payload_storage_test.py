@@ -0,0 +1,119 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import requests
+from frinx.client.ExternalPayloadStorage import ExternalPayloadStorage
+
+PAYLOAD = {"devices": [f"device_{i}" for i in range(10000)]}
+
+
+class PayloadHandler(BaseHTTPRequestHandler):
+    downloads = 0
+    uploaded = {}
+
+    def do_GET(self):
+        PayloadHandler.downloads += 1
+        content = json.dumps(PAYLOAD).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_PUT(self):
+        PayloadHandler.uploaded[self.path] = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestExternalPayloadStorage(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), PayloadHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        PayloadHandler.downloads = 0
+        PayloadHandler.uploaded = {}
+
+        self.task_client = MagicMock()
+        self.task_client.session = requests.Session()
+        self.task_client.headers = {}
+        self.task_client.timeout = 5
+        self.task_client.getTaskInputExternalPayloadLocation.return_value = {
+            "uri": "http://127.0.0.1:%s/payload" % self.server.server_port
+        }
+        self.task_client.getTaskOutputExternalPayloadLocation.return_value = {
+            "uri": "http://127.0.0.1:%s/output/1.json" % self.server.server_port,
+            "path": "task/output/1.json",
+        }
+        self.task_client.EXTERNAL_OUTPUT_KEY = "externalOutputPayloadStoragePath"
+
+    def test_download_cached(self):
+        storage = ExternalPayloadStorage(self.task_client, cache_size=1024 * 1024)
+
+        self.assertEqual(PAYLOAD, storage.get_input("task/input/1.json"))
+        self.assertEqual(PAYLOAD, storage.get_input("task/input/1.json"))
+        self.assertEqual(1, PayloadHandler.downloads)
+
+    def test_cache_evicts_least_recently_used(self):
+        size = len(json.dumps(PAYLOAD))
+        storage = ExternalPayloadStorage(self.task_client, cache_size=size * 2)
+        for path in ["1.json", "2.json", "1.json", "3.json"]:
+            storage.get_input(path)
+
+        self.assertEqual(["1.json", "3.json"], list(storage.cache))
+        self.assertEqual(size * 2, storage.cached_bytes)
+
+    def test_payload_size_limited(self):
+        storage = ExternalPayloadStorage(self.task_client, max_payload_size=1000)
+        with self.assertRaises(Exception):
+            storage.get_input("task/input/1.json")
+
+    def test_prefetch(self):
+        storage = ExternalPayloadStorage(self.task_client, prefetch_threads=2)
+        self.addCleanup(storage.shutdown)
+        storage.prefetch("1.json")
+        storage.prefetch("2.json")
+
+        self.assertEqual(PAYLOAD, storage.get_input("1.json"))
+        self.assertEqual(PAYLOAD, storage.get_input("2.json"))
+        self.assertEqual({}, storage.prefetched)
+        self.assertEqual(2, PayloadHandler.downloads)
+
+    def test_large_output_uploaded(self):
+        storage = ExternalPayloadStorage(self.task_client, output_threshold=1000)
+        task = {"taskId": "1", "outputData": PAYLOAD}
+
+        self.assertTrue(storage.externalize_output(task))
+        self.assertEqual({}, task["outputData"])
+        self.assertEqual("task/output/1.json", task["externalOutputPayloadStoragePath"])
+        self.assertEqual(PAYLOAD, json.loads(PayloadHandler.uploaded["/output/1.json"]))
+
+    def test_small_output_inline(self):
+        storage = ExternalPayloadStorage(self.task_client, output_threshold=1000)
+        task = {"taskId": "1", "outputData": {"output": "small"}}
+
+        self.assertFalse(storage.externalize_output(task))
+        self.assertEqual({"output": "small"}, task["outputData"])
+        self.assertEqual({}, PayloadHandler.uploaded)
+
+    def test_output_threshold_of_task_type(self):
+        storage = ExternalPayloadStorage(self.task_client)
+        storage.output_thresholds["TEST_bulk"] = 1000
+
+        self.assertFalse(storage.externalize_output({"taskId": "1", "outputData": PAYLOAD}))
+        task = {"taskId": "2", "taskType": "TEST_bulk", "outputData": PAYLOAD}
+        self.assertTrue(storage.externalize_output(task))
+        self.assertEqual({}, task["outputData"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,461 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+from frinx.client.FrinxConductorWrapper import FrinxConductorWrapper
+from frinx.client.FrinxConductorWrapper import NextWorkerTask
+from frinx.client.FrinxConductorWrapper import PrefetchBuffer
+from frinx.client.FrinxConductorWrapper import ProcessPoolTaskExecutor
+from frinx.client.FrinxConductorWrapper import TaskSource
+from frinx.client.FrinxConductorWrapper import TaskTypeScheduling
+from frinx.client.FrinxConductorWrapper import TaskUpdater
+from frinx.common.event_loop import event_loop_thread
+
+
+def exec_function(task):
+    return {"status": "COMPLETED", "output": {"echo": task["inputData"]}, "logs": []}
+
+
+class TestTaskSource(unittest.TestCase):
+    def test_get_next_batch_limited_by_queue_size(self):
+        task_source = TaskSource()
+        task_source.register_task_type("TEST_echo", exec_function)
+        task_source.handle_tasks({"TEST_echo": 3, "UNKNOWN": 10})
+
+        next_batch = task_source.get_next_batch(10)
+        self.assertEqual("TEST_echo", next_batch.task_type)
+        self.assertEqual(3, next_batch.count)
+        self.assertEqual(3, task_source.actual_task_types_running["TEST_echo"])
+        self.assertIsNone(task_source.get_next_batch(10))
+
+        task_source.task_finished("TEST_echo", 3)
+        self.assertEqual(0, task_source.actual_task_types_running["TEST_echo"])
+
+    def test_get_next_batch_limited_by_max_count(self):
+        task_source = TaskSource()
+        task_source.register_task_type("TEST_echo", exec_function)
+        task_source.handle_tasks({"TEST_echo": 30})
+
+        self.assertEqual(10, task_source.get_next_batch(10).count)
+        self.assertEqual(20, task_source.filtered_queue["TEST_echo"])
+
+    def test_single_queued_type_among_many(self):
+        task_source = TaskSource()
+        for i in range(1000):
+            task_source.register_task_type(f"TYPE_{i}", exec_function)
+        task_source.handle_tasks({"TYPE_999": 2})
+
+        self.assertEqual("TYPE_999", task_source.get_next_task(None).task_type)
+        self.assertEqual("TYPE_999", task_source.get_next_task("TYPE_999").task_type)
+        self.assertIsNone(task_source.get_next_task("TYPE_999"))
+        self.assertEqual(set(), task_source.ready_task_types)
+
+    def test_round_robin_kept_across_queue_reads(self):
+        task_source = TaskSource()
+        for task_type in ["TEST_echo", "TEST_sleep", "TEST_lorem_ipsum"]:
+            task_source.register_task_type(task_type, exec_function)
+        queue = {"TEST_echo": 10, "TEST_sleep": 10, "TEST_lorem_ipsum": 10}
+        task_source.handle_tasks(queue)
+
+        picked = [task_source.get_next_task(None).task_type for _ in range(2)]
+        task_source.handle_tasks(queue)
+        picked.append(task_source.get_next_task(None).task_type)
+        self.assertEqual(["TEST_echo", "TEST_sleep", "TEST_lorem_ipsum"], picked)
+
+    def test_waiting_consumer_woken_by_queue_read(self):
+        task_source = TaskSource()
+        task_source.register_task_type("TEST_echo", exec_function)
+        woken = threading.Event()
+
+        def consumer():
+            task_source.wait_for_tasks(timeout=10)
+            woken.set()
+
+        threading.Thread(target=consumer, daemon=True).start()
+        self.assertFalse(task_source.handle_tasks({"UNKNOWN": 1}))
+        self.assertFalse(woken.wait(0.1))
+
+        self.assertTrue(task_source.handle_tasks({"TEST_echo": 1}))
+        self.assertTrue(woken.wait(1))
+
+
+class TestTaskTypeScheduling(unittest.TestCase):
+    def test_max_concurrency(self):
+        task_source = TaskSource()
+        task_source.register_task_type(
+            "UNICONFIG_commit", exec_function, TaskTypeScheduling(max_concurrency=2)
+        )
+        task_source.register_task_type("TEST_echo", exec_function)
+        task_source.handle_tasks({"UNICONFIG_commit": 100, "TEST_echo": 100})
+
+        picked = [task_source.get_next_task(None).task_type for _ in range(6)]
+        self.assertEqual(2, picked.count("UNICONFIG_commit"))
+        self.assertEqual(4, picked.count("TEST_echo"))
+
+        self.assertEqual("TEST_echo", task_source.get_next_batch(10).task_type)
+        task_source.task_finished("UNICONFIG_commit")
+        next_batch = task_source.get_next_batch(10)
+        self.assertEqual("UNICONFIG_commit", next_batch.task_type)
+        self.assertEqual(1, next_batch.count)
+
+    def test_weights(self):
+        task_source = TaskSource()
+        task_source.register_task_type("TEST_echo", exec_function, TaskTypeScheduling(weight=3))
+        task_source.register_task_type("TEST_sleep", exec_function)
+        task_source.handle_tasks({"TEST_echo": 100, "TEST_sleep": 100})
+
+        picked = [task_source.get_next_task(None).task_type for _ in range(8)]
+        self.assertEqual(6, picked.count("TEST_echo"))
+        self.assertEqual(2, picked.count("TEST_sleep"))
+
+    def test_priority(self):
+        task_source = TaskSource()
+        task_source.register_task_type("TEST_sleep", exec_function)
+        task_source.register_task_type(
+            "TEST_echo", exec_function, TaskTypeScheduling(max_concurrency=2, priority=1)
+        )
+        task_source.handle_tasks({"TEST_echo": 100, "TEST_sleep": 100})
+
+        picked = [task_source.get_next_task(None).task_type for _ in range(4)]
+        self.assertEqual(["TEST_echo", "TEST_echo", "TEST_sleep", "TEST_sleep"], picked)
+
+    def test_deepest_queue_first(self):
+        task_source = TaskSource(dispatch_order="deepest")
+        for task_type in ["TEST_echo", "TEST_sleep", "TEST_lorem_ipsum"]:
+            task_source.register_task_type(task_type, exec_function)
+        task_source.handle_tasks({"TEST_echo": 2, "TEST_sleep": 5, "TEST_lorem_ipsum": 3})
+
+        self.assertEqual("TEST_sleep", task_source.get_next_batch(3).task_type)
+        self.assertEqual("TEST_lorem_ipsum", task_source.get_next_batch(3).task_type)
+
+    def test_oldest_queue_first(self):
+        task_source = TaskSource(dispatch_order="oldest")
+        for task_type in ["TEST_echo", "TEST_sleep"]:
+            task_source.register_task_type(task_type, exec_function)
+        task_source.handle_tasks({"TEST_sleep": 5})
+        task_source.handle_tasks({"TEST_echo": 5, "TEST_sleep": 5})
+
+        self.assertEqual("TEST_sleep", task_source.get_next_task(None).task_type)
+
+    def test_limit_from_task_definition(self):
+        conductor = FrinxConductorWrapper("http://conductor/api", max_thread_count=1)
+        scheduling = conductor.get_task_type_scheduling(
+            "UNICONFIG_commit", {"concurrentExecLimit": 10, "limitToThreadCount": 5}
+        )
+        self.assertEqual(5, scheduling.max_concurrency)
+        self.assertIsNone(conductor.get_task_type_scheduling("TEST_echo", {}).max_concurrency)
+
+
+class TestQueueRead(unittest.TestCase):
+    def test_read_only_registered_queues(self):
+        conductor = FrinxConductorWrapper("http://conductor/api", max_thread_count=1)
+        conductor.task_source.register_task_type("TEST_echo", exec_function)
+        conductor.task_source.register_task_type("TEST_sleep", exec_function)
+        self.assertEqual(["TEST_echo", "TEST_sleep"], conductor.task_source.registered_task_types)
+
+
+class TestAdaptivePolling(unittest.TestCase):
+    def test_backoff_while_queues_empty(self):
+        conductor = FrinxConductorWrapper(
+            "http://conductor/api", max_thread_count=1, polling_interval=0.1, max_polling_interval=1
+        )
+        intervals = [conductor.polling_interval]
+        for _ in range(5):
+            intervals.append(conductor.next_polling_interval(intervals[-1], has_tasks=False))
+        self.assertEqual([0.1, 0.2, 0.4, 0.8, 1, 1], intervals)
+
+        self.assertEqual(0.1, conductor.next_polling_interval(1, has_tasks=True))
+
+
+class TestBatchPoll(unittest.TestCase):
+    def test_dispatch_and_consume(self):
+        conductor = FrinxConductorWrapper(
+            "http://conductor/api", max_thread_count=4, batch_poll=True, poll_batch_size=3
+        )
+        conductor.taskClient = MagicMock()
+        updated = []
+        done = threading.Event()
+
+        def update_task(task):
+            updated.append(task)
+            if len(updated) == 5:
+                done.set()
+
+        polled = [{"taskId": str(i), "inputData": {"i": i}} for i in range(5)]
+        conductor.taskClient.pollForBatch.side_effect = (
+            lambda task_type, count, timeout, worker_id: [polled.pop() for _ in range(count)]
+        )
+        conductor.taskClient.updateTask.side_effect = update_task
+        conductor.taskClient.EXTERNAL_INPUT_KEY = "externalInputPayloadStoragePath"
+        conductor.task_source.register_task_type("TEST_echo", exec_function)
+        conductor.task_source.handle_tasks({"TEST_echo": 5})
+
+        for target in [conductor.dispatch_tasks] + [conductor.consume_polled_task] * 4:
+            threading.Thread(target=target, daemon=True).start()
+
+        self.assertTrue(done.wait(5))
+        self.assertEqual({"COMPLETED"}, {task["status"] for task in updated})
+        for call in conductor.taskClient.pollForBatch.call_args_list:
+            self.assertLessEqual(call.args[1], 3)
+
+
+class TestTaskUpdater(unittest.TestCase):
+    def test_update_retried(self):
+        task_client = MagicMock()
+        task_client.updateTask.side_effect = [
+            requests.ConnectionError("Conductor unavailable"),
+            None,
+        ]
+        task_updater = TaskUpdater(task_client, thread_count=1, retry_delay=0.01)
+        task_updater.start()
+
+        task_updater.submit({"taskId": "1", "status": "COMPLETED"})
+        task_updater.pending_updates.join()
+
+        self.assertEqual(2, task_client.updateTask.call_count)
+
+    def test_update_given_up_after_max_retries(self):
+        task_client = MagicMock()
+        task_client.updateTask.side_effect = requests.ConnectionError("Conductor unavailable")
+        task_updater = TaskUpdater(task_client, max_retries=2, retry_delay=0.01)
+
+        self.assertFalse(task_updater.update_with_retries({"taskId": "1"}))
+        self.assertEqual(3, task_client.updateTask.call_count)
+
+    def test_client_errors_not_retried(self):
+        response = requests.Response()
+        response.status_code = 404
+        task_client = MagicMock()
+        task_client.updateTask.side_effect = requests.HTTPError(response=response)
+        task_updater = TaskUpdater(task_client, max_retries=2, retry_delay=0.01)
+
+        self.assertFalse(task_updater.update_with_retries({"taskId": "1"}))
+        self.assertEqual(1, task_client.updateTask.call_count)
+
+        response.status_code = 503
+        self.assertTrue(TaskUpdater.is_retryable(requests.HTTPError(response=response)))
+        self.assertFalse(TaskUpdater.is_retryable(TypeError("Object is not JSON serializable")))
+
+    def test_retry_delay_bounded(self):
+        task_updater = TaskUpdater(MagicMock(), retry_delay=1, max_retry_delay=5)
+        for attempt in range(10):
+            self.assertLessEqual(task_updater.get_retry_delay(attempt), 5)
+
+
+class TestPrefetch(unittest.TestCase):
+    def test_buffered_tasks(self):
+        prefetch_buffer = PrefetchBuffer(MagicMock(), "worker", prefetch_count=3)
+        self.assertEqual(3, prefetch_buffer.missing("TEST_echo"))
+        prefetch_buffer.put("TEST_echo", [{"taskId": "1"}, {"taskId": "2"}])
+
+        self.assertEqual(1, prefetch_buffer.missing("TEST_echo"))
+        self.assertEqual(
+            {"TEST_echo": 3, "TEST_sleep": 1},
+            prefetch_buffer.add_depths({"TEST_echo": 1, "TEST_sleep": 1}),
+        )
+        self.assertEqual("1", prefetch_buffer.take("TEST_echo")["taskId"])
+        self.assertEqual("2", prefetch_buffer.take("TEST_echo")["taskId"])
+        self.assertIsNone(prefetch_buffer.take("TEST_echo"))
+
+        metrics = prefetch_buffer.metrics()
+        self.assertEqual({"TEST_echo": 0}, metrics["depth"])
+        self.assertEqual(2, metrics["hits"])
+        self.assertEqual(1, metrics["misses"])
+
+    def test_expiring_tasks_acked(self):
+        task_client = MagicMock()
+        prefetch_buffer = PrefetchBuffer(task_client, "worker", prefetch_count=3, lease_margin=5)
+        prefetch_buffer.put(
+            "TEST_echo", [{"taskId": "1", "responseTimeoutSeconds": 3}, {"taskId": "2"}]
+        )
+
+        prefetch_buffer.expire_tasks()
+        updated = task_client.updateTask.call_args.args[0]
+        self.assertEqual(
+            {"taskId": "1", "status": "IN_PROGRESS", "callbackAfterSeconds": 0},
+            {key: updated[key] for key in ("taskId", "status", "callbackAfterSeconds")},
+        )
+        self.assertEqual("2", prefetch_buffer.take("TEST_echo")["taskId"])
+        self.assertEqual(1, prefetch_buffer.metrics()["acked"])
+
+    def test_expiring_tasks_dropped(self):
+        task_client = MagicMock()
+        prefetch_buffer = PrefetchBuffer(task_client, "worker", 3, expiry_policy="drop")
+        prefetch_buffer.put("TEST_echo", [{"taskId": "1", "responseTimeoutSeconds": 1}])
+
+        self.assertIsNone(prefetch_buffer.take("TEST_echo"))
+        self.assertFalse(task_client.updateTask.called)
+        self.assertEqual(1, prefetch_buffer.metrics()["dropped"])
+
+    def test_poll_task_prefetches(self):
+        conductor = FrinxConductorWrapper(
+            "http://conductor/api", max_thread_count=1, prefetch_count=2
+        )
+        conductor.taskClient = MagicMock()
+        conductor.taskClient.pollForBatch.return_value = [{"taskId": "1"}, {"taskId": "2"}]
+        conductor.task_source.register_task_type("TEST_echo", exec_function)
+        conductor.task_source.handle_tasks({"TEST_echo": 5})
+        next_task = NextWorkerTask()
+        next_task.task_type = "TEST_echo"
+
+        self.assertEqual("1", conductor.poll_task(next_task)["taskId"])
+        self.assertEqual(3, conductor.taskClient.pollForBatch.call_args.args[1])
+        self.assertEqual("2", conductor.poll_task(next_task)["taskId"])
+        self.assertEqual(1, conductor.taskClient.pollForBatch.call_count)
+        self.assertFalse(conductor.taskClient.pollForTask.called)
+
+
+class TestShutdown(unittest.TestCase):
+    def create_conductor(self, exec_function):
+        conductor = FrinxConductorWrapper(
+            "http://conductor/api", max_thread_count=1, polling_interval=0.01
+        )
+        conductor.taskClient = MagicMock()
+        conductor.taskClient.EXTERNAL_INPUT_KEY = "externalInputPayloadStoragePath"
+        conductor.taskClient.getTaskQueueSizes.return_value = {"TEST_echo": 1}
+        conductor.taskClient.pollForTask.side_effect = [
+            {"taskId": "1", "workflowInstanceId": "wf", "inputData": {}}
+        ] + [None] * 1000
+        conductor.task_source.register_task_type("TEST_echo", exec_function)
+        return conductor
+
+    def test_running_task_finished_before_shutdown(self):
+        started = threading.Event()
+
+        def slow_exec_function(task):
+            started.set()
+            time.sleep(0.2)
+            return exec_function(task)
+
+        conductor = self.create_conductor(slow_exec_function)
+        worker = threading.Thread(target=conductor.start_workers, daemon=True)
+        worker.start()
+        self.assertTrue(started.wait(5))
+
+        self.assertTrue(conductor.shutdown(timeout=5))
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+        updated = conductor.taskClient.updateTask.call_args.args[0]
+        self.assertEqual("COMPLETED", updated["status"])
+
+    def test_unfinished_task_postponed(self):
+        started = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def blocked_exec_function(task):
+            started.set()
+            release.wait(5)
+            return exec_function(task)
+
+        conductor = self.create_conductor(blocked_exec_function)
+        threading.Thread(target=conductor.start_workers, daemon=True).start()
+        self.assertTrue(started.wait(5))
+
+        conductor.process_executor = MagicMock()
+        self.assertFalse(conductor.shutdown(timeout=0.1, callback_after_seconds=5))
+        conductor.process_executor.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+        updated = conductor.taskClient.updateTask.call_args.args[0]
+        self.assertEqual("IN_PROGRESS", updated["status"])
+        self.assertEqual(5, updated["callbackAfterSeconds"])
+        self.assertEqual("1", updated["taskId"])
+
+    def test_not_started_tasks_returned(self):
+        conductor = FrinxConductorWrapper(
+            "http://conductor/api", max_thread_count=1, prefetch_count=2
+        )
+        conductor.taskClient = MagicMock()
+        conductor.prefetch_buffer.put("TEST_echo", [{"taskId": "1"}, {"taskId": "2"}])
+
+        # Returned without shutdown_callback_after_seconds set
+        self.assertTrue(conductor.shutdown(timeout=1))
+        updated = [call.args[0] for call in conductor.taskClient.updateTask.call_args_list]
+        self.assertEqual(["1", "2"], [task["taskId"] for task in updated])
+        self.assertEqual(
+            {("IN_PROGRESS", 0)},
+            {(task["status"], task["callbackAfterSeconds"]) for task in updated},
+        )
+
+    def test_updates_flushed(self):
+        task_client = MagicMock()
+        task_client.updateTask.side_effect = lambda task: time.sleep(0.1)
+        task_updater = TaskUpdater(task_client, thread_count=1)
+        task_updater.start()
+        task_updater.submit({"taskId": "1"})
+        task_updater.submit({"taskId": "2"})
+
+        self.assertFalse(task_updater.flush(0.01))
+        self.assertTrue(task_updater.flush(5))
+        self.assertEqual(2, task_client.updateTask.call_count)
+
+
+class TestExecute(unittest.TestCase):
+    def test_coroutines_share_event_loop(self):
+        loops = []
+
+        async def async_exec_function(task):
+            loops.append(asyncio.get_running_loop())
+            return exec_function(task)
+
+        conductor = FrinxConductorWrapper("http://conductor/api", max_thread_count=1)
+        conductor.taskClient = MagicMock()
+        for task_id in ["1", "2"]:
+            conductor.execute({"taskId": task_id, "inputData": {}}, async_exec_function)
+
+        self.assertEqual(2, conductor.taskClient.updateTask.call_count)
+        updated = conductor.taskClient.updateTask.call_args.args[0]
+        self.assertEqual("COMPLETED", updated["status"])
+        self.assertIs(loops[0], loops[1])
+        self.assertIs(event_loop_thread.get_loop(), loops[0])
+
+
+class TestProcessPoolTaskExecutor(unittest.TestCase):
+    def test_execute_cpu_bound_worker(self):
+        from frinx.workers.test.test_worker import TestWorker
+
+        process_executor = ProcessPoolTaskExecutor(max_process_count=1)
+        self.addCleanup(process_executor.shutdown)
+        task = {
+            "taskId": "1",
+            "inputData": {"num_paragraphs": 2, "num_sentences": 2, "num_words": 2},
+        }
+
+        response = process_executor.execute(TestWorker.LoremIpsum._execute_wrapper, task)
+
+        self.assertEqual("COMPLETED", response["status"])
+        self.assertEqual(len(response["output"]["text"]), response["output"]["bytes"])
+
+    def test_register_cpu_bound_worker(self):
+        from frinx.workers.test.test_worker import TestWorker
+
+        conductor = FrinxConductorWrapper("http://conductor/api", max_thread_count=1)
+        conductor.metadataClient = MagicMock()
+        TestWorker.LoremIpsum().register(conductor)
+        TestWorker.Echo().register(conductor)
+
+        lorem_ipsum = conductor.task_source.task_types["TEST_lorem_ipsum"].exec_function
+        self.assertEqual(conductor.process_executor.execute, lorem_ipsum.func)
+        echo = conductor.task_source.task_types["TEST_echo"].exec_function
+        self.assertEqual(TestWorker.Echo._execute_wrapper, echo)
+
+
+class TestRegister(unittest.TestCase):
+    def test_register_output_threshold(self):
+        from frinx.workers.test.test_worker import TestWorker
+        from frinx.workers.uniconfig.uniconfig_worker import Uniconfig
+
+        conductor = FrinxConductorWrapper("http://conductor/api", max_thread_count=1)
+        Uniconfig.UniconfigReadStructuredDeviceDataBulk().register(conductor)
+        TestWorker.Echo().register(conductor)
+
+        self.assertEqual(
+            {"UNICONFIG_read_structured_device_data_bulk": 1024 * 1024},
+            conductor.external_payload_storage.output_thresholds,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
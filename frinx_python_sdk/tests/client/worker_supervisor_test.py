@@ -0,0 +1,69 @@
+import os
+import unittest
+from unittest.mock import MagicMock
+
+from frinx.client.FrinxConductorWrapper import FrinxConductorWrapper
+from frinx.client.WorkerSupervisor import WorkerSupervisor
+
+
+def register_tasks(conductor):
+    from frinx.workers.test.test_worker import TestWorker
+
+    TestWorker().register(conductor)
+
+
+class TestWorkerSupervisor(unittest.TestCase):
+    def create_conductor(self, **kwargs):
+        conductor = FrinxConductorWrapper("http://conductor/api", max_thread_count=1, **kwargs)
+        conductor.metadataClient = MagicMock()
+        self.conductors.append(conductor)
+        return conductor
+
+    def setUp(self) -> None:
+        self.conductors = []
+
+    def test_definitions_registered_only_by_supervisor(self):
+        register_workflows = MagicMock()
+        supervisor = WorkerSupervisor(
+            self.create_conductor, register_tasks, register_workflows, process_count=2
+        )
+        supervisor.register_definitions()
+
+        conductor = self.conductors[0]
+        self.assertTrue(conductor.metadataClient.registerTaskDefs.called)
+        self.assertEqual([], conductor.task_source.registered_task_types)
+        register_workflows.assert_called_once()
+
+        conductor = self.create_conductor(register_definitions=False, task_types=None)
+        register_tasks(conductor)
+        self.assertFalse(conductor.metadataClient.registerTaskDefs.called)
+        self.assertIn("TEST_echo", conductor.task_source.registered_task_types)
+
+    def test_task_type_groups(self):
+        conductor = self.create_conductor(register_definitions=False, task_types=["TEST_echo"])
+        register_tasks(conductor)
+        self.assertEqual(["TEST_echo"], conductor.task_source.registered_task_types)
+
+        supervisor = WorkerSupervisor(
+            self.create_conductor, register_tasks, task_type_groups=[["TEST_echo"], ["TEST_sleep"]]
+        )
+        self.assertEqual(2, supervisor.process_count)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "fork start method not available")
+    def test_exited_worker_restarted(self):
+        supervisor = WorkerSupervisor(
+            self.create_conductor, register_tasks, process_count=1, restart_delay=0
+        )
+        supervisor._run_worker = lambda index: os._exit(1)
+        supervisor.start_worker(0)
+        crashed = supervisor.processes[0]
+        crashed.join(5)
+
+        supervisor.check_workers()
+        self.assertIsNot(crashed, supervisor.processes[0])
+        self.assertEqual(1, supervisor.restart_count[0])
+        supervisor.processes[0].join(5)
+
+
+if __name__ == "__main__":
+    unittest.main()
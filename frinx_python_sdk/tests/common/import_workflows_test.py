@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from unittest.mock import patch
+
+from frinx.common import import_workflows
+
+
+class MetadataHandler(BaseHTTPRequestHandler):
+    requests = []
+    # Stored workflows by name
+    workflows = {}
+
+    def do_GET(self):
+        # Conductor adds audit fields to stored workflows
+        body = json.dumps([{**w, "createTime": 1} for w in MetadataHandler.workflows.values()])
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def do_PUT(self):
+        workflows = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        MetadataHandler.requests.append([workflow["name"] for workflow in workflows])
+        # Conductor rejects the whole list for one invalid workflow
+        valid = all(workflow["tasks"] for workflow in workflows)
+        if valid:
+            MetadataHandler.workflows.update((workflow["name"], workflow) for workflow in workflows)
+        self.send_response(204 if valid else 400)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def workflow(name, tasks=1):
+    return {"name": name, "version": 1, "tasks": [{"name": "TEST_echo"}] * tasks}
+
+
+class TestImportWorkflows(unittest.TestCase):
+    def setUp(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), MetadataHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        MetadataHandler.requests = []
+        MetadataHandler.workflows = {}
+
+        url = "http://127.0.0.1:%s/metadata/workflow" % server.server_port
+        url_patch = patch.object(import_workflows, "workflow_import_url", url)
+        url_patch.start()
+        self.addCleanup(url_patch.stop)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+
+    def write(self, file_name, content):
+        path = os.path.join(self.path, file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content if isinstance(content, str) else json.dumps(content))
+
+    def test_import_in_batches(self):
+        for i in range(5):
+            self.write(f"workflow_{i}.json", workflow(f"Workflow_{i}"))
+        self.write("nested/workflow_5.json", workflow("Workflow_5"))
+        self.write("README.md", "not a workflow")
+
+        results = import_workflows.import_workflows(self.path, batch_size=4)
+
+        self.assertEqual(6, len(results))
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual([4, 2], sorted(map(len, MetadataHandler.requests), reverse=True))
+
+    def test_results_per_workflow(self):
+        self.write("valid.json", workflow("Valid"))
+        self.write("rejected.json", workflow("Rejected", tasks=0))
+        self.write("broken.json", "{")
+        self.write("no_name.json", {"tasks": []})
+
+        results = {
+            os.path.basename(result.source): result
+            for result in import_workflows.import_workflows(self.path)
+        }
+
+        self.assertTrue(results["valid.json"].ok)
+        self.assertEqual(204, results["valid.json"].status_code)
+        self.assertEqual(400, results["rejected.json"].status_code)
+        self.assertIn("Invalid workflow", results["broken.json"].error)
+        self.assertIn("no name", results["no_name.json"].error)
+        # Rejected list is sent again workflow by workflow
+        self.assertEqual([["Rejected", "Valid"], ["Rejected"], ["Valid"]], MetadataHandler.requests)
+
+    def test_only_changed_workflows_sent(self):
+        self.write("workflow_1.json", workflow("Workflow_1"))
+        self.write("workflow_2.json", workflow("Workflow_2"))
+        import_workflows.import_workflows(self.path)
+
+        self.write("workflow_2.json", workflow("Workflow_2", tasks=2))
+        results = {result.name: result for result in import_workflows.import_workflows(self.path)}
+
+        self.assertEqual([["Workflow_1", "Workflow_2"], ["Workflow_2"]], MetadataHandler.requests)
+        self.assertTrue(results["Workflow_1"].ok)
+        self.assertIsNone(results["Workflow_1"].status_code)
+        self.assertEqual(204, results["Workflow_2"].status_code)
+
+    def test_cached_workflows_not_compared(self):
+        cache_file = os.path.join(self.path, "cache", "definitions.json")
+        os.makedirs(os.path.dirname(cache_file))
+        content = json.dumps(workflow("Workflow_1")).encode()
+        payloads = [import_workflows.WorkflowPayload("Workflow_1", "Workflow_1", content)]
+        import_workflows.update_workflows(payloads, cache_file=cache_file)
+
+        with patch.object(import_workflows, "get_workflow_defs") as get_workflow_defs:
+            results = import_workflows.update_workflows(payloads, cache_file=cache_file)
+
+        get_workflow_defs.assert_not_called()
+        self.assertEqual([["Workflow_1"]], MetadataHandler.requests)
+        self.assertTrue(results[0].ok)
+
+    def test_duplicate_workflows_rejected(self):
+        self.write("workflow_1.json", workflow("Workflow_1"))
+        self.write("copy/workflow_1.json", workflow("Workflow_1", tasks=2))
+        self.write("workflow_2.json", workflow("Workflow_2"))
+
+        results = {
+            os.path.relpath(result.source, self.path): result
+            for result in import_workflows.import_workflows(self.path)
+        }
+
+        self.assertEqual([["Workflow_2"]], MetadataHandler.requests)
+        self.assertTrue(results["workflow_2.json"].ok)
+        for source in ["workflow_1.json", "copy/workflow_1.json"]:
+            self.assertIn("Workflow_1:1 is defined more than once", results[source].error)
+
+    def test_not_a_directory(self):
+        self.assertEqual([], import_workflows.import_workflows(os.path.join(self.path, "none")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from frinx.common import json_codec
+from frinx.common.json_codec import JsonCodec
+from frinx.common.json_codec import OrjsonCodec
+
+
+class TestJsonCodec(unittest.TestCase):
+    codecs = [JsonCodec(), OrjsonCodec()]
+
+    def test_round_trip(self):
+        document = {"device": "R1", "interfaces": [{"name": "eth0/1", "mtu": 1500}], "desc": "ľšč"}
+        for codec in self.codecs:
+            with self.subTest(codec=codec.name):
+                encoded = codec.dumps(document)
+                self.assertIsInstance(encoded, bytes)
+                self.assertIn("ľšč".encode("utf8"), encoded)
+                self.assertEqual(document, codec.loads(encoded))
+                self.assertEqual(document, codec.loads(encoded.decode("utf8")))
+
+    def test_documents_rejected_by_orjson(self):
+        codec = OrjsonCodec()
+        self.assertEqual({"counter": 2**70}, codec.loads(codec.dumps({"counter": 2**70})))
+        self.assertEqual({"1": "one"}, codec.loads(codec.dumps({1: "one"})))
+        self.assertEqual(float("inf"), codec.loads(b'{"value": Infinity}')["value"])
+
+    def test_invalid_document(self):
+        for codec in self.codecs:
+            with self.assertRaises(ValueError):
+                codec.loads(b"{")
+
+    def test_set_codec(self):
+        self.addCleanup(json_codec.set_codec, json_codec.codec.name)
+        json_codec.set_codec("json")
+        self.assertEqual('{"a": 1}', json_codec.dumps_str({"a": 1}))
+
+        with self.assertRaises(ValueError):
+            json_codec.set_codec("yaml")
+
+
+if __name__ == "__main__":
+    unittest.main()
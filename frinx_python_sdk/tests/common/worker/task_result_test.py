@@ -0,0 +1,51 @@
+import unittest
+
+from frinx.common.conductor_enums import TaskResultStatus
+from frinx.common.worker.debug import DEBUG_MODELS
+from frinx.common.worker.task_result import TaskResult
+from frinx.common.worker.task_result import TaskResultModel
+
+
+class TestTaskResult(unittest.TestCase):
+    def test_defaults(self):
+        task_result = TaskResult(status="COMPLETED")
+        self.assertIs(TaskResultStatus.COMPLETED, task_result.status)
+        self.assertEqual({}, task_result.output)
+        self.assertEqual([], task_result.logs)
+        self.assertIsNot(task_result.output, TaskResult(status="COMPLETED").output)
+
+    def test_logs(self):
+        task_result = TaskResult(status=TaskResultStatus.FAILED, logs="failed")
+        self.assertEqual(["failed"], task_result.logs)
+        task_result.logs = task_result.logs or "unused"
+        self.assertEqual(["failed"], task_result.logs)
+        task_result.logs = "replaced"
+        self.assertEqual(["replaced"], task_result.logs)
+
+    def test_status(self):
+        task_result = TaskResult(status=TaskResultStatus.COMPLETED)
+        task_result.status = "FAILED"
+        self.assertIs(TaskResultStatus.FAILED, task_result.status)
+        with self.assertRaises(ValueError):
+            task_result.status = "UNKNOWN"
+
+    def test_same_as_model(self):
+        task_result = TaskResult(status=TaskResultStatus.COMPLETED, logs="done")
+        model = TaskResultModel(status=TaskResultStatus.COMPLETED, logs="done")
+        for result in task_result, model:
+            result.add_output_data("a", 1)
+            result.add_output_data("b", [2])
+        self.assertEqual(model.dict(), task_result.dict())
+        self.assertEqual(task_result, model)
+
+        task_result.add_output_data_dict({"c": 3})
+        self.assertEqual({"c": 3}, task_result.output)
+
+    @unittest.skipIf(DEBUG_MODELS, "TaskResult is TaskResultModel in debug mode")
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            TaskResult(status=TaskResultStatus.COMPLETED).extra = 1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import asyncio
+import unittest
+
+from frinx.common.conductor_enums import TaskResultStatus
+from frinx.common.worker.task import Task
+from frinx.common.worker.task import TaskView
+from frinx.common.worker.task_def import TaskDefinition
+from frinx.common.worker.task_def import TaskInput
+from frinx.common.worker.task_def import TaskOutput
+from frinx.common.worker.task_result import TaskResult
+from frinx.common.worker.worker import WorkerImpl
+from pydantic import ValidationError
+
+
+class Echo(WorkerImpl):
+    class WorkerDefinition(TaskDefinition):
+        name = "TEST_wrapper_echo"
+        description = "testing purposes: returns input unchanged"
+
+    class WorkerInput(TaskInput):
+        input: str
+
+    class WorkerOutput(TaskOutput):
+        output: str
+
+    def execute(self, task: Task) -> TaskResult:
+        task_result = TaskResult(status=TaskResultStatus.COMPLETED, logs="echo")
+        task_result.add_output_data("output", task.worker_input.input)
+        task_result.add_output_data("task_id", task.task_id)
+        return task_result
+
+
+class AsyncEcho(Echo):
+    async def execute(self, task: Task) -> TaskResult:
+        return Echo.execute(self, task)
+
+
+class Failing(Echo):
+    def execute(self, task: Task) -> TaskResult:
+        raise Exception("device not found")
+
+
+def polled_task(input_data):
+    return {"taskId": "task-1", "taskType": "TEST_wrapper_echo", "inputData": input_data}
+
+
+class TestExecuteWrapper(unittest.TestCase):
+    def test_execute(self):
+        result = Echo._execute_wrapper(polled_task({"input": "hello"}))
+        self.assertEqual(
+            {
+                "status": TaskResultStatus.COMPLETED,
+                "output": {"output": "hello", "task_id": "task-1"},
+                "logs": ["echo"],
+            },
+            result,
+        )
+
+    def test_execute_async(self):
+        result = asyncio.run(AsyncEcho._execute_wrapper_async(polled_task({"input": "hello"})))
+        self.assertEqual(TaskResultStatus.COMPLETED, result["status"])
+        self.assertEqual({"output": "hello", "task_id": "task-1"}, result["output"])
+
+    def test_invalid_input(self):
+        result = Echo._execute_wrapper(polled_task({"unknown": "hello"}))
+        self.assertEqual(TaskResultStatus.FAILED, result["status"])
+        self.assertIn("input", result["logs"][0])
+
+    def test_execute_failure(self):
+        result = Failing._execute_wrapper(polled_task({"input": "hello"}))
+        self.assertEqual(
+            {"status": TaskResultStatus.FAILED, "output": {}, "logs": ["device not found"]}, result
+        )
+
+
+class TestTaskView(unittest.TestCase):
+    def test_task_fields(self):
+        view = TaskView(polled_task({"input": "hello"}))
+        self.assertEqual("task-1", view.task_id)
+        self.assertEqual({"input": "hello"}, view.input_data)
+        self.assertIsNone(view.workflow_instance_id)
+        self.assertEqual({}, TaskView({}).input_data)
+
+    def test_task_field_coercion(self):
+        view = TaskView({"retryCount": "3", "inputData": {"input": "hello"}})
+        self.assertEqual(3, view.retry_count)
+        self.assertEqual(Task(**view.raw).retry_count, view.retry_count)
+        self.assertIs(view.input_data, view.input_data)
+
+        with self.assertRaises(ValidationError):
+            TaskView({"retryCount": "three"}).retry_count
+
+    def test_task_model(self):
+        view = TaskView(polled_task({"input": "hello"}))
+        self.assertEqual(Task(**polled_task({"input": "hello"})).dict(), view.dict())
+        self.assertIs(view.task, view.task)
+
+    def test_slots(self):
+        view = TaskView({})
+        with self.assertRaises(AttributeError):
+            view.input_data = {}
+
+
+if __name__ == "__main__":
+    unittest.main()
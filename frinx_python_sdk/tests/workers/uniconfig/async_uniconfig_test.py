@@ -0,0 +1,194 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from unittest.mock import patch
+
+from frinx.services.uniconfig import async_uniconfig_worker
+from frinx.services.uniconfig import async_utils
+from frinx.services.uniconfig import routing
+from frinx.services.uniconfig import uniconfig_worker
+from frinx.services.uniconfig import utils as uniconfig_utils
+from frinx.services.uniconfig.routing import DeviceZoneIndex
+
+
+class UniconfigHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    requests = []
+
+    def respond(self, code, body, cookies=()):
+        content = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for cookie in cookies:
+            self.send_header("Set-Cookie", cookie)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        UniconfigHandler.requests.append(("GET", self.path, self.headers.get("Cookie")))
+        if "node=missing" in self.path:
+            self.respond(404, {"errors": {}})
+        elif "node=slow" in self.path:
+            time.sleep(1)
+            self.respond(200, {})
+        else:
+            self.respond(200, {"frinx-openconfig-interfaces:interfaces": {}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        UniconfigHandler.requests.append(("POST", self.path, self.headers.get("Cookie")))
+        if self.path.endswith("create-transaction"):
+            self.respond(201, {}, ["UNICONFIGTXID=tx-1; Path=/", "uniconfig_server_id=s-1"])
+        elif self.path.endswith("close-transaction"):
+            self.respond(200, {})
+        else:
+            nodes = json.loads(body)["input"]["target-nodes"]["node"]
+            self.respond(200, {"output": {"overall-status": "complete", "nodes": nodes}})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestAsyncUniconfig(unittest.TestCase):
+    def setUp(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), UniconfigHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        UniconfigHandler.requests = []
+
+        self.url_base = "http://127.0.0.1:%s/rests" % server.server_port
+        url_patch = patch.object(uniconfig_utils, "uniconfig_url_base", self.url_base)
+        url_patch.start()
+        self.addCleanup(url_patch.stop)
+
+    def run_async(self, coroutine):
+        async def run():
+            try:
+                return await coroutine
+            finally:
+                await async_utils.uniconfig_client.close()
+
+        return asyncio.run(run())
+
+    def test_read_structured_data(self):
+        response = self.run_async(
+            async_uniconfig_worker.read_structured_data(
+                "R1", "/frinx-openconfig-interfaces:interfaces", None
+            )
+        )
+
+        self.assertEqual(200, response.code)
+        self.assertEqual({"frinx-openconfig-interfaces:interfaces": {}}, response.data)
+        method, path, _ = UniconfigHandler.requests[0]
+        self.assertEqual("GET", method)
+        self.assertTrue(
+            path.endswith(
+                "node=R1/frinx-uniconfig-topology:configuration"
+                "/frinx-openconfig-interfaces:interfaces"
+            )
+        )
+
+    def test_concurrent_reads(self):
+        async def read_all():
+            return await asyncio.gather(
+                *[async_uniconfig_worker.read_structured_data(f"R{i}", "", None) for i in range(20)]
+            )
+
+        responses = self.run_async(read_all())
+        self.assertEqual([200] * 20, [response.code for response in responses])
+
+    def test_transaction(self):
+        response = self.run_async(async_uniconfig_worker.create_tx_multizone(["R1", "R2"]))
+        self.assertEqual(201, response.code)
+        cookies = response.data["uniconfig_cookies_multizone"][self.url_base]
+        self.assertEqual("tx-1", cookies["UNICONFIGTXID"])
+        self.assertEqual("s-1", cookies["uniconfig_server_id"])
+
+        uniconfig_context = {"uniconfig_cookies_multizone": {self.url_base: cookies}}
+        response = self.run_async(async_uniconfig_worker.commit("R1,R2", uniconfig_context))
+        self.assertEqual(200, response.code)
+        body = response.data["responses"][0]["response_body"]
+        self.assertEqual(["R1", "R2"], body["output"]["nodes"])
+        self.assertEqual("tx-1", response.data["responses"][0]["UNICONFIGTXID"])
+
+        response = self.run_async(async_uniconfig_worker.close_tx_multizone(uniconfig_context))
+        self.assertEqual(200, response.code)
+        self.assertEqual(
+            "UNICONFIGTXID=tx-1; uniconfig_server_id=s-1", UniconfigHandler.requests[-1][2]
+        )
+
+    def test_read_bulk(self):
+        reads = [
+            {"device_id": "R1", "uri": "/frinx-openconfig-interfaces:interfaces"},
+            ["missing", "/frinx-openconfig-interfaces:interfaces"],
+            ["slow", ""],
+        ]
+        response = uniconfig_worker.read_structured_data_bulk(
+            reads=reads, devices="R1,R2", uri="", max_concurrency=2, timeout=0.5
+        )
+
+        self.assertEqual(200, response.code)
+        interfaces = {"frinx-openconfig-interfaces:interfaces": {}}
+        self.assertEqual(
+            {
+                "R1": {"/frinx-openconfig-interfaces:interfaces": interfaces, "": interfaces},
+                "R2": {"": interfaces},
+            },
+            response.data["results"],
+        )
+        errors = response.data["errors"]
+        self.assertEqual(
+            404, errors["missing"]["/frinx-openconfig-interfaces:interfaces"]["response_code"]
+        )
+        self.assertIn("Deadline", errors["slow"][""]["error"])
+        self.assertEqual({"reads": 5, "completed": 3, "failed": 2}, response.data["summary"])
+
+    def test_read_bulk_session_reused(self):
+        uniconfig_worker.read_structured_data_bulk(devices=["R1"], uri="")
+        loop = async_utils.event_loop_thread.get_loop()
+        session = async_utils.uniconfig_client.sessions[loop]
+        uniconfig_worker.read_structured_data_bulk(devices=["R2"], uri="")
+
+        self.assertIs(session, async_utils.uniconfig_client.sessions[loop])
+        self.assertFalse(session.closed)
+
+    def test_read_bulk_routed_off_loop(self):
+        threads = []
+
+        def fetch_all():
+            threads.append(threading.current_thread().name)
+            return {"R1": "uc-a"}
+
+        index = DeviceZoneIndex(self.url_base, fetch_all=fetch_all, fetch_device=lambda _: None)
+        with patch.object(routing, "device_zone_index", index):
+            response = uniconfig_worker.read_structured_data_bulk(devices=["R1", "R2"], uri="")
+
+        self.assertEqual({"reads": 2, "completed": 2, "failed": 0}, response.data["summary"])
+        self.assertEqual(1, len(threads))
+        self.assertNotEqual("uniconfig-event-loop", threads[0])
+
+    def test_read_bulk_failed(self):
+        response = uniconfig_worker.read_structured_data_bulk(devices=["missing"], uri="")
+        self.assertEqual(500, response.code)
+        self.assertEqual({"reads": 1, "completed": 0, "failed": 1}, response.data["summary"])
+
+    def test_parse_reads(self):
+        self.assertEqual(
+            [("R1", "/a"), ("R2", "/b"), ("R3", "/c")],
+            uniconfig_worker.parse_reads(
+                '[{"device_id": "R1", "uri": "/a"}, ["R2", "/b"]]', "R3", "/c"
+            ),
+        )
+        with self.assertRaises(Exception):
+            uniconfig_worker.parse_reads([{"device_id": "R1"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from unittest.mock import patch
+
+from frinx.services.uniconfig import uniconfig_worker
+from frinx.services.uniconfig import utils as uniconfig_utils
+from frinx.services.uniconfig.models import ClusterWithDevices
+
+
+class ZoneHandler(BaseHTTPRequestHandler):
+    """Uniconfig zone, requests of all zones wait for each other on the barrier."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    barrier = None
+    create_code = 201
+    metadata_code = 200
+    requests = []
+
+    def respond(self, code, body, cookies=()):
+        content = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for cookie in cookies:
+            self.send_header("Set-Cookie", cookie)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        self.requests.append(("GET", self.path.rsplit("/", 1)[-1], self.headers.get("Cookie")))
+        self.respond(self.metadata_code, {})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        operation = self.path.rsplit(":", 1)[-1]
+        self.requests.append(("POST", operation, self.headers.get("Cookie")))
+        if self.barrier is not None and operation in ("create-transaction", "commit"):
+            self.barrier.wait()
+        if operation == "create-transaction":
+            port = self.server.server_port
+            self.respond(self.create_code, {}, [f"UNICONFIGTXID=tx-{port}; Path=/"])
+        elif operation == "commit":
+            nodes = json.loads(body)["input"]["target-nodes"]["node"]
+            self.respond(200, {"output": {"overall-status": "complete", "nodes": nodes}})
+        else:
+            self.respond(200, {})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestMultizone(unittest.TestCase):
+    def setUp(self) -> None:
+        barrier = threading.Barrier(2, timeout=5)
+        self.zones = []
+        for create_code, metadata_code in [(201, 200), (201, 404)]:
+            handler = type(
+                "Handler",
+                (ZoneHandler,),
+                {
+                    "barrier": barrier,
+                    "create_code": create_code,
+                    "metadata_code": metadata_code,
+                    "requests": [],
+                },
+            )
+            server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.addCleanup(server.server_close)
+            self.addCleanup(server.shutdown)
+            self.zones.append((f"http://127.0.0.1:{server.server_port}/rests", handler))
+            handler.tx_id = f"tx-{server.server_port}"
+
+        devices_patch = patch.object(
+            uniconfig_utils,
+            "get_devices_by_uniconfig",
+            lambda devices: [
+                ClusterWithDevices(uc_cluster=url, device_names=devices[index::2])
+                for index, (url, _) in enumerate(self.zones)
+            ],
+        )
+        devices_patch.start()
+        self.addCleanup(devices_patch.stop)
+
+    def multizone_context(self):
+        return {
+            "uniconfig_cookies_multizone": {
+                url: {"UNICONFIGTXID": handler.tx_id} for url, handler in self.zones
+            }
+        }
+
+    def test_commit(self):
+        # Commits of both zones are sent at once, otherwise the barrier breaks
+        response = uniconfig_worker.commit(["R1", "R2", "R3"], self.multizone_context())
+
+        self.assertEqual(200, response.code)
+        responses = response.data["responses"]
+        self.assertEqual(
+            [url for url, _ in self.zones], [r["url"].split("/op")[0] for r in responses]
+        )
+        self.assertEqual(["R1", "R3"], responses[0]["response_body"]["output"]["nodes"])
+        self.assertEqual(["R2"], responses[1]["response_body"]["output"]["nodes"])
+        for (_, handler), zone_response in zip(self.zones, responses):
+            tx_id = zone_response["UNICONFIGTXID"]
+            self.assertEqual(("POST", "commit", f"UNICONFIGTXID={tx_id}"), handler.requests[0])
+
+    def test_create_tx_multizone(self):
+        response = uniconfig_worker.create_tx_multizone(["R1", "R2"])
+
+        self.assertEqual(201, response.code)
+        self.assertEqual(
+            self.multizone_context()["uniconfig_cookies_multizone"],
+            response.data["uniconfig_cookies_multizone"],
+        )
+
+    def test_create_tx_multizone_failed(self):
+        (failed_url, failed_handler), (_, opened_handler) = self.zones
+        failed_handler.create_code = 500
+
+        response = uniconfig_worker.create_tx_multizone(["R1", "R2"])
+
+        self.assertEqual(500, response.code)
+        self.assertEqual(failed_url, response.data["failed_zone"])
+        self.assertEqual(["create-transaction"], [r[1] for r in failed_handler.requests])
+        self.assertEqual(
+            ("POST", "close-transaction", f"UNICONFIGTXID={opened_handler.tx_id}"),
+            opened_handler.requests[-1],
+        )
+
+    def test_revert_tx_multizone(self):
+        for _, handler in self.zones:
+            handler.barrier = None
+
+        response = uniconfig_utils.revert_tx_multizone(
+            self.multizone_context()["uniconfig_cookies_multizone"]
+        )
+
+        self.assertEqual(200, response.code)
+        (_, reverted_handler), (skipped_url, skipped_handler) = self.zones
+        self.assertEqual(
+            ["create-transaction", reverted_handler.tx_id, "revert-changes", "commit"],
+            [r[1].split("=")[-1] for r in reverted_handler.requests],
+        )
+        self.assertEqual(
+            ["create-transaction", skipped_handler.tx_id, "close-transaction"],
+            [r[1].split("=")[-1] for r in skipped_handler.requests],
+        )
+        self.assertEqual(
+            {"UNICONFIGTXID", "status"}, set(response.data["UNICONFIGTXID_multizone"][skipped_url])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
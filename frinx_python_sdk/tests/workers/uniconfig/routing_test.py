@@ -0,0 +1,189 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from frinx.services.inventory import utils as inventory_utils
+from frinx.services.inventory.utils import InventoryOutput
+from frinx.services.uniconfig import routing
+from frinx.services.uniconfig import utils as uniconfig_utils
+from frinx.services.uniconfig.routing import DeviceZoneIndex
+
+
+class TestDeviceZoneIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.inventory = {"R1": "uc-a", "R2": "uc-b", "R3": "uc-a"}
+        self.reloads = 0
+        self.lookups = []
+        self.index = DeviceZoneIndex(
+            "http://$zone:8181/rests",
+            max_lookups=2,
+            fetch_all=self.fetch_all,
+            fetch_device=self.fetch_device,
+        )
+
+    def fetch_all(self):
+        self.reloads += 1
+        return dict(self.inventory)
+
+    def fetch_device(self, device):
+        self.lookups.append(device)
+        return self.inventory.get(device)
+
+    def test_clusters(self):
+        self.assertEqual(
+            {"R2": "http://uc-b:8181/rests", "R1": "http://uc-a:8181/rests"},
+            self.index.clusters(["R2", "R1"]),
+        )
+        for _ in range(100):
+            self.assertEqual("http://uc-a:8181/rests", self.index.cluster("R3"))
+        self.assertEqual(1, self.reloads)
+        self.assertEqual([], self.lookups)
+
+    def test_ttl(self):
+        self.index.cluster("R1")
+        self.inventory["R1"] = "uc-c"
+        self.assertEqual("http://uc-a:8181/rests", self.index.cluster("R1"))
+
+        # Expired index is reloaded in the background
+        self.index.expires = time.monotonic()
+        self.index.cluster("R1")
+        with self.index.reload_lock:
+            self.assertEqual("http://uc-c:8181/rests", self.index.cluster("R1"))
+        self.assertEqual(2, self.reloads)
+
+    def test_lookups_during_reload(self):
+        self.index.cluster("R1")
+        reloading = threading.Event()
+        reloaded = threading.Event()
+
+        def fetch_all():
+            reloading.set()
+            reloaded.wait(5)
+            return self.fetch_all()
+
+        self.index.fetch_all = fetch_all
+        self.index.expires = time.monotonic()
+        self.index.cluster("R1")
+        self.assertTrue(reloading.wait(5))
+
+        # Known devices are not waiting for the reload, new ones are looked up meanwhile
+        self.inventory["R4"] = "uc-c"
+        self.assertEqual(
+            {"R2": "http://uc-b:8181/rests", "R4": "http://uc-c:8181/rests"},
+            self.index.clusters(["R2", "R4"]),
+        )
+        self.assertEqual(["R4"], self.lookups)
+
+        reloaded.set()
+        with self.index.reload_lock:
+            self.assertEqual(2, self.reloads)
+
+    def test_missing_devices(self):
+        self.index.cluster("R1")
+        self.inventory.update({"R4": "uc-b", "R5": "uc-b", "R6": "uc-c", "R7": "uc-c"})
+
+        # Few new devices are looked up one by one, unknown ones are remembered
+        self.assertEqual(
+            {"R4": "http://uc-b:8181/rests", "X1": None}, self.index.clusters(["R4", "X1"])
+        )
+        self.assertIsNone(self.index.cluster("X1"))
+        self.assertEqual(["R4", "X1"], self.lookups)
+        self.assertEqual(1, self.reloads)
+
+        # Many new devices reload the index
+        self.index.clusters(["R5", "R6", "R7", "X2"])
+        self.assertEqual(2, self.reloads)
+        self.assertEqual(["R4", "X1"], self.lookups)
+        self.assertIsNone(self.index.cluster("X2"))
+        self.assertEqual(2, self.reloads)
+
+    def test_inventory_failure(self):
+        def fail(*args):
+            raise ConnectionError("Inventory is not available")
+
+        index = DeviceZoneIndex("http://$zone:8181/rests", fetch_all=fail, fetch_device=fail)
+        self.assertIsNone(index.cluster("R1"))
+        # Reload is retried after RETRY_INTERVAL, zone of R1 is not remembered
+        self.assertGreater(index.expires, time.monotonic())
+        self.assertNotIn("R1", index.zones)
+
+    def test_concurrent_reload(self):
+        def fetch_all():
+            time.sleep(0.1)
+            return self.fetch_all()
+
+        self.index.fetch_all = fetch_all
+        threads = [
+            threading.Thread(target=self.index.clusters, args=(["R1", "R2"],)) for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, self.reloads)
+        self.assertEqual([], self.lookups)
+
+
+class TestRouting(unittest.TestCase):
+    def test_not_configured(self):
+        with patch.object(routing, "device_zone_index", None):
+            self.assertEqual(
+                uniconfig_utils.uniconfig_url_base,
+                uniconfig_utils.get_uniconfig_cluster_from_task("R1"),
+            )
+            devices = uniconfig_utils.get_devices_by_uniconfig(["R1", "R2"])
+            self.assertEqual(
+                [(uniconfig_utils.uniconfig_url_base, ["R1", "R2"])], [tuple(d) for d in devices]
+            )
+
+    def test_devices_by_uniconfig(self):
+        index = DeviceZoneIndex(
+            "http://$zone:8181/rests",
+            fetch_all=lambda: {"R1": "uc-a", "R2": "uc-b", "R3": "uc-a"},
+            fetch_device=lambda device: None,
+        )
+        with patch.object(routing, "device_zone_index", index):
+            self.assertEqual(
+                "http://uc-b:8181/rests", uniconfig_utils.get_uniconfig_cluster_from_task("R2")
+            )
+            self.assertEqual(
+                uniconfig_utils.uniconfig_url_base,
+                uniconfig_utils.get_uniconfig_cluster_from_task("X1"),
+            )
+            devices = uniconfig_utils.get_devices_by_uniconfig(["R1", "R2", "X1", "R3"])
+            self.assertEqual(
+                [
+                    ("http://uc-a:8181/rests", ["R1", "R3"]),
+                    ("http://uc-b:8181/rests", ["R2"]),
+                    (uniconfig_utils.uniconfig_url_base, ["X1"]),
+                ],
+                [tuple(d) for d in devices],
+            )
+
+            cookies = uniconfig_utils.extract_uniconfig_cookies(
+                {"uniconfig_cookies_multizone": {"http://uc-b:8181/rests": {"UNICONFIGTXID": "b"}}},
+                "R2",
+            )
+            self.assertEqual({"UNICONFIGTXID": "b"}, cookies)
+
+
+class TestInventoryZones(unittest.TestCase):
+    def test_get_device_zones(self):
+        pages = {
+            "": {"edges": [{"node": {"name": "R1", "zone": {"name": "uc-a"}}}], "end": "c1"},
+            "c1": {"edges": [{"node": {"name": "R2", "zone": {"name": "uc-b"}}}], "end": None},
+        }
+
+        def execute_inventory(body, variables):
+            page = pages[variables["after"]]
+            page_info = {"endCursor": page["end"], "hasNextPage": page["end"] is not None}
+            data = {"devices": {"edges": page["edges"], "pageInfo": page_info}}
+            return InventoryOutput(data=data, status="data", code=200)
+
+        with patch.object(inventory_utils, "execute_inventory", execute_inventory):
+            self.assertEqual({"R1": "uc-a", "R2": "uc-b"}, inventory_utils.get_device_zones())
+
+
+if __name__ == "__main__":
+    unittest.main()
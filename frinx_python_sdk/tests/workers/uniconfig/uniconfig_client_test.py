@@ -0,0 +1,82 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from unittest.mock import patch
+
+import requests
+from frinx.services.uniconfig import utils as uniconfig_utils
+from frinx.services.uniconfig.utils import UniconfigClient
+from frinx.services.uniconfig.utils import parse_response_cookies
+
+
+class UniconfigHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    client_ports = []
+    cookies = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        UniconfigHandler.client_ports.append(self.client_address[1])
+        UniconfigHandler.cookies.append(self.headers.get("Cookie"))
+        if self.path.endswith("/slow"):
+            time.sleep(0.5)
+        content = b'{"output": {}}'
+        self.send_response(201)
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("Set-Cookie", "UNICONFIGTXID=tx-2; Path=/")
+        self.send_header("Set-Cookie", "uniconfig_server_id=server-2; Path=/")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestUniconfigClient(unittest.TestCase):
+    def setUp(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), UniconfigHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        UniconfigHandler.client_ports = []
+        UniconfigHandler.cookies = []
+        self.url = "http://127.0.0.1:%s/rests/operations" % server.server_port
+
+        self.client = UniconfigClient(pool_size=2, timeout=5)
+        self.addCleanup(self.client.close)
+
+    def test_connection_reused(self):
+        for _ in range(3):
+            self.assertEqual(201, self.client.request("POST", self.url + "/commit").status_code)
+        self.assertEqual(1, len(set(UniconfigHandler.client_ports)))
+        self.assertIs(self.client.session(self.url), self.client.session(self.url + "/other"))
+
+    def test_transaction_cookies(self):
+        response = self.client.request(
+            "POST", self.url, cookies={"UNICONFIGTXID": "tx-1", "uniconfig_server_id": "server-1"}
+        )
+        cookies = parse_response_cookies(response)
+        self.assertEqual("tx-2", cookies.transaction_id)
+        self.assertEqual("server-2", cookies.uniconfig_server_id)
+
+        # Cookies of a response are not sent with other requests
+        self.client.request("POST", self.url)
+        self.assertEqual(
+            ["UNICONFIGTXID=tx-1; uniconfig_server_id=server-1", None], UniconfigHandler.cookies
+        )
+
+    def test_client_timeout(self):
+        client = UniconfigClient(timeout=0.1, retries=0)
+        self.addCleanup(client.close)
+
+        with patch.object(uniconfig_utils, "uniconfig_client", client):
+            with self.assertRaises(requests.exceptions.Timeout):
+                uniconfig_utils.request("POST", self.url + "/slow")
+            self.assertEqual(201, uniconfig_utils.request("POST", self.url, timeout=5).code)
+
+
+if __name__ == "__main__":
+    unittest.main()